@@ -0,0 +1,208 @@
+#import packages
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+# Rows generated per chunk. Fixed, so a seed produces the same file at any size
+CHUNK_ROWS = 1_000_000
+
+# Syllables names are built from; every combination is letters only and 4+ characters long
+FIRST_SYLLABLES = ['Al', 'An', 'Ar', 'Be', 'Bri', 'Ca', 'Cha', 'Da', 'De', 'El', 'Em', 'Fa', 'Ga', 'Ha', 'Is',
+                   'Ja', 'Jo', 'Ka', 'Ke', 'La', 'Le', 'Li', 'Ma', 'Mi', 'Na', 'Ni', 'Ol', 'Pa', 'Ra', 'Ro',
+                   'Sa', 'Se', 'So', 'Ta', 'Th', 'Va', 'Vi', 'Wi', 'Xa', 'Za']
+SECOND_SYLLABLES = ['bel', 'bert', 'da', 'dan', 'die', 'don', 'el', 'ena', 'eth', 'fred', 'ia', 'ian', 'ick',
+                    'ie', 'in', 'ina', 'ine', 'ira', 'is', 'ja', 'ko', 'la', 'lie', 'lyn', 'ma', 'mar', 'mon',
+                    'na', 'nah', 'ne', 'ni', 'nor', 'ra', 'rah', 'ric', 'ron', 'ry', 'sa', 'son', 'ta']
+SURNAME_SYLLABLES = ['Ander', 'Bak', 'Carl', 'Dav', 'Ed', 'Fitz', 'Gar', 'Har', 'Iver', 'John', 'Kell',
+                     'Lar', 'Mac', 'Nel', 'Ols', 'Pet', 'Quin', 'Riv', 'Sand', 'Tay', 'Ulm', 'Van', 'Wat',
+                     'Young', 'Zim']
+SURNAME_ENDINGS = ['as', 'by', 'er', 'ers', 'ez', 'ford', 'ham', 'ley', 'man', 'son', 'ton', 'well']
+
+# Kinds of dirty values; each maps to an exclusion reason of the default rules
+ERROR_KINDS = ('blank_name', 'short_name', 'special_characters', 'blank_day', 'bad_day', 'bad_month',
+               'pre_1940', 'non_numeric')
+
+# Share of rows with each kind of error (a row has at most one)
+DEFAULT_ERROR_MIX = {
+    'blank_name': 0.03,
+    'short_name': 0.01,
+    'special_characters': 0.02,
+    'blank_day': 0.005,
+    'bad_day': 0.01,
+    'bad_month': 0.005,
+    'pre_1940': 0.03,
+    'non_numeric': 0.005
+}
+
+SPECIAL_CHARACTERS = np.array(["'", '-', '.', '0', '@', 'é', '_'], dtype=object)
+
+DEFAULT_NAME_CARDINALITY = 5000
+
+# Exponent of the Zipf-like name frequencies: a few common names, a long tail of rare ones
+DEFAULT_NAME_SKEW = 1.1
+
+COLUMNS = ['FirstName', 'BirthDay', 'BirthMonth', 'BirthYear']
+
+
+def name_vocabulary(cardinality: int) -> np.ndarray:
+    """
+    Distinct valid names, e.g. 'Dadan' or 'Kaina Macson'. Name i is the same
+    for every cardinality, so smaller vocabularies are prefixes of larger ones.
+    
+    Args:
+        cardinality: Number of distinct names
+    
+    Returns:
+        Object array of names
+    """
+    first_names = np.array([a + b.lower() for a in FIRST_SYLLABLES for b in SECOND_SYLLABLES], dtype=object)
+    surnames = np.array([f" {a}{b}" for a in SURNAME_SYLLABLES for b in SURNAME_ENDINGS], dtype=object)
+    # Each first name alone, with one surname, or with a double surname
+    limit = len(first_names) * (1 + len(surnames) + len(surnames) ** 2)
+    if cardinality > limit:
+        raise ValueError(f"At most {limit} distinct names can be generated")
+    
+    # First names vary fastest, so small vocabularies are mostly first names only
+    first, suffix = np.divmod(np.arange(cardinality), len(first_names))[::-1]
+    names = first_names[first]
+    single = (suffix >= 1) & (suffix <= len(surnames))
+    names[single] = names[single] + surnames[suffix[single] - 1]
+    double = suffix > len(surnames)
+    outer, inner = np.divmod(suffix[double] - len(surnames) - 1, len(surnames))
+    names[double] = names[double] + surnames[outer] + surnames[inner]
+    return names
+
+
+def name_probabilities(cardinality: int, skew: float = DEFAULT_NAME_SKEW) -> np.ndarray:
+    """Zipf-like frequency of each name in the vocabulary, most common first"""
+    weights = 1.0 / np.arange(1, cardinality + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate_chunk(rows: int, seed: int, chunk_index: int, names: np.ndarray, cumulative: np.ndarray,
+                   error_mix: Dict[str, float]) -> pd.DataFrame:
+    """
+    One chunk of dirty rows, in the upload column names.
+    
+    Args:
+        rows: Rows in the chunk
+        seed: Dataset seed
+        chunk_index: Position of the chunk in the file (seeds its generator)
+        names: Name vocabulary
+        cumulative: Cumulative name probabilities
+        error_mix: Share of rows per error kind
+    
+    Returns:
+        DataFrame of strings with FirstName, BirthDay, BirthMonth, BirthYear
+    """
+    rng = np.random.default_rng([seed, chunk_index])
+    name = names[np.minimum(np.searchsorted(cumulative, rng.random(rows)), len(names) - 1)]
+    # Days 1-28 are valid in every month, so clean rows also pass a calendar check
+    day = rng.integers(1, 29, rows).astype(str).astype(object)
+    month = rng.integers(1, 13, rows).astype(str).astype(object)
+    year = rng.integers(1940, 2011, rows).astype(str).astype(object)
+    
+    # One uniform draw per row picks its error kind (or none) from the cumulative mix
+    draw = rng.random(rows)
+    bounds = np.cumsum([error_mix.get(kind, 0.0) for kind in ERROR_KINDS])
+    kinds = np.searchsorted(bounds, draw, side='right')
+    
+    def rows_of(kind):
+        return np.flatnonzero(kinds == ERROR_KINDS.index(kind))
+    
+    name[rows_of('blank_name')] = ''
+    short = rows_of('short_name')
+    name[short] = [value[:2] for value in name[short]]
+    special = rows_of('special_characters')
+    name[special] = [value[:cut] + char + value[cut:] for value, char, cut in
+                     zip(name[special], rng.choice(SPECIAL_CHARACTERS, len(special)), rng.integers(1, 4, len(special)))]
+    day[rows_of('blank_day')] = ''
+    bad_day = rows_of('bad_day')
+    day[bad_day] = rng.choice([0, 32, 35, 40, 99], len(bad_day)).astype(str)
+    bad_month = rows_of('bad_month')
+    month[bad_month] = rng.choice([0, 13, 14, 20], len(bad_month)).astype(str)
+    pre_1940 = rows_of('pre_1940')
+    year[pre_1940] = rng.integers(1800, 1940, len(pre_1940)).astype(str)
+    non_numeric = rows_of('non_numeric')
+    year[non_numeric] = rng.choice(['unknown', '19x5', '1990.5'], len(non_numeric))
+    
+    return pd.DataFrame({'FirstName': name, 'BirthDay': day, 'BirthMonth': month, 'BirthYear': year})
+
+
+def generate_csv(filepath: str, rows: int, names: int = DEFAULT_NAME_CARDINALITY, seed: int = 0,
+                 error_mix: Dict[str, float] = None, skew: float = DEFAULT_NAME_SKEW) -> Dict:
+    """
+    Write a deterministic CSV of dirty names and birth dates, chunk by chunk,
+    so files of 10^8 rows never need to fit in memory.
+    
+    Args:
+        filepath: Output CSV path
+        rows: Number of data rows
+        names: Name cardinality (distinct valid names)
+        seed: Random seed; the same arguments always produce the same file
+        error_mix: Share of rows per error kind (DEFAULT_ERROR_MIX when None)
+        skew: Zipf exponent of the name frequencies
+    
+    Returns:
+        Dictionary describing the file: rows, bytes, names, seed and error mix
+    """
+    error_mix = DEFAULT_ERROR_MIX if error_mix is None else error_mix
+    unknown = set(error_mix) - set(ERROR_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown error kinds: {', '.join(sorted(unknown))}")
+    if sum(error_mix.values()) > 1:
+        raise ValueError("Error shares must add up to at most 1")
+    
+    vocabulary = name_vocabulary(names)
+    cumulative = np.cumsum(name_probabilities(names, skew))
+    with open(filepath, 'w', newline='') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for chunk_index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            chunk = generate_chunk(min(CHUNK_ROWS, rows - start), seed, chunk_index, vocabulary, cumulative, error_mix)
+            chunk.to_csv(f, header=False, index=False)
+    
+    return {
+        'path': filepath,
+        'rows': rows,
+        'bytes': os.path.getsize(filepath),
+        'names': names,
+        'skew': skew,
+        'seed': seed,
+        'error_mix': dict(error_mix)
+    }
+
+
+def parse_error_mix(text: str) -> Dict[str, float]:
+    """Parse 'blank_name=0.05,bad_day=0.02' into an error mix; unlisted kinds get no errors"""
+    mix = {}
+    for item in filter(None, text.split(',')):
+        kind, _, share = item.partition('=')
+        mix[kind.strip()] = float(share)
+    return mix
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Generate a deterministic CSV of dirty names and birth dates",
+        epilog="Example: python -m benchmarks.generate synthetic.csv --rows 1000000 --names 20000"
+    )
+    arg_parser.add_argument('output', help="CSV file to write")
+    arg_parser.add_argument('--rows', type=int, default=100000, help="Number of data rows (10^3-10^8)")
+    arg_parser.add_argument('--names', type=int, default=DEFAULT_NAME_CARDINALITY, help="Distinct valid names")
+    arg_parser.add_argument('--skew', type=float, default=DEFAULT_NAME_SKEW, help="Zipf exponent of name frequencies")
+    arg_parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    arg_parser.add_argument('--errors', type=parse_error_mix, default=None,
+                            help="Error mix, e.g. blank_name=0.05,bad_day=0.02 "
+                                 f"(kinds: {', '.join(ERROR_KINDS)}; default: {DEFAULT_ERROR_MIX})")
+    args = arg_parser.parse_args()
+    
+    try:
+        info = generate_csv(args.output, args.rows, names=args.names, seed=args.seed,
+                            error_mix=args.errors, skew=args.skew)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"✓ Wrote {info['rows']} rows ({info['bytes']} bytes) to: {info['path']}")
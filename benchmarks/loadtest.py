@@ -0,0 +1,379 @@
+#import packages
+import os
+import sys
+import gzip
+import json
+import time
+import uuid
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from http.cookies import SimpleCookie
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+from benchmarks.generate import DEFAULT_NAME_CARDINALITY, generate_csv, name_vocabulary
+from benchmarks.run import RESULTS_DIR, environment
+
+DEFAULT_CLIENTS = [1, 4, 16]
+
+# Relative frequency of each kind of request in the traffic mix
+ROUTE_WEIGHTS = {
+    'index': 25,
+    'index:filter_sort': 25,
+    'api:chart_data': 20,
+    'api:rows': 10,
+    'download:included_csv': 5,
+    'download:excluded_csv': 5,
+    'download:top80_csv': 5,
+    'download:top80_json': 5,
+    'download:included_pdf': 0,  # reportlab renders every row; enable with --with-pdf
+    'download:excluded_pdf': 0
+}
+
+# Latency target used to report how many clients the app handles before degrading
+DEFAULT_P95_TARGET_MS = 500
+
+SERVER_START_TIMEOUT = 60
+
+
+class Traffic:
+    
+    #Builds the paths of a realistic request mix for one seeded dataset.
+    
+    def __init__(self, dataset_id: str, names: int, weights: Dict[str, int]):
+        self.dataset_id = dataset_id
+        self.routes = [route for route, weight in weights.items() if weight > 0]
+        self.weights = [weights[route] for route in self.routes]
+        # Filters users type: prefixes of common names
+        common = name_vocabulary(min(names, 200))
+        self.name_filters = sorted({name[:length].lower() for name in common for length in (2, 3)})
+    
+    def next_request(self, rng: random.Random) -> Tuple[str, str]:
+        """Pick the next request: (route name, path with query string)"""
+        route = rng.choices(self.routes, self.weights)[0]
+        if route == 'index':
+            return route, '/?' + urlencode({'dataset_id': self.dataset_id, 'included_page': rng.randint(1, 5),
+                                            'excluded_page': rng.randint(1, 3)})
+        if route == 'index:filter_sort':
+            query = {'dataset_id': self.dataset_id,
+                     'sort_by': rng.choice(['name', 'birth_year', 'birth_month', 'birth_day']),
+                     'sort_order': rng.choice(['asc', 'desc']),
+                     'included_page': rng.randint(1, 3)}
+            if rng.random() < 0.6:
+                query['name_filter'] = rng.choice(self.name_filters)
+            if rng.random() < 0.4:
+                query['year_filter'] = rng.randint(1940, 2010)
+            if rng.random() < 0.2:
+                query['reason_filter'] = 'missing name'
+            return route, '/?' + urlencode(query)
+        if route == 'api:chart_data':
+            return route, '/api/chart-data'
+        if route == 'api:rows':
+            query = {'dataset_id': self.dataset_id, 'limit': 50, 'sort_by': rng.choice(['name', 'birth_year'])}
+            if rng.random() < 0.5:
+                query['name_filter'] = rng.choice(self.name_filters)
+            return route, '/api/rows/included?' + urlencode(query)
+        table, _, fmt = route.split(':', 1)[1].rpartition('_')
+        return route, f'/download/{table}/{fmt}'
+
+
+class Client:
+    
+    #One virtual user: a keep-alive connection carrying the seeded session cookie.
+    
+    def __init__(self, host: str, port: int, cookie: str, timeout: float = 300):
+        self.host = host
+        self.port = port
+        self.cookie = cookie
+        self.timeout = timeout
+        self.connection = None
+    
+    def get(self, path: str) -> Tuple[int, int]:
+        """
+        Send a GET and read the whole body.
+        
+        Returns:
+            (status, body bytes); status 0 when the connection failed
+        """
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request('GET', path, headers={'Cookie': self.cookie})
+                response = self.connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                # The server closed an idle keep-alive connection; reconnect once
+                self.close()
+                if attempt:
+                    return 0, 0
+                continue
+            if response.will_close:
+                self.close()
+            return response.status, len(body)
+        return 0, 0
+    
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_step(host: str, port: int, cookie: str, traffic: Traffic, clients: int, duration: float,
+             warmup: float, think: float, seed: int) -> Dict:
+    """
+    Drive the traffic mix from concurrent clients for a fixed time.
+    
+    Args:
+        host: Server host
+        port: Server port
+        cookie: Session cookie of the seeded dataset
+        traffic: Request mix
+        clients: Concurrent virtual users (closed loop: each waits for its response)
+        duration: Seconds measured
+        warmup: Seconds run before measuring
+        think: Mean pause between a client's requests, in seconds (0 for none)
+        seed: Seed of the clients' request choices
+    
+    Returns:
+        Dictionary with the overall and per-route results of the step
+    """
+    samples = []  # (route, status, seconds, bytes)
+    lock = threading.Lock()
+    start = time.perf_counter() + warmup
+    deadline = start + duration
+    
+    def user(index):
+        rng = random.Random(seed * 1000003 + index)
+        client = Client(host, port, cookie)
+        local = []
+        while True:
+            route, path = traffic.next_request(rng)
+            sent = time.perf_counter()
+            if sent >= deadline:
+                break
+            status, size = client.get(path)
+            finished = time.perf_counter()
+            if sent >= start:
+                local.append((route, status, finished - sent, size))
+            if think:
+                time.sleep(rng.expovariate(1 / think))
+        client.close()
+        with lock:
+            samples.extend(local)
+    
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests still in flight at the deadline finish after it
+    elapsed = max(time.perf_counter() - start, duration)
+    
+    routes = {}
+    for route in sorted({sample[0] for sample in samples}):
+        routes[route] = summarize([sample for sample in samples if sample[0] == route], elapsed)
+    return {'clients': clients, 'seconds': round(elapsed, 3), 'overall': summarize(samples, elapsed), 'routes': routes}
+
+
+def summarize(samples: List[Tuple], elapsed: float) -> Dict:
+    """Request count, errors, throughput and latency percentiles of a set of samples"""
+    if not samples:
+        return {'requests': 0, 'errors': 0, 'throughput_rps': 0.0}
+    latencies = np.array([sample[2] for sample in samples]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if not 200 <= sample[1] < 400),
+        'throughput_rps': round(len(samples) / elapsed, 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(latencies.max()), 2),
+        'mean_bytes': int(np.mean([sample[3] for sample in samples]))
+    }
+
+
+def start_server(workdir: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    """Start the app (threaded development server) in workdir and wait until it answers"""
+    server_env = dict(os.environ, PYTHONPATH=REPO_ROOT, **env)
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.loadtest', '--serve', '--port', str(port)],
+                               cwd=workdir, env=server_env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    with open(os.path.join(workdir, 'server.log'), 'r') as f:
+        raise RuntimeError(f"Server did not start:\n{f.read()[-2000:]}")
+
+
+def serve(port: int):
+    """Run the app the way a single development deployment would (called with --serve)"""
+    import logging
+    import main
+    logging.getLogger().setLevel(logging.WARNING)
+    main.app.run(host='127.0.0.1', port=port, threaded=True, debug=False, use_reloader=False)
+
+
+def seed_dataset(host: str, port: int, csv_path: str) -> Tuple[str, str]:
+    """
+    Upload and clean the synthetic dataset (gzip-compressed, to stay under the upload limit).
+    
+    Returns:
+        (dataset id, session cookie header holding it)
+    """
+    with open(csv_path, 'rb') as f:
+        payload = gzip.compress(f.read(), compresslevel=1)
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\nContent-Disposition: form-data; name="auto_clean"\r\n\r\n1\r\n'.encode(),
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="synthetic.csv.gz"\r\n'
+        f'Content-Type: application/gzip\r\n\r\n'.encode(),
+        payload,
+        f'\r\n--{boundary}--\r\n'.encode()
+    ])
+    connection = http.client.HTTPConnection(host, port, timeout=3600)
+    connection.request('POST', '/upload', body=body, headers={
+        'Content-Type': f'multipart/form-data; boundary={boundary}',
+        'Accept': 'application/json'
+    })
+    response = connection.getresponse()
+    result = json.loads(response.read() or b'{}')
+    connection.close()
+    files = result.get('files', [])
+    if response.status != 200 or not files or files[0].get('status') != 'cleaned':
+        raise RuntimeError(f"Seeding the dataset failed ({response.status}): {result}")
+    
+    cookie = SimpleCookie()
+    for header in response.headers.get_all('Set-Cookie') or []:
+        cookie.load(header)
+    return files[0]['dataset_id'], '; '.join(f"{key}={morsel.value}" for key, morsel in cookie.items())
+
+
+def print_step(step: Dict):
+    overall = step['overall']
+    print(f"\n{step['clients']} clients: {overall['requests']} requests, {overall['throughput_rps']} req/s, "
+          f"p50 {overall.get('p50_ms', 0)} ms, p95 {overall.get('p95_ms', 0)} ms, "
+          f"p99 {overall.get('p99_ms', 0)} ms, {overall['errors']} errors")
+    print(f"  {'route':<24} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for route, result in step['routes'].items():
+        print(f"  {route:<24} {result['requests']:>9} {result['throughput_rps']:>8.2f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _parse_env(items: List[str]) -> Dict[str, str]:
+    return dict(item.split('=', 1) for item in items)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Load-test the Flask routes with concurrent clients against a seeded synthetic dataset",
+        epilog="Example: python -m benchmarks.loadtest --rows 100000 --clients 1,8,32 --duration 30"
+    )
+    arg_parser.add_argument('--rows', type=int, default=20000, help="Rows in the seeded dataset")
+    arg_parser.add_argument('--names', type=int, default=DEFAULT_NAME_CARDINALITY, help="Distinct valid names")
+    arg_parser.add_argument('--seed', type=int, default=0, help="Seed of the dataset and the request mix")
+    arg_parser.add_argument('--clients', default=','.join(str(clients) for clients in DEFAULT_CLIENTS),
+                            help="Comma-separated concurrency levels, run one after another")
+    arg_parser.add_argument('--duration', type=float, default=20, help="Seconds measured per concurrency level")
+    arg_parser.add_argument('--warmup', type=float, default=3, help="Seconds run before measuring each level")
+    arg_parser.add_argument('--think', type=float, default=0, help="Mean seconds a client waits between requests")
+    arg_parser.add_argument('--with-pdf', action='store_true', help="Include the PDF downloads in the mix")
+    arg_parser.add_argument('--p95-target-ms', type=float, default=DEFAULT_P95_TARGET_MS,
+                            help="Overall p95 latency considered degraded")
+    arg_parser.add_argument('--env', action='append', default=[],
+                            help="App setting for the server, e.g. --env DATASET_STORE=store.db (repeatable)")
+    arg_parser.add_argument('--url', default=None,
+                            help="Test an already running server (e.g. http://127.0.0.1:5000) instead of starting one")
+    arg_parser.add_argument('--output', default=None,
+                            help="Results file (default: benchmarks/results/loadtest_<time>_<commit>.json)")
+    arg_parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    arg_parser.add_argument('--port', type=int, default=None, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    
+    if args.serve:
+        serve(args.port)
+        sys.exit(0)
+    
+    weights = dict(ROUTE_WEIGHTS)
+    if args.with_pdf:
+        weights.update({'download:included_pdf': 1, 'download:excluded_pdf': 1})
+    workdir = tempfile.mkdtemp(prefix='datacleaning-load-')
+    server = None
+    try:
+        if args.url:
+            target = urlsplit(args.url)
+            host, port = target.hostname, target.port or 80
+        else:
+            host, port = '127.0.0.1', _free_port()
+            server = start_server(workdir, port, _parse_env(args.env))
+        
+        csv_path = os.path.join(workdir, 'synthetic.csv')
+        generate_csv(csv_path, args.rows, names=args.names, seed=args.seed)
+        started = time.perf_counter()
+        dataset_id, cookie = seed_dataset(host, port, csv_path)
+        print(f"Seeded {dataset_id} ({args.rows} rows) in {time.perf_counter() - started:.1f}s")
+        
+        # Keyset-paged row reads only exist with the shared dataset store
+        if Client(host, port, cookie).get('/api/rows/included?limit=1')[0] == 404:
+            print("/api/rows is not enabled (no DATASET_STORE); leaving it out of the mix")
+            weights['api:rows'] = 0
+        traffic = Traffic(dataset_id, args.names, weights)
+        steps = []
+        for clients in [int(clients) for clients in args.clients.split(',') if clients]:
+            step = run_step(host, port, cookie, traffic, clients, args.duration, args.warmup, args.think, args.seed)
+            print_step(step)
+            steps.append(step)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    within = [step['clients'] for step in steps
+              if step['overall'].get('p95_ms', 0) <= args.p95_target_ms and not step['overall']['errors']]
+    print(f"\nHighest concurrency within p95 {args.p95_target_ms:.0f} ms and without errors: "
+          f"{max(within) if within else 'none'}")
+    
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': {'rows': args.rows, 'names': args.names, 'seed': args.seed, 'duration': args.duration,
+                   'warmup': args.warmup, 'think': args.think, 'weights': weights, 'env': _parse_env(args.env),
+                   'url': args.url, 'p95_target_ms': args.p95_target_ms},
+        'max_clients_within_target': max(within) if within else None,
+        'steps': steps
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (report['environment']['git_commit'] or 'unknown')[:8]
+        output = os.path.join(RESULTS_DIR, f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Saved results to: {output}")
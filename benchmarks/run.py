@@ -0,0 +1,345 @@
+#import packages
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate import DEFAULT_NAME_CARDINALITY, DEFAULT_NAME_SKEW, generate_csv, parse_error_mix
+from src.datacleaning import DataCleaner
+from src.ingest import COLUMN_MAPPING, read_csv_file
+from src.metrics import start_collecting, stop_collecting
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+# Benchmarks that are impractically slow past these sizes (row-by-row Python,
+# reportlab table layout); --no-limits runs them at every size
+MAX_ROWS = {
+    'find_duplicate_records': 1_000_000,
+    'export:included_pdf': 5_000,
+    'export:excluded_pdf': 5_000
+}
+
+# Download routes timed through the Flask app
+EXPORT_ROUTES = {
+    'export:included_csv': '/download/included/csv',
+    'export:excluded_csv': '/download/excluded/csv',
+    'export:top80_csv': '/download/top80/csv',
+    'export:top80_json': '/download/top80/json',
+    'export:included_pdf': '/download/included/pdf',
+    'export:excluded_pdf': '/download/excluded/pdf'
+}
+
+# Seconds between resident memory samples
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakMemory:
+    
+    #Samples resident memory in a background thread while a benchmark runs.
+    
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_bytes = None
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def __enter__(self) -> 'PeakMemory':
+        self.start_bytes = self.peak_bytes = rss_bytes()
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+            self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._sample()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def _sample(self):
+        current = rss_bytes()
+        if current is not None and current > self.peak_bytes:
+            self.peak_bytes = current
+
+
+def measure(func: Callable, repeat: int = 3) -> Dict:
+    """
+    Time a benchmark and track its memory.
+    
+    Args:
+        func: Benchmark to run; called repeat times
+        repeat: Number of runs (the fastest is reported)
+    
+    Returns:
+        Dictionary with the best and all run times, the peak resident memory
+        and its growth over the run, and the pipeline stages of the last run
+        (seconds summed per stage)
+    """
+    runs = []
+    peak_bytes = growth_bytes = None
+    for _ in range(repeat):
+        token = start_collecting()
+        with PeakMemory() as memory:
+            started = time.perf_counter()
+            try:
+                func()
+            finally:
+                runs.append(time.perf_counter() - started)
+                records = stop_collecting(token)
+        if memory.peak_bytes is not None:
+            peak_bytes = max(peak_bytes or 0, memory.peak_bytes)
+            growth_bytes = max(growth_bytes or 0, memory.peak_bytes - memory.start_bytes)
+    
+    stages = {}
+    for record in records:
+        stages[record['stage']] = round(stages.get(record['stage'], 0.0) + record['seconds'], 6)
+    return {
+        'seconds': round(min(runs), 6),
+        'runs': [round(seconds, 6) for seconds in runs],
+        'peak_rss_bytes': peak_bytes,
+        'rss_growth_bytes': growth_bytes,
+        'stages': stages
+    }
+
+
+def run_size(rows: int, workdir: str, names: int, seed: int, error_mix: Dict, skew: float,
+             repeat: int, limits: bool, include: List[str] = None) -> Dict:
+    """
+    Generate one dataset and run every benchmark on it.
+    
+    Args:
+        rows: Rows in the dataset
+        workdir: Directory for the generated CSV and the app's data folders
+        names: Name cardinality
+        seed: Generator seed
+        error_mix: Generator error mix (default mix when None)
+        skew: Zipf exponent of name frequencies
+        repeat: Runs per benchmark
+        limits: Skip benchmarks past their MAX_ROWS size
+        include: Only run benchmarks whose name starts with one of these prefixes
+    
+    Returns:
+        Dictionary with the dataset description and the results per benchmark
+    """
+    csv_path = os.path.join(workdir, f"synthetic_{rows}_{seed}.csv")
+    started = time.perf_counter()
+    dataset = generate_csv(csv_path, rows, names=names, seed=seed, error_mix=error_mix, skew=skew)
+    dataset['generate_seconds'] = round(time.perf_counter() - started, 3)
+    dataset.pop('path')
+    print(f"\n{rows} rows ({dataset['bytes']} bytes, generated in {dataset['generate_seconds']}s)")
+    
+    results = {}
+    skipped = []
+    
+    def bench(name, func, runs=repeat):
+        if include and not any(name.startswith(prefix) for prefix in include):
+            return
+        if limits and rows > MAX_ROWS.get(name, rows):
+            skipped.append(name)
+            return
+        results[name] = measure(func, runs)
+        print(f"  {name:<28} {results[name]['seconds']:>10.4f}s  peak {_megabytes(results[name]['peak_rss_bytes'])}")
+    
+    # Pipeline functions, on the frames the web app would build
+    bench('read_csv_file', lambda: read_csv_file(csv_path))
+    df = read_csv_file(csv_path).rename(columns=COLUMN_MAPPING)
+    cleaner = DataCleaner()
+    bench('clean_data', lambda: DataCleaner().clean_data(df))
+    included_df, excluded_df = cleaner.clean_data(df)
+    bench('get_summary_stats', lambda: DataCleaner().get_summary_stats(included_df, excluded_df))
+    bench('find_duplicate_records', lambda: DataCleaner().find_duplicate_records(included_df))
+    bench('calculate_top_80_names', lambda: DataCleaner().calculate_top_80_names(included_df))
+    del df, included_df, excluded_df
+    
+    # Web app: ingest, clean and every download, through the Flask app
+    main = _load_app(workdir)
+    client = main.app.test_client()
+    dataset_id = f"dataset_1_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    raw_path = os.path.join(main.app.config['DATA_FOLDER'], f"{dataset_id}_synthetic.csv")
+    _link_or_copy(csv_path, raw_path)
+    with client.session_transaction() as session:
+        session['dataset_list'] = [dataset_id]
+        session['current_dataset_id'] = dataset_id
+    
+    bench('app:ingest', lambda: main.ingest_saved_upload(dataset_id, 'synthetic.csv', raw_path), runs=1)
+    if 'app:ingest' not in results:
+        main.ingest_saved_upload(dataset_id, 'synthetic.csv', raw_path)
+    bench('app:clean', lambda: _check(client.post('/clean', data={'dataset_id': dataset_id})))
+    if 'app:clean' not in results:
+        main.clean_dataset(dataset_id, main.load_dataset_metadata(dataset_id))
+    bench('app:index', lambda: _check(client.get(f'/?dataset_id={dataset_id}')))
+    for name, route in EXPORT_ROUTES.items():
+        bench(name, lambda: _check(client.get(route)))
+    main.delete_dataset(dataset_id)
+    os.unlink(csv_path)
+    
+    if skipped:
+        print(f"  skipped at this size: {', '.join(skipped)} (--no-limits to run)")
+    return {'rows': rows, 'dataset': dataset, 'benchmarks': results, 'skipped': skipped}
+
+
+def environment() -> Dict:
+    """Commit, interpreter and library versions, and machine the results were measured on"""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_dirty': bool(status) if status is not None else None,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[Dict]:
+    """
+    Pair up the benchmarks two result files have in common.
+    
+    Args:
+        baseline: Results loaded from an earlier run
+        current: Results of this run
+    
+    Returns:
+        List of rows, benchmark, both times and the speedup (baseline / current)
+    """
+    baseline_sizes = {result['rows']: result['benchmarks'] for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        before = baseline_sizes.get(result['rows'], {})
+        for name, measured in result['benchmarks'].items():
+            if name not in before:
+                continue
+            comparison.append({
+                'rows': result['rows'],
+                'benchmark': name,
+                'baseline_seconds': before[name]['seconds'],
+                'seconds': measured['seconds'],
+                'speedup': round(before[name]['seconds'] / measured['seconds'], 3) if measured['seconds'] else None
+            })
+    return comparison
+
+
+def _load_app(workdir: str):
+    """Import the web app with its data folders inside workdir"""
+    os.chdir(workdir)
+    import main
+    logging.getLogger().setLevel(logging.WARNING)  # no log line per benchmark request
+    main.app.config['DATA_FOLDER'] = os.path.join(workdir, 'data')
+    os.makedirs(main.app.config['DATA_FOLDER'], exist_ok=True)
+    return main
+
+
+def _link_or_copy(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+    return response
+
+
+def _megabytes(value: Optional[int]) -> str:
+    return f"{value / 1024 / 1024:.0f} MB" if value is not None else 'n/a'
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark cleaning, summaries, duplicate detection and exports on synthetic data",
+        epilog="Example: python -m benchmarks.run --rows 1000,100000,1000000 --compare benchmarks/results/old.json"
+    )
+    arg_parser.add_argument('--rows', default=','.join(str(rows) for rows in DEFAULT_SIZES),
+                            help="Comma-separated dataset sizes (10^3-10^8)")
+    arg_parser.add_argument('--names', type=int, default=DEFAULT_NAME_CARDINALITY, help="Distinct valid names")
+    arg_parser.add_argument('--skew', type=float, default=DEFAULT_NAME_SKEW, help="Zipf exponent of name frequencies")
+    arg_parser.add_argument('--seed', type=int, default=0, help="Generator seed")
+    arg_parser.add_argument('--errors', type=parse_error_mix, default=None,
+                            help="Error mix, e.g. blank_name=0.05,bad_day=0.02 (see benchmarks/generate.py)")
+    arg_parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark; the fastest is reported")
+    arg_parser.add_argument('--only', default=None,
+                            help="Comma-separated benchmark name prefixes to run, e.g. clean_data,export:")
+    arg_parser.add_argument('--no-limits', action='store_true',
+                            help=f"Run slow benchmarks at every size (limits: {MAX_ROWS})")
+    arg_parser.add_argument('--output', default=None, help="Results file (default: benchmarks/results/<time>_<commit>.json)")
+    arg_parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = arg_parser.parse_args()
+    
+    sizes = [int(float(size)) for size in args.rows.split(',') if size]
+    include = [prefix for prefix in args.only.split(',') if prefix] if args.only else None
+    workdir = tempfile.mkdtemp(prefix='datacleaning-bench-')
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'config': {'rows': sizes, 'names': args.names, 'skew': args.skew, 'seed': args.seed,
+                   'errors': args.errors, 'repeat': args.repeat, 'limits': not args.no_limits},
+        'results': []
+    }
+    print(f"Benchmarking commit {report['environment']['git_commit'] or 'unknown'}")
+    
+    try:
+        for rows in sizes:
+            report['results'].append(run_size(rows, workdir, args.names, args.seed, args.errors, args.skew,
+                                              args.repeat, not args.no_limits, include))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = (report['environment']['git_commit'] or 'unknown')[:8]
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Saved results to: {output}")
+    
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline['environment'].get('git_commit') or args.compare}:")
+        print(f"  {'rows':>10} {'benchmark':<28} {'before s':>10} {'after s':>10} {'speedup':>8}")
+        for row in compare_results(baseline, report):
+            print(f"  {row['rows']:>10} {row['benchmark']:<28} {row['baseline_seconds']:>10.4f} "
+                  f"{row['seconds']:>10.4f} {row['speedup'] or 0:>7.2f}x")
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file, make_response, session
+from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file, make_response, session, g
 import csv
 import sys
 import os
@@ -8,7 +8,6 @@ from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
 import io
 import math
-import pandas as pd
 import json
 from datetime import datetime
 from reportlab.lib import colors
@@ -17,16 +16,56 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 import pickle
+import copy
+import hmac
+import time
+import uuid
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src import DataCleaner
+from src import DataCleaner, RowIdIndex, to_display_frame
+from src.datacleaning import (SUMMARY_SECTIONS, append_frames, dataset_fingerprint, exclusion_catalog,
+                              row_ids_to_text, select_excluded, select_included)
+from src.ingest import (COLUMN_MAPPING, DecompressedSizeExceeded, RawRowIndex, append_raw_file, is_csv_upload,
+                        open_binary, read_csv_file, read_header, save_raw_file)
+from src.rules import DEFAULT_RULES, compile_rules, load_rules
+from src.duplicates import DUPLICATE_FIELD_PAIRS
+from src.fuzzy import BLOCKING_METHODS, DEFAULT_FUZZY_THRESHOLD, find_fuzzy_duplicates
+from src.linkage import LINKAGE_KEYS, LINKAGE_PREVIEW_GROUPS, LinkageIndex, linkage_report
+from src.store import SORT_COLUMNS, DatasetStore
+from src.framestore import SharedFrameStore
+from src.storage import CACHE_SUFFIX, DatasetLock, StorageManager, dataset_lock_path
+from src.memory import MemoryBudget, MemoryBudgetExceeded, dataset_footprint, default_budget_bytes, estimate_job_bytes
+from src.stats import DUPLICATE_SORT_ORDERS, IncrementalStats, LazySummary
+from src.metrics import REGISTRY, REQUEST_SECONDS, record_stages, stage, start_collecting, stop_collecting
+from src.profiling import (PROFILE_KINDS, PSTATS_FILENAME, STACKS_FILENAME, TOP_FILENAME, ProfileRun,
+                           list_runs, load_report, report_path)
 
 app = Flask(__name__)
 app.config['DATA_FOLDER'] = 'data'
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+app.config['MAX_DECOMPRESSION_RATIO'] = int(os.environ.get('MAX_DECOMPRESSION_RATIO', 20))  # Compressed uploads may expand to this many times MAX_CONTENT_LENGTH, 0 for unlimited
 app.config['SECRET_KEY'] = 'secretkey'  # Required for sessions
+app.config['DETERMINISTIC_ROW_IDS'] = False  # Derive row ids from file content + position
+app.config['CSV_PARSER'] = os.environ.get('CSV_PARSER', 'pandas')  # 'pandas' or 'arrow' (multi-threaded)
+app.config['VALIDATION_RULES'] = os.environ.get('VALIDATION_RULES')  # JSON/YAML rule file, default rules if unset
+app.config['KEEP_RAW_COMPRESSED'] = os.environ.get('KEEP_RAW_COMPRESSED', '0') == '1'  # Store raw files under data/ gzip/zstd-compressed
+app.config['UPLOAD_WORKERS'] = int(os.environ.get('UPLOAD_WORKERS', min(8, os.cpu_count() or 1)))  # Files ingested concurrently per upload
+app.config['DATASET_STORE'] = os.environ.get('DATASET_STORE')  # SQLite file shared by all workers; unset keeps the dataset list in the session
+app.config['SHARED_FRAMES'] = os.environ.get('SHARED_FRAMES', '0') == '1'  # Workers map cleaned frames from shared column files
+app.config['STORAGE_BUDGET_MB'] = int(os.environ.get('STORAGE_BUDGET_MB', 0))  # Disk budget for data/ + dataset_cache/, 0 for unlimited
+app.config['DATASET_TTL_HOURS'] = float(os.environ.get('DATASET_TTL_HOURS', 0))  # Evict datasets unused this long, 0 to keep them
+app.config['STORAGE_SWEEP_SECONDS'] = int(os.environ.get('STORAGE_SWEEP_SECONDS', 300))  # Background sweep interval, 0 to disable
+app.config['MEMORY_BUDGET_MB'] = int(os.environ.get('MEMORY_BUDGET_MB', default_budget_bytes() // (1024 * 1024)))  # Memory for concurrent cleans across all workers (default half of RAM), 0 for unlimited
+app.config['MEMORY_QUEUE_SECONDS'] = float(os.environ.get('MEMORY_QUEUE_SECONDS', 60))  # How long a job waits for memory before it is rejected
+app.config['MEMORY_MAX_QUEUED'] = int(os.environ.get('MEMORY_MAX_QUEUED', 16))  # Jobs waiting for memory beyond this are rejected at once
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')  # Admin token for on-demand profiling; unset disables it
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')  # Saved profiling reports, one directory per run
 
 # Create data folder if it doesn't exist
 os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
@@ -35,21 +74,220 @@ os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
 CACHE_DIR = 'dataset_cache'
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Worker processes for multi-file uploads (see get_upload_pool)
+upload_pool = None
+
+# Shared SQLite dataset store, opened on first use (see get_dataset_store)
+dataset_store = None
+
+# Memory-mapped frame store shared by worker processes (see get_frame_store)
+frame_store = None
+
+# Disk budget and orphan collection for data/ and dataset_cache/ (see get_storage_manager)
+storage_manager = None
+
+# Memory admission control shared by all workers (see get_memory_budget)
+memory_budget = None
+
 # Logging configuration
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# One JSON record per request: method, path, status, seconds and the pipeline stages it ran
+request_log = logging.getLogger('datacleaning.requests')
+
 # Helper functions for dataset management
+def get_dataset_store():
+    """Shared SQLite dataset store, or None when DATASET_STORE is not configured"""
+    global dataset_store
+    if dataset_store is None and app.config['DATASET_STORE']:
+        dataset_store = DatasetStore(app.config['DATASET_STORE'])
+    return dataset_store
+
+def get_frame_store():
+    """Shared memory-mapped frame store, or None when SHARED_FRAMES is off"""
+    global frame_store
+    if frame_store is None and app.config['SHARED_FRAMES']:
+        frame_store = SharedFrameStore(os.path.join(CACHE_DIR, 'frames'))
+    return frame_store
+
+def get_storage_manager():
+    """Storage manager enforcing the disk budget and TTL over data/ and dataset_cache/"""
+    global storage_manager
+    if storage_manager is None:
+        storage_manager = StorageManager(
+            app.config['DATA_FOLDER'], CACHE_DIR,
+            budget_bytes=app.config['STORAGE_BUDGET_MB'] * 1024 * 1024,
+            ttl_seconds=app.config['DATASET_TTL_HOURS'] * 3600,
+            delete_dataset=delete_dataset,
+            # Sessions live in client cookies, so only a shared catalog can tell who references a dataset
+            catalog=get_dataset_store().dataset_ids if get_dataset_store() is not None else None
+        )
+    return storage_manager
+
+def get_memory_budget():
+    """Memory budget that uploads, cleans and appends reserve their estimated peak memory from"""
+    global memory_budget
+    if memory_budget is None:
+        memory_budget = MemoryBudget(CACHE_DIR, budget_bytes=app.config['MEMORY_BUDGET_MB'] * 1024 * 1024,
+                                     queue_timeout=app.config['MEMORY_QUEUE_SECONDS'],
+                                     max_queued=app.config['MEMORY_MAX_QUEUED'])
+    return memory_budget
+
+@contextmanager
+def memory_reservation(job, nbytes, dataset_id):
+    """Hold a job's estimated memory for the enclosed block; time spent queued is the 'admission' stage"""
+    budget = get_memory_budget()
+    with stage('admission', nbytes=nbytes):
+        key = budget.reserve(job, nbytes, dataset_id)
+    try:
+        yield
+    finally:
+        budget.release(key)
+
+@app.before_request
+def start_storage_sweeper():
+    """Start this worker's background sweeper with its first request; only one worker sweeps at a time"""
+    get_storage_manager().start(app.config['STORAGE_SWEEP_SECONDS'])
+
+@app.before_request
+def start_request_timing():
+    """Time the request and collect the stages it runs"""
+    g.request_started = time.perf_counter()
+    g.stage_token = start_collecting()
+
+@app.after_request
+def record_request_timing(response):
+    """Observe the request latency and log the request with its stages"""
+    if 'stage_token' not in g:
+        return response
+    seconds = time.perf_counter() - g.request_started
+    stages = stop_collecting(g.pop('stage_token'))
+    if request.endpoint == 'metrics':
+        return response  # scrapes would drown out the requests being measured
+    REQUEST_SECONDS.observe(seconds, endpoint=request.endpoint or 'unknown', method=request.method,
+                            status=response.status_code)
+    request_log.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'seconds': round(seconds, 6),
+        'stages': stages
+    }))
+    return response
+
+def is_profiling_admin():
+    """Whether the request carries the admin profiling token (never when PROFILE_TOKEN is unset)"""
+    token = app.config['PROFILE_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+@app.before_request
+def start_profiling():
+    """Profile this request when an admin asks for it with ?profile=<kind> or an X-Profile header"""
+    if not app.config['PROFILE_TOKEN']:
+        return None
+    kind = request.headers.get('X-Profile') or request.args.get('profile')
+    if not kind:
+        return None
+    if not is_profiling_admin():
+        return jsonify({'error': 'Profiling requires a valid X-Profile-Token'}), 403
+    kind = 'cprofile' if kind == '1' else kind
+    if kind not in PROFILE_KINDS:
+        return jsonify({'error': f"profile must be one of {', '.join(PROFILE_KINDS)}"}), 400
+    run = ProfileRun(app.config['PROFILE_DIR'], kind, label=f"{request.method} {request.full_path.rstrip('?')}")
+    if run.start():
+        g.profile_run = run
+    else:
+        logging.warning(f"Not profiling {request.path}: another cprofile run is active in this worker")
+    return None
+
+@app.after_request
+def finish_profiling(response):
+    """Save the request's profile and return its run id in X-Profile-Id"""
+    run = g.pop('profile_run', None)
+    if run is not None:
+        run.stop()
+        response.headers['X-Profile-Id'] = run.run_id
+        logging.info(f"Saved {run.kind} profile {run.run_id} of {run.label}")
+    return response
+
+@app.teardown_request
+def stop_profiling(exc):
+    """Stop a profile left running by a request that failed before after_request"""
+    run = g.pop('profile_run', None)
+    if run is not None:
+        run.stop()
+
+def delete_dataset(dataset_id):
+    """Delete every file of a dataset: raw upload, metadata, shared frames and catalog entry"""
+    for name in os.listdir(app.config['DATA_FOLDER']):
+        if name.startswith(f"{dataset_id}_"):
+            filepath = os.path.join(app.config['DATA_FOLDER'], name)
+            try:
+                os.unlink(filepath)
+            except Exception as e:
+                logging.error(f"Error deleting file {filepath}: {e}")
+    
+    for meta_filepath in (os.path.join(CACHE_DIR, f'{dataset_id}_meta.pkl'), dataset_cache_path(dataset_id),
+                          dataset_lock_path(CACHE_DIR, dataset_id), dataset_lock_path(CACHE_DIR, dataset_id, 'cache')):
+        if os.path.exists(meta_filepath):
+            try:
+                os.unlink(meta_filepath)
+            except Exception as e:
+                logging.error(f"Error deleting metadata {meta_filepath}: {e}")
+    
+    # Shared frame files are deleted once no worker maps them any more
+    if get_frame_store() is not None:
+        get_frame_store().remove(dataset_id)
+    if get_dataset_store() is not None:
+        get_dataset_store().remove_dataset(dataset_id)
+    get_memory_budget().forget(dataset_id)
+
 def get_dataset_list():
-    """Get list of all dataset IDs from session"""
+    """Get list of all dataset IDs, from the shared store when enabled, otherwise from the session"""
+    store = get_dataset_store()
+    if store is not None:
+        return store.dataset_ids()
     return session.get('dataset_list', [])
 
 def set_dataset_list(dataset_list):
     """Save dataset list to session"""
     session['dataset_list'] = dataset_list
 
+def add_to_dataset_list(dataset_ids):
+    """Add new datasets to the dataset list"""
+    store = get_dataset_store()
+    if store is not None:
+        for dataset_id in dataset_ids:
+            store.add_dataset(dataset_id)
+    else:
+        set_dataset_list(get_dataset_list() + list(dataset_ids))
+
+def remove_from_dataset_list(dataset_id):
+    """Remove a dataset (and its stored rows) from the dataset list"""
+    store = get_dataset_store()
+    if store is not None:
+        store.remove_dataset(dataset_id)
+    else:
+        set_dataset_list([other for other in get_dataset_list() if other != dataset_id])
+
+def get_store_rows(dataset_id, dataset):
+    """
+    Shared store holding the dataset's cleaned rows, copying them in for
+    datasets cleaned before the store was enabled. None without a store
+    or before the dataset is cleaned.
+    """
+    store = get_dataset_store()
+    if store is None or dataset.get('included_df') is None:
+        return None
+    if not store.has_rows(dataset_id):
+        store.add_dataset(dataset_id, dataset.get('filename'))
+        store.replace_rows(dataset_id, dataset['included_df'], dataset['excluded_df'])
+    return store
+
 def get_current_dataset_id():
     """Get current dataset ID from session"""
     return session.get('current_dataset_id')
@@ -59,18 +297,97 @@ def set_current_dataset_id(dataset_id):
     session['current_dataset_id'] = dataset_id
 
 def save_dataset_metadata(dataset_id, metadata):
-    """Save dataset metadata to file"""
+    """Save dataset metadata to file, as a new version (results cached for older versions no longer apply)"""
     filepath = os.path.join(CACHE_DIR, f'{dataset_id}_meta.pkl')
-    with open(filepath, 'wb') as f:
-        pickle.dump(metadata, f)
+    # Writers hold the dataset lock and reload before saving, so versions only go up
+    metadata['version'] = metadata.get('version', 0) + 1
+    with stage('persist_save') as timing:
+        if get_frame_store() is not None:
+            # Frames go to shared column files; the pickle only references them
+            get_frame_store().save_metadata(dataset_id, metadata, filepath)
+        else:
+            # Readers don't take the dataset lock, so never let them see a partly written file
+            staging = f"{filepath}.{os.getpid()}.tmp"
+            with open(staging, 'wb') as f:
+                pickle.dump(metadata, f)
+            os.replace(staging, filepath)
+        timing.nbytes = os.path.getsize(filepath)
+
+def record_dataset_footprint(dataset_id, dataset):
+    """Record a dataset's in-memory size after a clean, append or re-clean changed it"""
+    get_memory_budget().record_footprint(dataset_id, dataset_footprint(dataset))
 
 def load_dataset_metadata(dataset_id):
     """Load dataset metadata from file"""
     filepath = os.path.join(CACHE_DIR, f'{dataset_id}_meta.pkl')
-    if os.path.exists(filepath):
+    get_storage_manager().touch(dataset_id)
+    if not os.path.exists(filepath):
+        return None
+    with stage('persist_load', nbytes=os.path.getsize(filepath)):
+        if get_frame_store() is not None:
+            return get_frame_store().load_metadata(dataset_id, filepath)
         with open(filepath, 'rb') as f:
             return pickle.load(f)
-    return None
+
+def dataset_cache_path(dataset_id):
+    """File holding results computed on demand for a dataset"""
+    return os.path.join(CACHE_DIR, f'{dataset_id}{CACHE_SUFFIX}')
+
+def load_dataset_cache(dataset_id, dataset):
+    """Results cached for the dataset's current version, keyed by what they are (empty when there are none)"""
+    filepath = dataset_cache_path(dataset_id)
+    try:
+        with open(filepath, 'rb') as f:
+            cache = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    if cache.get('version') != dataset.get('version', 0):
+        return {}
+    return cache['entries']
+
+def save_dataset_cache(dataset_id, dataset, entries):
+    """
+    Add results computed on demand to the dataset's cache file. GET requests
+    use this instead of saving the metadata, which they only hold a copy of.
+    Entries of older versions are dropped; a request holding an older version
+    than the file's leaves the file alone.
+    """
+    filepath = dataset_cache_path(dataset_id)
+    version = dataset.get('version', 0)
+    with DatasetLock(CACHE_DIR, dataset_id, 'cache'), stage('persist_cache') as timing:
+        try:
+            with open(filepath, 'rb') as f:
+                cache = pickle.load(f)
+        except FileNotFoundError:
+            cache = {'version': version, 'entries': {}}
+        if cache['version'] > version:
+            return
+        if cache['version'] < version:
+            cache = {'version': version, 'entries': {}}
+        cache['entries'].update(entries)
+        
+        staging = f"{filepath}.{os.getpid()}.tmp"
+        with open(staging, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(staging, filepath)
+        timing.nbytes = os.path.getsize(filepath)
+
+def cached_summary(dataset_id, dataset):
+    """The dataset's summary statistics, with sections computed by earlier requests filled in"""
+    summary_stats = dataset.get('summary_stats')
+    if isinstance(summary_stats, LazySummary):
+        cache = load_dataset_cache(dataset_id, dataset)
+        summary_stats.restore({key[1]: value for key, value in cache.items() if key[0] == 'summary'},
+                              cache.get(('duplicate_groups',)))
+    return summary_stats
+
+def cache_summary(dataset_id, dataset, summary_stats, sections, had_duplicate_groups):
+    """Cache summary sections (and duplicate groups) computed by this request"""
+    entries = {('summary', section): summary_stats[section] for section in sections}
+    if not had_duplicate_groups and summary_stats.has_duplicate_groups():
+        entries[('duplicate_groups',)] = summary_stats.duplicate_groups()
+    if entries:
+        save_dataset_cache(dataset_id, dataset, entries)
 
 def get_all_datasets():
     """Get all datasets metadata as a dictionary"""
@@ -89,14 +406,26 @@ def get_current_dataset():
         return load_dataset_metadata(dataset_id)
     return None
 
-# Allowed file type
+# Allowed file type: CSV, plain or gzip/zip/zstd-compressed
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'csv'
+    return '.' in filename and is_csv_upload(filename)
 
 # Error handler for files too large
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(e):
-    return "File is too large. Maximum allowed size is 50MB.", 413
+    return "File is too large. Maximum allowed size is 50MB (compress larger CSVs with gzip, zip or zstd).", 413
+
+# Error handler for jobs the memory budget can't admit
+@app.errorhandler(MemoryBudgetExceeded)
+def handle_memory_budget_exceeded(e):
+    logging.warning(f"Rejected by the memory budget: {e}")
+    if wants_json():
+        response = make_response(jsonify({'error': str(e)}), 503)
+    else:
+        response = make_response(f"The server is busy: {e}. Please try again later.", 503)
+    if e.retry_after:
+        response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 # Index route with pagination, filtering, and sorting
 @app.route('/')
@@ -108,10 +437,12 @@ def index():
     
     datasets = get_all_datasets()
     dataset = get_current_dataset()
+    upload_status = session.pop('upload_status', None)
     
     if not dataset:
         return render_template('index.html',
                              data=[],
+                             upload_status=upload_status,
                              datasets=datasets,
                              current_dataset_id=get_current_dataset_id())
     
@@ -128,59 +459,60 @@ def index():
     sort_by = request.args.get('sort_by', '')
     sort_order = request.args.get('sort_order', 'asc')
     
-    csv_data = dataset.get('csv_data', [])
-    included_data = dataset.get('included_data', [])
-    excluded_data = dataset.get('excluded_data', [])
-    summary_stats = dataset.get('summary_stats')
+    # Get reason filter for excluded data
+    reason_filter = request.args.get('reason_filter', '').strip()
     
-    # Apply filters to included data
-    filtered_included = included_data.copy() if included_data else []
-    if name_filter:
-        filtered_included = [row for row in filtered_included if name_filter.lower() in row['name'].lower()]
-    if month_filter:
-        try:
-            month_int = int(month_filter)
-            filtered_included = [row for row in filtered_included if row['birth_month'] == month_int]
-        except ValueError:
-            pass
-    if year_filter:
-        try:
-            year_int = int(year_filter)
-            filtered_included = [row for row in filtered_included if row['birth_year'] == year_int]
-        except ValueError:
-            pass
-    if day_filter:
-        try:
-            day_int = int(day_filter)
-            filtered_included = [row for row in filtered_included if row['birth_day'] == day_int]
-        except ValueError:
-            pass
+    raw_index = get_raw_index(dataset)
+    summary_stats = cached_summary(dataset_id, dataset)
     
-    # Apply sorting to included data
-    if sort_by and filtered_included:
-        reverse = (sort_order == 'desc')
-        try:
-            filtered_included = sorted(filtered_included, key=lambda x: x.get(sort_by, ''), reverse=reverse)
-        except Exception as e:
-            logging.error(f"Error sorting: {e}")
+    filters = {'name': name_filter} if name_filter else {}
+    for field, value in (('birth_month', month_filter), ('birth_year', year_filter), ('birth_day', day_filter)):
+        if value:
+            try:
+                filters[field] = int(value)
+            except ValueError:
+                pass
+    
+    store = get_store_rows(get_current_dataset_id(), dataset)
+    if store is not None:
+        # Filters, sorting and paging run as indexed queries in the shared store
+        total_included, included_page_data, _ = store.query_included(
+            get_current_dataset_id(), filters, sort_by, sort_order,
+            limit=per_page, offset=max(included_page - 1, 0) * per_page)
+        total_excluded, excluded_page_data, _ = store.query_excluded(
+            get_current_dataset_id(), reason_filter, limit=per_page, offset=max(excluded_page - 1, 0) * per_page)
+    else:
+        # Filter and sort row positions on the compact frames; only the page is expanded for display
+        included_df = dataset.get('included_df')
+        excluded_df = dataset.get('excluded_df')
+        included_positions = select_included(included_df, filters, sort_by if sort_by in SORT_COLUMNS else '',
+                                             sort_order)
+        excluded_positions = select_excluded(excluded_df, reason_filter)
+        
+        total_included = len(included_positions)
+        included_page_data = display_records(
+            included_df, included_positions[max(included_page - 1, 0) * per_page:max(included_page, 0) * per_page])
+        total_excluded = len(excluded_positions)
+        excluded_page_data = display_records(
+            excluded_df, excluded_positions[max(excluded_page - 1, 0) * per_page:max(excluded_page, 0) * per_page])
+
+    # Summary sections already computed can be shown inline; the rest load on demand
+    computed_sections = []
+    if summary_stats:
+        computed_sections = [section for section in SUMMARY_SECTIONS
+                             if not isinstance(summary_stats, LazySummary) or summary_stats.is_computed(section)]
 
     # Original data pagination
-    total_pages = math.ceil(len(csv_data) / per_page) if csv_data else 1
+    total_pages = math.ceil(len(raw_index) / per_page) if raw_index is not None and len(raw_index) else 1
     start = (page - 1) * per_page
     end = start + per_page
-    page_data = csv_data[start:end]
+    page_data = [preview_row(row) for row in raw_index.read_rows(start, end)] if raw_index is not None else []
 
     # Included data pagination (after filters)
-    included_total_pages = math.ceil(len(filtered_included) / per_page) if filtered_included else 1
-    included_start = (included_page - 1) * per_page
-    included_end = included_start + per_page
-    included_page_data = filtered_included[included_start:included_end]
+    included_total_pages = math.ceil(total_included / per_page) if total_included else 1
 
     # Excluded data pagination
-    excluded_total_pages = math.ceil(len(excluded_data) / per_page) if excluded_data else 1
-    excluded_start = (excluded_page - 1) * per_page
-    excluded_end = excluded_start + per_page
-    excluded_page_data = excluded_data[excluded_start:excluded_end]
+    excluded_total_pages = math.ceil(total_excluded / per_page) if total_excluded else 1
 
     return render_template('index.html',
                            data=page_data,
@@ -192,90 +524,481 @@ def index():
                            excluded_page=excluded_page,
                            included_total_pages=included_total_pages,
                            excluded_total_pages=excluded_total_pages,
-                           total_included=len(filtered_included),
-                           total_excluded=len(excluded_data),
+                           total_included=total_included,
+                           total_excluded=total_excluded,
                            summary_stats=summary_stats,
+                           computed_sections=computed_sections,
+                           duplicate_field_pairs=DUPLICATE_FIELD_PAIRS,
                            name_filter=name_filter,
                            month_filter=month_filter,
                            year_filter=year_filter,
                            day_filter=day_filter,
+                           reason_filter=reason_filter,
                            sort_by=sort_by,
                            sort_order=sort_order,
                            datasets=datasets,
+                           upload_status=upload_status,
                            current_dataset_id=get_current_dataset_id())
 
-# Upload route
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    if 'file' not in request.files:
-        return redirect(url_for('index'))
+def detect_encoding(filepath):
+    """Detect a file's encoding from its first 4KB (decompressed)"""
+    with stage('detect_encoding') as timing, open_binary(filepath) as f:
+        raw_bytes = f.read(4096)
+        timing.nbytes = len(raw_bytes)
+        result = chardet.detect(raw_bytes)
+        encoding = result['encoding'] or 'latin-1'
+        logging.info(f"Detected encoding: {encoding}")
+    return encoding
 
-    file = request.files['file']
+def display_records(df, positions):
+    """Rows of a compact frame at the given positions, expanded to the display dictionaries"""
+    if df is None or len(positions) == 0:
+        return []
+    return to_display_frame(df.iloc[positions]).to_dict('records')
 
-    if file.filename == '':
-        return redirect(url_for('index'))
+def preview_row(row):
+    """Shape a raw CSV row for the original data preview"""
+    return {
+        'FirstName': row.get('FirstName', '') or '-',
+        'BirthDay': row.get('BirthDay', ''),
+        'BirthMonth': row.get('BirthMonth', ''),
+        'BirthYear': row.get('BirthYear', '')
+    }
 
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
+def get_raw_index(dataset):
+    """Byte-offset index of the dataset's raw file, built for datasets saved without one"""
+    if dataset.get('raw_index') is None and os.path.exists(dataset.get('filepath', '')):
+        dataset['raw_index'] = RawRowIndex(dataset['filepath'], detect_encoding(dataset['filepath']))
+        dataset.pop('csv_data', None)
+    return dataset.get('raw_index')
+
+def get_summary_section(dataset_id, dataset, section):
+    """Get a summary section, caching it when it was computed just now"""
+    summary_stats = cached_summary(dataset_id, dataset)
+    if not isinstance(summary_stats, LazySummary) or summary_stats.is_computed(section):
+        return summary_stats[section]
+    had_duplicate_groups = summary_stats.has_duplicate_groups()
+    value = summary_stats[section]
+    cache_summary(dataset_id, dataset, summary_stats, [section], had_duplicate_groups)
+    return value
+
+def get_linkage_index(dataset_id, dataset):
+    """Linkage hash index of a cleaned dataset, built on the first linkage request and cached"""
+    linkage_index = load_dataset_cache(dataset_id, dataset).get(('linkage_index',))
+    if linkage_index is None:
+        linkage_index = LinkageIndex.from_frame(dataset['included_df'])
+        save_dataset_cache(dataset_id, dataset, {('linkage_index',): linkage_index})
+    return linkage_index
+
+def get_fuzzy_duplicates(dataset_id, dataset, threshold, blocking):
+    """
+    Near-duplicate groups of a cleaned dataset. Results for the default
+    threshold are cached (one per blocking method); other thresholds are
+    computed per request, so arbitrary thresholds can't grow the cache.
+    """
+    cached = threshold == DEFAULT_FUZZY_THRESHOLD
+    key = ('fuzzy_duplicates', blocking)
+    result = load_dataset_cache(dataset_id, dataset).get(key) if cached else None
+    if result is None:
+        with stage('fuzzy_duplicates', rows=len(dataset['included_df'])):
+            result = find_fuzzy_duplicates(dataset['included_df'], threshold=threshold, blocking=blocking)
+        if cached:
+            save_dataset_cache(dataset_id, dataset, {key: result})
+    return result
+
+def drop_legacy_results(dataset):
+    """Drop on-demand results that metadata saved before the cache file carried; they live in the cache file now"""
+    dataset.pop('linkage_index', None)
+    dataset.pop('fuzzy_duplicates', None)
+
+def json_safe(value):
+    """Convert numpy scalars inside a summary section to plain Python values"""
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        return value.item()
+    return value
+
+def max_decompressed_bytes():
+    """Most bytes an upload may decompress to, None for no limit"""
+    return app.config['MAX_DECOMPRESSION_RATIO'] * app.config['MAX_CONTENT_LENGTH'] or None
+
+def get_dataset_rules(dataset):
+    """Rule configuration a dataset was cleaned with (None means the default rules)"""
+    if 'rules' in dataset:
+        return dataset['rules']
+    return load_rules(app.config['VALIDATION_RULES']) if app.config['VALIDATION_RULES'] else None
+
+def append_to_dataset(dataset_id, delta_filepath):
+    """
+    Add a delta upload to an existing dataset. When the dataset is already
+    cleaned, only the delta rows are validated and the statistics are updated
+    incrementally, so the cost scales with the delta rather than the dataset.
+    The dataset is loaded, changed and saved under its lock, and the raw file
+    is cut back to its indexed size when the append doesn't complete.
+    """
+    with DatasetLock(CACHE_DIR, dataset_id):
+        dataset = load_dataset_metadata(dataset_id)
+        if not dataset:
+            logging.error(f"Append to {dataset_id} rejected: dataset not found")
+            return False
+        raw_index = get_raw_index(dataset)
+        if read_header(delta_filepath, detect_encoding(delta_filepath)) != raw_index.header:
+            logging.error(f"Append to {dataset_id} rejected: CSV header does not match the dataset")
+            return False
+        # Groups found before the append are extended with the new rows rather than found again
+        duplicate_groups = None
+        if dataset.get('included_df') is not None:
+            duplicate_groups = load_dataset_cache(dataset_id, dataset).get(('duplicate_groups',))
         
-        # Get existing dataset list
-        dataset_list = get_dataset_list()
+        committed_size = raw_index.stored_size
+        if os.path.getsize(dataset['filepath']) > committed_size:
+            # Left behind by an append that stopped before its metadata was saved
+            logging.warning(f"Discarding an incomplete append to {dataset_id}")
+            os.truncate(dataset['filepath'], committed_size)
+        try:
+            new_rows = _append_to_dataset(dataset_id, dataset, raw_index, delta_filepath)
+            save_dataset_metadata(dataset_id, dataset)
+        except BaseException:
+            os.truncate(dataset['filepath'], committed_size)
+            raise
+        record_dataset_footprint(dataset_id, dataset)
+        if new_rows is not None and duplicate_groups is not None:
+            with stage('duplicates', rows=len(new_rows[0])):
+                save_dataset_cache(dataset_id, dataset,
+                                   {('duplicate_groups',): duplicate_groups.extend(dataset['included_df'])})
         
-        # Generate unique dataset ID
-        dataset_id = f"dataset_{len(dataset_list) + 1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        filepath = os.path.join(app.config['DATA_FOLDER'], f"{dataset_id}_{filename}")
+        store = get_dataset_store()
+        if new_rows is not None and store is not None and store.has_rows(dataset_id):
+            try:
+                with stage('persist_store', rows=len(new_rows[0]) + len(new_rows[1])):
+                    store.append_rows(dataset_id, *new_rows)
+            except Exception as e:
+                # Cleared rows are copied in again from the saved frames on the next read
+                logging.error(f"Error adding appended rows of {dataset_id} to the store: {e}")
+                store.clear_rows(dataset_id)
+    return True
 
-        # Save the file to the data folder
-        file.save(filepath)
+def _append_to_dataset(dataset_id, dataset, raw_index, delta_filepath):
+    """Append the delta to the raw file and the cleaned results; returns the new compact (included, excluded) rows, if cleaned"""
+    original_row_count = len(raw_index)
+    append_raw_file(dataset['filepath'], delta_filepath, max_bytes=max_decompressed_bytes())
+    raw_index.extend()
+    
+    if dataset.get('included_df') is None:
+        return None
+    
+    df = read_csv_file(delta_filepath, parser=app.config['CSV_PARSER']).rename(columns=COLUMN_MAPPING)
+    
+    cleaner = DataCleaner(deterministic_ids=app.config['DETERMINISTIC_ROW_IDS'], rules=get_dataset_rules(dataset))
+    if cleaner.rule_set.reasons != exclusion_catalog(dataset['excluded_df']):
+        # Flags are only comparable under the same rules; the user has to re-run cleaning
+        logging.warning(f"Validation rules changed since {dataset_id} was cleaned; cleaned results cleared")
+        dataset.update(included_df=None, excluded_df=None, summary_stats=None, row_index=None, stats_state=None)
+        drop_legacy_results(dataset)
+        if get_dataset_store() is not None:
+            get_dataset_store().clear_rows(dataset_id)
+        return None
+    
+    # Position in the dataset keeps deterministic ids unique across identical deltas
+    fingerprint = None
+    if app.config['DETERMINISTIC_ROW_IDS']:
+        fingerprint = f"{dataset_id}:{original_row_count}:{dataset_fingerprint(df)}"
+    included_df, excluded_df = cleaner.clean_data(df, fingerprint=fingerprint)
+    compact_included, compact_excluded = cleaner.compact_frames(included_df, excluded_df)
+    
+    # Built from the stored frames once, then carried with the dataset. Duplicate
+    # groups aren't tracked per row; cached groups are extended after the save.
+    stats = dataset.get('stats_state')
+    if stats is None:
+        stats = IncrementalStats.from_frames(dataset['included_df'], dataset['excluded_df'],
+                                             dataset['summary_stats']['dataset_sizes']['original_row_count'],
+                                             track_duplicates=False)
+    stats.duplicates = None  # states saved earlier carry a per-row duplicate index
+    stats.update(compact_included, compact_excluded, len(df))
+    
+    dataset['included_df'] = append_frames(dataset['included_df'], compact_included)
+    dataset['excluded_df'] = append_frames(dataset['excluded_df'], compact_excluded)
+    if dataset.get('row_index') is not None:
+        dataset['row_index'].extend(compact_included, compact_excluded)
+    else:
+        dataset['row_index'] = RowIdIndex(dataset['included_df'], dataset['excluded_df'])
+    drop_legacy_results(dataset)
+    dataset['stats_state'] = stats
+    dataset['summary_stats'] = LazySummary.from_stats(stats, dataset['included_df'], dataset['excluded_df'])
+    
+    logging.info(f"Appended {len(df)} rows to {dataset_id}: "
+                 f"{len(included_df)} included, {len(excluded_df)} excluded")
+    return compact_included, compact_excluded
+
+def ingest_saved_upload(dataset_id, filename, filepath, auto_clean=False, config=None, collect_stages=False):
+    """
+    Index one saved upload as a new dataset, optionally cleaning it. Runs in
+    an upload worker process, so it only touches the dataset's own metadata
+    file and returns a small status dict; the caller updates the session.
+    
+    Args:
+        dataset_id: ID of the new dataset
+        filename: Secured upload file name
+        filepath: Raw file in the data folder
+        auto_clean: Run data cleaning after indexing
+        config: App settings to apply in the worker process
+        collect_stages: Return the stage timings under 'stages', for the
+            caller to add to its metrics (a worker's own metrics are never scraped)
         
+    Returns:
+        Per-file status dict for the upload response
+    """
+    if config:
+        app.config.update(config)
+    token = start_collecting() if collect_stages else None
+    status = {'filename': filename, 'dataset_id': dataset_id, 'status': 'ingested'}
+    started = time.perf_counter()
+    try:
         # Detect encoding using first 4KB
-        with open(filepath, 'rb') as f:
-            raw_bytes = f.read(4096)
-            result = chardet.detect(raw_bytes)
-            encoding = result['encoding'] or 'latin-1'
-            logging.info(f"Detected encoding: {encoding}")
-
-        # Read CSV for display
-        csv_data = []
-        try:
-            with open(filepath, 'r', encoding=encoding, errors='replace') as f:
-                csv_reader = csv.DictReader(f)
-                for row in csv_reader:
-                    csv_row = {
-                        'FirstName': row.get('FirstName', '') or '-',
-                        'BirthDay': row.get('BirthDay', ''),
-                        'BirthMonth': row.get('BirthMonth', ''),
-                        'BirthYear': row.get('BirthYear', '')
-                    }
-                    csv_data.append(csv_row)
-        except Exception as e:
-            logging.error(f"Error reading CSV: {e}")
+        encoding = detect_encoding(filepath)
+        
+        # Index record offsets; preview pages are parsed from the file on demand
+        with stage('ingest', nbytes=os.path.getsize(filepath)) as timing:
+            raw_index = RawRowIndex(filepath, encoding)
+            timing.rows = len(raw_index)
         
         # Create dataset metadata
         metadata = {
-            'csv_data': csv_data,
-            'included_data': [],
-            'excluded_data': [],
+            'raw_index': raw_index,
             'summary_stats': None,
             'included_df': None,
             'excluded_df': None,
             'filename': filename,
             'filepath': filepath
         }
-        
-        # Save metadata
         save_dataset_metadata(dataset_id, metadata)
+        if get_dataset_store() is not None:
+            get_dataset_store().add_dataset(dataset_id, filename)
+        status['rows'] = len(raw_index)
+        logging.info(f"Uploaded dataset {dataset_id}: {filename}")
         
-        # Update dataset list
-        dataset_list.append(dataset_id)
-        set_dataset_list(dataset_list)
+        if auto_clean:
+            try:
+                with stage('clean', rows=len(raw_index)):
+                    clean_dataset(dataset_id, metadata)
+                status.update(status='cleaned', included=len(metadata['included_df']),
+                              excluded=len(metadata['excluded_df']))
+            except MemoryBudgetExceeded as e:
+                # The dataset is kept (ingested) and can be cleaned once memory is free
+                logging.warning(f"Not cleaning {dataset_id}: {e}")
+                status['error'] = f"Not cleaned: {e}"
+    except Exception as e:
+        logging.error(f"Error ingesting {filename}: {e}")
+        status.update(status='error', error=str(e))
+        # Failed uploads aren't listed, so nothing else would remove their raw file
+        delete_dataset(dataset_id)
+    finally:
+        if get_frame_store() is not None:
+            # Upload workers outlive the request; don't keep old versions mapped
+            get_frame_store().release(dataset_id)
+    status['seconds'] = round(time.perf_counter() - started, 3)
+    if token is not None:
+        status['stages'] = stop_collecting(token)
+    return status
+
+def get_upload_pool():
+    """Worker processes for multi-file uploads, started on first use and kept for later batches"""
+    global upload_pool
+    if upload_pool is None:
+        # spawn: forking the threaded server process could inherit held locks
+        upload_pool = ProcessPoolExecutor(max_workers=app.config['UPLOAD_WORKERS'],
+                                          mp_context=multiprocessing.get_context('spawn'))
+    return upload_pool
+
+def wants_json():
+    """Whether the client asked for a JSON response rather than a page"""
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+# Upload route: one or many files, ingested concurrently
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    files = [file for file in request.files.getlist('file') if file and file.filename]
+    if not files:
+        return redirect(url_for('index'))
+    
+    statuses = []
+    accepted = []
+    for file in files:
+        if allowed_file(file.filename):
+            accepted.append(file)
+        else:
+            statuses.append({'filename': file.filename, 'status': 'rejected', 'error': 'Not a CSV file'})
+    
+    # Append mode adds the rows to an existing dataset, one file after another
+    if request.form.get('mode') == 'append':
+        dataset_id = request.form.get('dataset_id', get_current_dataset_id())
+        dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+        if not dataset or not os.path.exists(dataset['filepath']):
+            logging.error("Dataset to append to not found")
+            return redirect(url_for('index'))
         
-        # Set as current dataset
-        set_current_dataset_id(dataset_id)
+        for file in accepted:
+            filename = secure_filename(file.filename)
+            # Concurrent appends of the same file name must not share a delta file
+            delta_filepath = os.path.join(app.config['DATA_FOLDER'],
+                                          f"{dataset_id}_append_{datetime.now().strftime('%Y%m%d_%H%M%S')}_"
+                                          f"{uuid.uuid4().hex[:8]}_{filename}")
+            file.save(delta_filepath)
+            status = {'filename': file.filename, 'dataset_id': dataset_id, 'status': 'rejected',
+                      'error': 'CSV header does not match the dataset'}
+            estimate = 0
+            if dataset.get('included_df') is not None:
+                # The delta is cleaned and the whole cleaned dataset saved again
+                estimate = estimate_job_bytes('append', rows=len(get_raw_index(dataset)),
+                                              new_bytes=os.path.getsize(delta_filepath))
+            try:
+                with stage('append', nbytes=os.path.getsize(delta_filepath)), \
+                        memory_reservation('append', estimate, dataset_id):
+                    appended = append_to_dataset(dataset_id, delta_filepath)
+                if appended:
+                    logging.info(f"Appended {filename} to dataset {dataset_id}")
+                    status = {'filename': file.filename, 'dataset_id': dataset_id, 'status': 'appended'}
+            except (MemoryBudgetExceeded, DecompressedSizeExceeded) as e:
+                logging.warning(f"Append to {dataset_id} rejected: {e}")
+                status = {'filename': file.filename, 'dataset_id': dataset_id, 'status': 'rejected', 'error': str(e)}
+            except Exception as e:
+                logging.error(f"Error appending to dataset: {e}")
+                import traceback
+                traceback.print_exc()
+                status = {'filename': file.filename, 'dataset_id': dataset_id, 'status': 'error', 'error': str(e)}
+            finally:
+                os.unlink(delta_filepath)
+            statuses.append(status)
+        return upload_response(statuses, dataset_id)
+    
+    # Get existing dataset list
+    dataset_list = get_dataset_list()
+    
+    # Unique dataset IDs are assigned up front, in upload order. The random
+    # suffix keeps IDs unique when uploads land in the same second
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    auto_clean = request.form.get('auto_clean') in ('1', 'on', 'true')
+    
+    # Save the files to the data folder, decompressing (or compressing) as they stream in
+    jobs = []
+    saved = []
+    for i, file in enumerate(accepted):
+        dataset_id = f"dataset_{len(dataset_list) + i + 1}_{stamp}_{uuid.uuid4().hex[:8]}"
+        filename = secure_filename(file.filename)
+        filepath = os.path.join(app.config['DATA_FOLDER'], f"{dataset_id}_{filename}")
+        try:
+            filepath = save_raw_file(file.stream, filepath, keep_compressed=app.config['KEEP_RAW_COMPRESSED'],
+                                     max_bytes=max_decompressed_bytes())
+        except DecompressedSizeExceeded as e:
+            logging.warning(f"Rejected {filename}: {e}")
+            saved.append({'filename': filename, 'dataset_id': dataset_id, 'status': 'rejected', 'error': str(e)})
+            continue
+        except Exception as e:
+            logging.error(f"Error saving {filename}: {e}")
+            saved.append({'filename': filename, 'dataset_id': dataset_id, 'status': 'error', 'error': str(e)})
+            continue
+        jobs.append((dataset_id, filename, filepath))
+    
+    # Parsing, indexing and cleaning run in parallel worker processes, so a
+    # batch takes about as long as its slowest file
+    if len(jobs) > 1 and app.config['UPLOAD_WORKERS'] > 1:
+        config = {key: app.config[key] for key in ('CSV_PARSER', 'VALIDATION_RULES', 'DETERMINISTIC_ROW_IDS', 'DATASET_STORE',
+                                                    'SHARED_FRAMES', 'MEMORY_BUDGET_MB', 'MEMORY_QUEUE_SECONDS',
+                                                    'MEMORY_MAX_QUEUED')}
+        try:
+            futures = [get_upload_pool().submit(ingest_saved_upload, *job, auto_clean=auto_clean, config=config,
+                                                collect_stages=True)
+                       for job in jobs]
+            ingested = [future.result() for future in futures]
+            for status in ingested:
+                record_stages(status.pop('stages', []))
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); start a fresh pool next time and ingest here
+            logging.error(f"Upload worker pool failed, ingesting in the request: {e}")
+            global upload_pool
+            upload_pool = None
+            ingested = [ingest_saved_upload(*job, auto_clean=auto_clean) for job in jobs]
+    else:
+        ingested = [ingest_saved_upload(*job, auto_clean=auto_clean) for job in jobs]
+    statuses = ingested + saved + statuses
+    
+    # Update dataset list
+    new_ids = [status['dataset_id'] for status in ingested if status['status'] != 'error']
+    if new_ids:
+        add_to_dataset_list(new_ids)
         
-        logging.info(f"Uploaded dataset {dataset_id}: {filename}")
+        # Set the last uploaded file as current dataset
+        set_current_dataset_id(new_ids[-1])
+    
+    return upload_response(statuses, get_current_dataset_id())
+
+def upload_response(statuses, dataset_id):
+    """Per-file upload status as JSON, or shown once on the page after a redirect"""
+    if wants_json():
+        return jsonify({'files': statuses, 'current_dataset_id': dataset_id})
+    session['upload_status'] = statuses
+    return redirect(url_for('index', dataset_id=dataset_id))
 
-    return redirect(url_for('index', dataset_id=get_current_dataset_id()))
+def clean_dataset(dataset_id, dataset):
+    """
+    Clean a dataset's raw file and store the compact frames and lazy summary
+    with it, once the memory budget admits the job (raises MemoryBudgetExceeded
+    when it doesn't).
+    """
+    raw_index = get_raw_index(dataset)
+    estimate = estimate_job_bytes('clean', rows=len(raw_index))
+    if dataset.get('included_df') is not None:
+        # Cleaning again: the previous results stay loaded until they are replaced
+        estimate += dataset_footprint(dataset)['total']
+    with memory_reservation('clean', estimate, dataset_id), DatasetLock(CACHE_DIR, dataset_id):
+        # Clean the latest saved version, so an append saved meanwhile isn't overwritten
+        dataset.update(load_dataset_metadata(dataset_id) or {})
+        _clean_dataset(dataset_id, dataset)
+
+def _clean_dataset(dataset_id, dataset):
+    # Load the CSV into a DataFrame with proper column mapping
+    df = read_csv_file(dataset['filepath'], parser=app.config['CSV_PARSER'])
+    
+    # Rename columns to match datacleaning.py expectations
+    df = df.rename(columns=COLUMN_MAPPING)
+    
+    # Initialize cleaner and clean data
+    rules = load_rules(app.config['VALIDATION_RULES']) if app.config['VALIDATION_RULES'] else None
+    cleaner = DataCleaner(deterministic_ids=app.config['DETERMINISTIC_ROW_IDS'], rules=rules)
+    included_df, excluded_df = cleaner.clean_data(df)
+    
+    # Store the frames in the compact schema
+    compact_included, compact_excluded = cleaner.compact_frames(included_df, excluded_df)
+    memory_stats = cleaner.memory_stats
+    logging.info(f"Compact storage for {dataset_id}: "
+                 f"{sum(memory_stats['bytes_before'].values())} -> {sum(memory_stats['bytes_after'].values())} bytes "
+                 f"({memory_stats['bytes_saved']} saved, {memory_stats['reduction_factor']}x smaller)")
+    
+    # Update dataset
+    dataset['included_df'] = compact_included
+    dataset['excluded_df'] = compact_excluded
+    # Summary sections are computed when first requested
+    dataset['summary_stats'] = LazySummary(compact_included, compact_excluded, cleaner.original_count)
+    dataset['memory_stats'] = memory_stats
+    dataset['row_index'] = RowIdIndex(compact_included, compact_excluded)
+    drop_legacy_results(dataset)
+    dataset['stats_state'] = None  # rebuilt from the frames on the next append
+    dataset['rules'] = rules
+    
+    store = get_dataset_store()
+    if store is not None:
+        store.add_dataset(dataset_id, dataset.get('filename'))
+        with stage('persist_store', rows=cleaner.original_count):
+            store.replace_rows(dataset_id, compact_included, compact_excluded)
+    
+    # Save updated metadata
+    save_dataset_metadata(dataset_id, dataset)
+    record_dataset_footprint(dataset_id, dataset)
+    
+    logging.info(f"Data cleaning completed for {dataset_id}: {len(compact_included)} included, {len(compact_excluded)} excluded")
 
 # Clean data route
 @app.route('/clean', methods=['POST'])
@@ -297,37 +1020,10 @@ def clean_data():
         return redirect(url_for('index'))
 
     try:
-        # Load the CSV into a DataFrame with proper column mapping
-        df = pd.read_csv(filepath)
-        
-        # Rename columns to match datacleaning.py expectations
-        column_mapping = {
-            'FirstName': 'name',
-            'BirthDay': 'birth_day',
-            'BirthMonth': 'birth_month',
-            'BirthYear': 'birth_year'
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Initialize cleaner and clean data
-        cleaner = DataCleaner()
-        included_df, excluded_df = cleaner.clean_data(df)
-        
-        # Get summary statistics
-        summary_stats = cleaner.get_summary_stats(included_df, excluded_df)
-        
-        # Update dataset
-        dataset['included_df'] = included_df
-        dataset['excluded_df'] = excluded_df
-        dataset['included_data'] = included_df.to_dict('records')
-        dataset['excluded_data'] = excluded_df.to_dict('records')
-        dataset['summary_stats'] = summary_stats
-        
-        # Save updated metadata
-        save_dataset_metadata(dataset_id, dataset)
-        
-        logging.info(f"Data cleaning completed for {dataset_id}: {len(dataset['included_data'])} included, {len(dataset['excluded_data'])} excluded")
-        
+        with stage('clean'):
+            clean_dataset(dataset_id, dataset)
+    except MemoryBudgetExceeded:
+        raise
     except Exception as e:
         logging.error(f"Error during data cleaning: {e}")
         import traceback
@@ -335,33 +1031,104 @@ def clean_data():
 
     return redirect(url_for('index', dataset_id=dataset_id))
 
+# Re-apply validation with changed rules, re-validating only the affected fields
+@app.route('/reclean', methods=['POST'])
+def reclean_data():
+    dataset_id = request.form.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    if not dataset or dataset.get('included_df') is None:
+        logging.error("No cleaned dataset to re-clean")
+        return redirect(url_for('index'))
+    
+    previous_rules = get_dataset_rules(dataset)
+    if request.is_json:
+        rules = request.get_json(silent=True)
+    else:
+        # Birth-year cutoff from the form, applied to the dataset's current rules
+        rules = copy.deepcopy(previous_rules if previous_rules is not None else DEFAULT_RULES)
+        try:
+            min_birth_year = int(request.form.get('min_birth_year', ''))
+        except ValueError:
+            logging.error("Invalid minimum birth year")
+            return redirect(url_for('index', dataset_id=dataset_id))
+        for field_config in rules['fields']:
+            if field_config['field'] != 'birth_year':
+                continue
+            for check in field_config.get('checks', []):
+                if check['check'] == 'min':
+                    check['value'] = min_birth_year
+                    check['reason'] = f"Birth year older than {min_birth_year}"
+    
+    try:
+        # Client rules are checked before any work is reserved or locked
+        if rules is None:
+            raise ValueError("request body is not valid JSON")
+        check_reclean_rules(rules, previous_rules)
+        rows = len(dataset['included_df']) + len(dataset['excluded_df'])
+        with memory_reservation('reclean', estimate_job_bytes('reclean', rows=rows), dataset_id), \
+                DatasetLock(CACHE_DIR, dataset_id):
+            # Re-clean the latest saved version, so an append saved meanwhile isn't overwritten
+            dataset = load_dataset_metadata(dataset_id)
+            if dataset and dataset.get('included_df') is not None:
+                reclean_dataset(dataset_id, dataset, rules, get_dataset_rules(dataset))
+    except ValueError as e:
+        logging.error(f"Invalid rules for re-cleaning {dataset_id}: {e}")
+        if request.is_json or wants_json():
+            return jsonify({'error': f"Invalid rules: {e}"}), 400
+        return f"Invalid rules: {e}", 400
+    
+    return redirect(url_for('index', dataset_id=dataset_id))
+
+def check_reclean_rules(rules, previous_rules):
+    """Raise ValueError when rules are malformed or can't be applied by re-cleaning under previous_rules"""
+    if compile_rules(rules).fields != compile_rules(previous_rules).fields:
+        raise ValueError("Rule changes that add or remove fields need a full re-clean")
+
+def reclean_dataset(dataset_id, dataset, rules, previous_rules):
+    """
+    Re-validate a cleaned dataset under changed rules and update its frames and
+    statistics. Raises ValueError when the rules can't be applied by re-cleaning.
+    """
+    cleaner = DataCleaner(deterministic_ids=app.config['DETERMINISTIC_ROW_IDS'], rules=rules)
+    with stage('reclean', rows=len(dataset['included_df']) + len(dataset['excluded_df'])):
+        result = cleaner.reclean(dataset['included_df'], dataset['excluded_df'], previous_rules)
+    
+    stats = dataset.get('stats_state')
+    if stats is None:
+        stats = IncrementalStats.from_frames(dataset['included_df'], dataset['excluded_df'],
+                                             dataset['summary_stats']['dataset_sizes']['original_row_count'],
+                                             track_duplicates=False)
+    stats.duplicates = None  # states saved earlier carry a per-row duplicate index
+    stats.apply_reclean(result)
+    
+    dataset['included_df'] = result['included_df']
+    dataset['excluded_df'] = result['excluded_df']
+    dataset['row_index'] = RowIdIndex(result['included_df'], result['excluded_df'])
+    drop_legacy_results(dataset)
+    dataset['stats_state'] = stats
+    dataset['summary_stats'] = LazySummary.from_stats(stats, dataset['included_df'], dataset['excluded_df'])
+    dataset['rules'] = rules
+    save_dataset_metadata(dataset_id, dataset)
+    record_dataset_footprint(dataset_id, dataset)
+    if get_dataset_store() is not None:
+        with stage('persist_store', rows=len(dataset['included_df']) + len(dataset['excluded_df'])):
+            get_dataset_store().replace_rows(dataset_id, dataset['included_df'], dataset['excluded_df'])
+    
+    logging.info(f"Re-cleaned {dataset_id}: {len(result['added_included'])} rows now included, "
+                 f"{len(result['added_excluded'])} rows now excluded")
+
 # Clear specific dataset
 @app.route('/clear/<dataset_id>', methods=['POST'])
 def clear_dataset(dataset_id):
     dataset_list = get_dataset_list()
     
     if dataset_id in dataset_list:
-        # Load and delete file
-        dataset = load_dataset_metadata(dataset_id)
-        if dataset:
-            filepath = dataset.get('filepath')
-            if filepath and os.path.exists(filepath):
-                try:
-                    os.unlink(filepath)
-                except Exception as e:
-                    logging.error(f"Error deleting file {filepath}: {e}")
-        
-        # Delete metadata file
-        meta_filepath = os.path.join(CACHE_DIR, f'{dataset_id}_meta.pkl')
-        if os.path.exists(meta_filepath):
-            try:
-                os.unlink(meta_filepath)
-            except Exception as e:
-                logging.error(f"Error deleting metadata {meta_filepath}: {e}")
+        # Delete the raw file, metadata and shared frames
+        delete_dataset(dataset_id)
         
         # Remove from dataset list
-        dataset_list.remove(dataset_id)
-        set_dataset_list(dataset_list)
+        remove_from_dataset_list(dataset_id)
+        dataset_list = get_dataset_list()
         logging.info(f"Cleared dataset {dataset_id}")
         
         # Update current dataset ID
@@ -379,24 +1146,11 @@ def clear_data():
     
     # Clean up all saved files
     for dataset_id in dataset_list:
-        dataset = load_dataset_metadata(dataset_id)
-        if dataset:
-            filepath = dataset.get('filepath')
-            if filepath and os.path.exists(filepath):
-                try:
-                    os.unlink(filepath)
-                except Exception as e:
-                    logging.error(f"Error deleting file {filepath}: {e}")
-        
-        # Delete metadata file
-        meta_filepath = os.path.join(CACHE_DIR, f'{dataset_id}_meta.pkl')
-        if os.path.exists(meta_filepath):
-            try:
-                os.unlink(meta_filepath)
-            except Exception as e:
-                logging.error(f"Error deleting metadata {meta_filepath}: {e}")
+        delete_dataset(dataset_id)
     
-    # Clear session
+    # Clear session (and the shared store)
+    if get_dataset_store() is not None:
+        get_dataset_store().remove_all()
     set_dataset_list([])
     set_current_dataset_id(None)
     
@@ -407,8 +1161,10 @@ def clear_data():
 def download_included_csv():
     dataset = get_current_dataset()
     if dataset and dataset.get('included_df') is not None and not dataset['included_df'].empty:
-        output = io.StringIO()
-        dataset['included_df'].to_csv(output, index=False)
+        with stage('export:included_csv', rows=len(dataset['included_df'])) as timing:
+            output = io.StringIO()
+            to_display_frame(dataset['included_df']).to_csv(output, index=False)
+            timing.nbytes = output.tell()
         output.seek(0)
         
         response = make_response(output.getvalue())
@@ -425,7 +1181,7 @@ def download_included_pdf():
     if not dataset or dataset.get('included_df') is None or dataset['included_df'].empty:
         return "No data available", 404
     
-    included_df = dataset['included_df']
+    included_df = to_display_frame(dataset['included_df'])
     summary_stats = dataset.get('summary_stats')
     
     buffer = io.BytesIO()
@@ -449,36 +1205,39 @@ def download_included_pdf():
     summary_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
     summary_text += f"Total Records: {len(included_df)}<br/>"
     if summary_stats:
-        summary_text += f"Unique Names: {summary_stats['uniqueness']['total_unique_names']}<br/>"
+        uniqueness = get_summary_section(get_current_dataset_id(), dataset, 'uniqueness')
+        summary_text += f"Unique Names: {uniqueness['total_unique_names']}<br/>"
     elements.append(Paragraph(summary_text, styles['Normal']))
     elements.append(Spacer(1, 0.3*inch))
     
-    # Table with full row IDs
-    data = [['Row ID', 'Name', 'Birth Day', 'Birth Month', 'Birth Year']]
-    for idx, row in included_df.iterrows():
-        data.append([
-            str(row['row_id']),  # Full row ID
-            str(row['name']),
-            str(row['birth_day']),
-            str(row['birth_month']),
-            str(row['birth_year'])
-        ])
-    
-    table = Table(data, colWidths=[2.5*inch, 2*inch, 1*inch, 1.2*inch, 1*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8)
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
+    with stage('export:included_pdf', rows=len(included_df)) as timing:
+        # Table with full row IDs
+        data = [['Row ID', 'Name', 'Birth Day', 'Birth Month', 'Birth Year']]
+        for idx, row in included_df.iterrows():
+            data.append([
+                str(row['row_id']),  # Full row ID
+                str(row['name']),
+                str(row['birth_day']),
+                str(row['birth_month']),
+                str(row['birth_year'])
+            ])
+        
+        table = Table(data, colWidths=[2.5*inch, 2*inch, 1*inch, 1.2*inch, 1*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ]))
+        
+        elements.append(table)
+        doc.build(elements)
+        timing.nbytes = buffer.tell()
     
     buffer.seek(0)
     filename = dataset.get('filename', 'data').replace('.csv', '')
@@ -489,8 +1248,10 @@ def download_included_pdf():
 def download_excluded_csv():
     dataset = get_current_dataset()
     if dataset and dataset.get('excluded_df') is not None and not dataset['excluded_df'].empty:
-        output = io.StringIO()
-        dataset['excluded_df'].to_csv(output, index=False)
+        with stage('export:excluded_csv', rows=len(dataset['excluded_df'])) as timing:
+            output = io.StringIO()
+            to_display_frame(dataset['excluded_df']).to_csv(output, index=False)
+            timing.nbytes = output.tell()
         output.seek(0)
         
         response = make_response(output.getvalue())
@@ -507,7 +1268,7 @@ def download_excluded_pdf():
     if not dataset or dataset.get('excluded_df') is None or dataset['excluded_df'].empty:
         return "No data available", 404
     
-    excluded_df = dataset['excluded_df']
+    excluded_df = to_display_frame(dataset['excluded_df'])
     
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
@@ -532,34 +1293,36 @@ def download_excluded_pdf():
     elements.append(Paragraph(summary_text, styles['Normal']))
     elements.append(Spacer(1, 0.3*inch))
     
-    # Table with full row IDs
-    data = [['Row ID', 'Name', 'Birth Day', 'Birth Month', 'Birth Year', 'Exclusion Reason']]
-    for idx, row in excluded_df.iterrows():
-        data.append([
-            str(row['row_id']),  # Full row ID
-            str(row['name']) if row['name'] else '-',
-            str(row['birth_day']) if row['birth_day'] else '-',
-            str(row['birth_month']) if row['birth_month'] else '-',
-            str(row['birth_year']) if row['birth_year'] else '-',
-            str(row['exclusion_reason'])
-        ])
-    
-    table = Table(data, colWidths=[2.5*inch, 1.5*inch, 0.8*inch, 1*inch, 0.8*inch, 2.5*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dc3545')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
+    with stage('export:excluded_pdf', rows=len(excluded_df)) as timing:
+        # Table with full row IDs
+        data = [['Row ID', 'Name', 'Birth Day', 'Birth Month', 'Birth Year', 'Exclusion Reason']]
+        for idx, row in excluded_df.iterrows():
+            data.append([
+                str(row['row_id']),  # Full row ID
+                str(row['name']) if row['name'] else '-',
+                str(row['birth_day']) if row['birth_day'] else '-',
+                str(row['birth_month']) if row['birth_month'] else '-',
+                str(row['birth_year']) if row['birth_year'] else '-',
+                str(row['exclusion_reason'])
+            ])
+        
+        table = Table(data, colWidths=[2.5*inch, 1.5*inch, 0.8*inch, 1*inch, 0.8*inch, 2.5*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dc3545')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 7),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+        ]))
+        
+        elements.append(table)
+        doc.build(elements)
+        timing.nbytes = buffer.tell()
     
     buffer.seek(0)
     filename = dataset.get('filename', 'data').replace('.csv', '')
@@ -572,14 +1335,16 @@ def download_top80_csv():
     if not dataset or not dataset.get('summary_stats') or 'top_80_names' not in dataset['summary_stats']:
         return "No data available", 404
     
-    top_80_data = dataset['summary_stats']['top_80_names']
+    top_80_data = get_summary_section(get_current_dataset_id(), dataset, 'top_80_names')
     
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Name', 'Frequency', 'Percentage'])
-    
-    for name_info in top_80_data['top_names']:
-        writer.writerow([name_info['name'], name_info['frequency'], name_info['percentage']])
+    with stage('export:top80_csv', rows=len(top_80_data['top_names'])) as timing:
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Name', 'Frequency', 'Percentage'])
+        
+        for name_info in top_80_data['top_names']:
+            writer.writerow([name_info['name'], name_info['frequency'], name_info['percentage']])
+        timing.nbytes = output.tell()
     
     output.seek(0)
     response = make_response(output.getvalue())
@@ -595,9 +1360,11 @@ def download_top80_json():
     if not dataset or not dataset.get('summary_stats') or 'top_80_names' not in dataset['summary_stats']:
         return "No data available", 404
     
-    top_80_data = dataset['summary_stats']['top_80_names']
+    top_80_data = get_summary_section(get_current_dataset_id(), dataset, 'top_80_names')
     
-    output = json.dumps(top_80_data, indent=2)
+    with stage('export:top80_json', rows=len(top_80_data['top_names'])) as timing:
+        output = json.dumps(top_80_data, indent=2)
+        timing.nbytes = len(output)
     response = make_response(output)
     filename = dataset.get('filename', 'data').replace('.csv', '')
     response.headers['Content-Disposition'] = f'attachment; filename={filename}_top_80_percent_names.json'
@@ -633,5 +1400,259 @@ def get_chart_data():
     
     return jsonify({'error': 'No data available'}), 404
 
+# API endpoint for one summary section, so each tab loads on its own
+@app.route('/api/summary/<section>')
+def get_summary(section):
+    dataset_id = request.args.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    if not dataset or not dataset.get('summary_stats'):
+        return jsonify({'error': 'No data available'}), 404
+    if section not in SUMMARY_SECTIONS:
+        return jsonify({'error': f'Unknown summary section: {section}'}), 404
+    
+    return jsonify(json_safe(get_summary_section(dataset_id, dataset, section)))
+
+# API endpoint for paging through duplicate groups
+@app.route('/api/duplicates')
+def get_duplicates():
+    dataset_id = request.args.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    if not dataset or not isinstance(dataset.get('summary_stats'), LazySummary):
+        return jsonify({'error': 'No data available'}), 404
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    sort = request.args.get('sort', 'report')
+    pair = request.args.get('pair', '').strip()
+    pair = tuple(pair.split(',')) if pair else None
+    if pair is not None and pair not in DUPLICATE_FIELD_PAIRS:
+        return jsonify({'error': f"Unknown field pair: {','.join(pair)}"}), 400
+    if sort not in DUPLICATE_SORT_ORDERS:
+        return jsonify({'error': f'Unknown sort order: {sort}'}), 400
+    
+    summary_stats = cached_summary(dataset_id, dataset)
+    had_duplicate_groups = summary_stats.has_duplicate_groups()
+    duplicate_groups = summary_stats.duplicate_groups()
+    cache_summary(dataset_id, dataset, summary_stats, [], had_duplicate_groups)
+    
+    groups = duplicate_groups.select(pair, sort)
+    total_pages = max(math.ceil(len(groups) / per_page), 1)
+    page_groups = groups[(page - 1) * per_page:page * per_page]
+    return jsonify(json_safe({
+        'total_duplicate_groups': len(duplicate_groups),
+        'total_duplicate_records': duplicate_groups.total_records,
+        'matching_groups': len(groups),
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages,
+        'duplicate_groups': duplicate_groups.describe(page_groups, dataset['included_df'])
+    }))
+
+# API endpoint for paging through near-duplicate (similar name) groups
+@app.route('/api/duplicates/fuzzy')
+def get_fuzzy_duplicates_page():
+    dataset_id = request.args.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    if not dataset or dataset.get('included_df') is None:
+        return jsonify({'error': 'No data available'}), 404
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    threshold = request.args.get('threshold', DEFAULT_FUZZY_THRESHOLD, type=float)
+    blocking = request.args.get('blocking', 'soundex')
+    if threshold is None or not 0 < threshold <= 1:
+        return jsonify({'error': 'Threshold must be between 0 and 1'}), 400
+    if blocking not in BLOCKING_METHODS:
+        return jsonify({'error': f'Unknown blocking method: {blocking}'}), 400
+    
+    result = get_fuzzy_duplicates(dataset_id, dataset, round(threshold, 4), blocking)
+    groups = result['fuzzy_groups']
+    total_pages = max(math.ceil(len(groups) / per_page), 1)
+    row_ids = dataset['included_df']['row_id']
+    page_groups = []
+    for group in groups[(page - 1) * per_page:page * per_page]:
+        # Groups are cached with row positions; only the page's are turned into row ids
+        described = {key: value for key, value in group.items() if key != 'rows'}
+        described['row_ids'] = row_ids_to_text(row_ids.iloc[group['rows']]).tolist()
+        page_groups.append(described)
+    return jsonify(json_safe({
+        **{key: value for key, value in result.items() if key != 'fuzzy_groups'},
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages,
+        'fuzzy_groups': page_groups
+    }))
+
+# API endpoint for records and field-pair keys shared across datasets
+@app.route('/api/linkage')
+def get_linkage():
+    dataset_ids = [dataset_id for dataset_id in request.args.get('datasets', '').split(',') if dataset_id]
+    dataset_ids = dataset_ids or get_dataset_list()
+    keys = request.args.getlist('key') or list(LINKAGE_KEYS)
+    preview = min(max(request.args.get('preview', LINKAGE_PREVIEW_GROUPS, type=int), 0), 100)
+    unknown = [key for key in keys if key not in LINKAGE_KEYS]
+    if unknown:
+        return jsonify({'error': f"Unknown linkage key: {'; '.join(unknown)}"}), 400
+    
+    # Only the datasets' hash indexes are joined; frames are read for the preview groups
+    linked_ids, indexes, frames = [], [], []
+    for dataset_id in dataset_ids:
+        dataset = load_dataset_metadata(dataset_id)
+        if not dataset or dataset.get('included_df') is None:
+            continue
+        linked_ids.append(dataset_id)
+        indexes.append(get_linkage_index(dataset_id, dataset))
+        frames.append(dataset['included_df'])
+    if len(linked_ids) < 2:
+        return jsonify({'error': 'At least two cleaned datasets are needed for linkage'}), 400
+    
+    return jsonify(json_safe(linkage_report(linked_ids, indexes, frames, keys=keys, preview_groups=preview)))
+
+# API endpoint for keyset-paginated included/excluded rows from the shared store
+@app.route('/api/rows/<table>')
+def get_rows(table):
+    if table not in ('included', 'excluded'):
+        return jsonify({'error': f'Unknown table: {table}'}), 404
+    if get_dataset_store() is None:
+        return jsonify({'error': 'Dataset store is not enabled (set DATASET_STORE)'}), 404
+    dataset_id = request.args.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    store = get_store_rows(dataset_id, dataset) if dataset else None
+    if store is None:
+        return jsonify({'error': 'No data available'}), 404
+    
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+    sort_by = request.args.get('sort_by', '') if table == 'included' else ''
+    after = request.args.get('after')
+    try:
+        after = json.loads(after) if after else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if after is not None and not is_valid_cursor(after, sort_by if sort_by in SORT_COLUMNS else None):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    if table == 'included':
+        filters = {}
+        if request.args.get('name_filter', '').strip():
+            filters['name'] = request.args['name_filter'].strip()
+        for field, arg in (('birth_month', 'month_filter'), ('birth_year', 'year_filter'), ('birth_day', 'day_filter')):
+            value = request.args.get(arg, type=int)
+            if value is not None:
+                filters[field] = value
+        total, rows, cursor = store.query_included(dataset_id, filters, sort_by,
+                                                   request.args.get('sort_order', 'asc'), limit=limit, after=after)
+    else:
+        total, rows, cursor = store.query_excluded(dataset_id, request.args.get('reason_filter', '').strip(),
+                                                   limit=limit, after=after)
+    return jsonify({
+        'total': total,
+        'rows': rows,
+        'next_after': json.dumps(cursor) if cursor is not None else None
+    })
+
+def is_valid_cursor(after, sort_column):
+    """Whether a client's cursor has the shape the store returns: [position], or [sort value, position] when sorted"""
+    def is_integer(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+    
+    if not isinstance(after, list):
+        return False
+    if sort_column is None:
+        return len(after) == 1 and is_integer(after[0])
+    value_valid = isinstance(after[0], str) if sort_column in ('row_id', 'name') else is_integer(after[0])
+    return len(after) == 2 and value_valid and is_integer(after[1])
+
+# API endpoint for disk use and eviction counters
+@app.route('/api/storage')
+def get_storage():
+    return jsonify(get_storage_manager().metrics())
+
+# API endpoint for the memory budget: reserved and queued jobs, admission counters, dataset footprints
+@app.route('/api/memory')
+def get_memory():
+    return jsonify(get_memory_budget().metrics())
+
+# Disk use, refreshed from the storage manager on each scrape
+STORAGE_BYTES = REGISTRY.gauge('datacleaning_storage_bytes', 'Bytes used on disk by area')
+STORAGE_DATASETS = REGISTRY.gauge('datacleaning_storage_datasets', 'Datasets stored on disk')
+STORAGE_EVICTED_BYTES = REGISTRY.gauge('datacleaning_storage_evicted_bytes', 'Bytes evicted by storage sweeps so far')
+
+# Memory accounting, refreshed from the shared ledger on each scrape
+MEMORY_BUDGET_BYTES = REGISTRY.gauge('datacleaning_memory_budget_bytes', 'Memory budget for concurrent jobs, 0 for unlimited')
+MEMORY_RESERVED_BYTES = REGISTRY.gauge('datacleaning_memory_reserved_bytes', 'Estimated peak memory of jobs by state')
+MEMORY_JOBS = REGISTRY.gauge('datacleaning_memory_jobs', 'Jobs holding or waiting for memory by state')
+MEMORY_ADMISSIONS = REGISTRY.gauge('datacleaning_memory_admissions', 'Jobs admitted, queued and rejected so far by outcome')
+MEMORY_DATASET_BYTES = REGISTRY.gauge('datacleaning_memory_dataset_bytes', 'In-memory size of the stored datasets by component')
+
+# Prometheus scrape endpoint (this worker process's metrics)
+@app.route('/metrics')
+def metrics():
+    storage = get_storage_manager().metrics()
+    for area in ('data', 'cache', 'orphan'):
+        STORAGE_BYTES.set(storage[f'{area}_bytes'], area=area)
+    STORAGE_DATASETS.set(storage['datasets'])
+    STORAGE_EVICTED_BYTES.set(storage['evicted_bytes'])
+    memory = get_memory_budget().metrics()
+    MEMORY_BUDGET_BYTES.set(memory['budget_bytes'])
+    MEMORY_RESERVED_BYTES.set(memory['reserved_bytes'], state='running')
+    MEMORY_RESERVED_BYTES.set(memory['queued_bytes'], state='queued')
+    MEMORY_JOBS.set(memory['running_jobs'], state='running')
+    MEMORY_JOBS.set(memory['queued_jobs'], state='queued')
+    for outcome in ('admitted', 'queued', 'rejected'):
+        MEMORY_ADMISSIONS.set(memory[outcome], outcome=outcome)
+    for component in ('frames', 'indexes', 'statistics'):
+        MEMORY_DATASET_BYTES.set(sum(footprint.get(component, 0) for footprint in memory['footprints'].values()),
+                                 component=component)
+    response = make_response(REGISTRY.render())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+# Saved profiling reports (admin token required)
+@app.route('/api/profiles')
+def get_profiles():
+    if not is_profiling_admin():
+        return jsonify({'error': 'Profiling requires a valid X-Profile-Token'}), 403
+    return jsonify({'profiles': list_runs(app.config['PROFILE_DIR'])})
+
+@app.route('/api/profiles/<run_id>')
+@app.route('/api/profiles/<run_id>/<report>')
+def get_profile(run_id, report='json'):
+    if not is_profiling_admin():
+        return jsonify({'error': 'Profiling requires a valid X-Profile-Token'}), 403
+    if report == 'json':
+        result = load_report(app.config['PROFILE_DIR'], run_id)
+        return jsonify(result) if result is not None else (jsonify({'error': 'Profile not found'}), 404)
+    
+    # stacks: collapsed stacks for flamegraph.pl or speedscope; top: function table; pstats: cProfile dump
+    filenames = {'stacks': STACKS_FILENAME, 'top': TOP_FILENAME, 'pstats': PSTATS_FILENAME}
+    if report not in filenames:
+        return jsonify({'error': f"report must be one of json, {', '.join(filenames)}"}), 400
+    path = report_path(app.config['PROFILE_DIR'], run_id, filenames[report])
+    if path is None or not os.path.exists(path):
+        return jsonify({'error': 'Profile not found'}), 404
+    if report == 'pstats':
+        return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{run_id}.pstats')
+    return send_file(os.path.abspath(path), mimetype='text/plain')
+
+# API endpoint for looking up a single row by row_id
+@app.route('/api/row/<row_id>')
+def get_row(row_id):
+    dataset_id = request.args.get('dataset_id', get_current_dataset_id())
+    dataset = load_dataset_metadata(dataset_id) if dataset_id else None
+    if not dataset or dataset.get('row_index') is None:
+        return jsonify({'error': 'No data available'}), 404
+    
+    try:
+        result = dataset['row_index'].lookup(row_id, dataset['included_df'], dataset['excluded_df'])
+    except ValueError:
+        return jsonify({'error': 'Invalid row_id'}), 400
+    
+    if result is None:
+        return jsonify({'error': 'Row not found'}), 404
+    
+    result['row_id'] = row_id
+    result['dataset_id'] = dataset_id
+    return jsonify(result)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
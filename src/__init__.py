@@ -1,3 +1,4 @@
-from .datacleaning import DataCleaner
+from .datacleaning import DataCleaner, to_display_frame
+from .rowindex import RowIdIndex
 
-__all__ = ['DataCleaner']
\ No newline at end of file
+__all__ = ['DataCleaner', 'RowIdIndex', 'to_display_frame']
\ No newline at end of file
@@ -0,0 +1,290 @@
+#import packages
+import os
+import glob
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .datacleaning import SUMMARY_SECTIONS, DataCleaner, save_reports
+from .duplicates import DEFAULT_MEMORY_BUDGET, find_duplicate_records_external
+from .ingest import COLUMN_MAPPING, is_csv_upload, read_csv_file, strip_compression_suffix
+from .stats import DUPLICATE_PREVIEW_GROUPS, IncrementalStats, LazySummary
+
+# Per-output-directory record of the files already cleaned, keyed by input path
+MANIFEST_FILENAME = 'batch_manifest.json'
+
+# Mergeable statistics saved with each file's reports
+STATS_STATE_FILENAME = 'stats_state.pkl'
+
+COMBINED_SUMMARY_FILENAME = 'combined_summary.json'
+
+# Bytes hashed per read when fingerprinting input files
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Included rows read per chunk when finding duplicates across files
+INCLUDED_CHUNK_ROWS = 100000
+
+# Row ids listed per group in the combined summary's preview; 'count' gives the full size
+PREVIEW_ROW_IDS = 100
+
+
+def file_digest(filepath: str) -> str:
+    """
+    SHA-256 of a file's content, read in chunks.
+    
+    Args:
+        filepath: File to hash
+    
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discover_files(inputs: List[str]) -> List[str]:
+    """
+    Expand directories and glob patterns into the CSV files to clean.
+    
+    Args:
+        inputs: Directories (searched non-recursively), glob patterns or file paths
+    
+    Returns:
+        Sorted, de-duplicated list of CSV file paths (plain or compressed)
+    """
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item)
+        found.update(path for path in candidates if os.path.isfile(path) and is_csv_upload(path))
+    return sorted(found)
+
+
+def report_name(filepath: str) -> str:
+    """Reports directory name for an input file, e.g. data/january.csv.gz -> january"""
+    return os.path.splitext(os.path.basename(strip_compression_suffix(filepath)))[0]
+
+
+def clean_file(filepath: str, report_dir: str, parser: str = 'pandas',
+               previous_digest: Optional[str] = None) -> Dict:
+    """
+    Clean one file into its reports directory, unless its content is
+    unchanged since the previous run. Runs in a batch worker process.
+    
+    Args:
+        filepath: CSV file to clean
+        report_dir: Directory for the file's save_reports outputs and statistics
+        parser: CSV parser backend, 'pandas' or 'arrow'
+        previous_digest: Content and rules digest recorded by the previous run
+    
+    Returns:
+        Dictionary with the file's status ('cleaned', 'skipped' or 'error'),
+        digest, row counts and timing
+    """
+    started = time.perf_counter()
+    result = {'file': filepath, 'report_dir': report_dir}
+    try:
+        # Rule changes invalidate earlier results just like content changes
+        rules_digest = DataCleaner().rule_set.digest
+        digest = f"{file_digest(filepath)}:{rules_digest}"
+        result['digest'] = digest
+        if digest == previous_digest and os.path.exists(os.path.join(report_dir, STATS_STATE_FILENAME)):
+            result['status'] = 'skipped'
+            return result
+        
+        df = read_csv_file(filepath, parser=parser).rename(columns=COLUMN_MAPPING)
+        cleaner = DataCleaner()
+        included_df, excluded_df = cleaner.clean_data(df)
+        
+        # The per-file summary comes from the same mergeable state the combined summary uses.
+        # Duplicate groups are left out of the state (they grow with the rows); the
+        # summary lists only the leading groups
+        stats = IncrementalStats.from_frames(included_df, excluded_df, cleaner.original_count,
+                                             track_duplicates=False)
+        summary = dict(LazySummary.from_stats(stats, included_df, excluded_df))
+        save_reports(included_df, excluded_df, summary, output_dir=report_dir, verbose=False)
+        with open(os.path.join(report_dir, STATS_STATE_FILENAME), 'wb') as f:
+            pickle.dump(stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        result.update(status='cleaned', rows=cleaner.original_count,
+                      included=len(included_df), excluded=len(excluded_df))
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    finally:
+        result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def included_chunks(report_dirs: List[str]) -> Iterator[pd.DataFrame]:
+    """
+    Stream the included rows saved by clean_file, file after file.
+    
+    Args:
+        report_dirs: Reports directories, in file order
+    
+    Returns:
+        Iterator of DataFrames with text row ids and plain name and date values
+    """
+    for report_dir in report_dirs:
+        # Names such as 'NA' are valid; only the row ids and numbers are parsed
+        yield from pd.read_csv(os.path.join(report_dir, 'data_included.csv'), chunksize=INCLUDED_CHUNK_ROWS,
+                               dtype={'row_id': str, 'name': str}, keep_default_na=False)
+
+
+def combined_duplicates(report_dirs: List[str], memory_budget: int = DEFAULT_MEMORY_BUDGET) -> Dict:
+    """
+    Duplicate groups across all files' included rows, found out of core so
+    memory stays within the budget however many rows the batch has.
+    
+    Args:
+        report_dirs: Reports directories, in file order
+        memory_budget: Memory budget in bytes for the external sort
+    
+    Returns:
+        Duplicates section with the totals and the leading groups only, each
+        listing at most PREVIEW_ROW_IDS row ids
+    """
+    fd, groups_path = tempfile.mkstemp(prefix='batch_groups_', suffix='.jsonl')
+    os.close(fd)
+    try:
+        duplicates = find_duplicate_records_external(included_chunks(report_dirs), groups_path,
+                                                     memory_budget=memory_budget,
+                                                     preview_groups=DUPLICATE_PREVIEW_GROUPS)
+    finally:
+        os.unlink(groups_path)
+    duplicates.pop('groups_file')
+    for group in duplicates['duplicate_groups']:
+        group['row_ids'] = group['row_ids'][:PREVIEW_ROW_IDS]
+    return duplicates
+
+
+def run_batch(inputs: List[str], output_dir: str = './reports', workers: int = None,
+              parser: str = 'pandas', force: bool = False, verbose: bool = True) -> Dict:
+    """
+    Clean many CSV files in a process pool, writing each file's reports to
+    output_dir/<file name>/ and a combined summary merged from the per-file
+    statistics. Files whose content (and the validation rules) are unchanged
+    since the last run into output_dir are skipped, but still count toward
+    the combined summary.
+    
+    Args:
+        inputs: Directories, glob patterns or file paths
+        output_dir: Root directory for reports
+        workers: Worker processes (CPU count by default)
+        parser: CSV parser backend, 'pandas' or 'arrow'
+        force: Re-clean every file even if unchanged
+        verbose: Print a line per file and the totals
+    
+    Returns:
+        Dictionary with per-file results, totals and throughput
+    """
+    files = discover_files(inputs)
+    names = [report_name(filepath) for filepath in files]
+    clashes = sorted({name for name in names if names.count(name) > 1})
+    if clashes:
+        raise ValueError(f"Input files would share report directories: {', '.join(clashes)}")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(clean_file, filepath, os.path.join(output_dir, name), parser,
+                        None if force else manifest.get(os.path.abspath(filepath), {}).get('digest'))
+            for filepath, name in zip(files, names)
+        ]
+        results = []
+        for future in futures:
+            result = future.result()
+            results.append(result)
+            if verbose:
+                line = f"{result['status']:>8}  {result['file']}"
+                if result['status'] == 'cleaned':
+                    line += f"  {result['rows']} rows in {result['seconds']}s"
+                elif result['status'] == 'error':
+                    line += f"  {result['error']}"
+                print(line)
+    elapsed = time.perf_counter() - started
+    
+    # Combined summary from the per-file states, in file order; duplicates
+    # span files, so they are found from the saved included rows
+    combined = IncrementalStats(track_duplicates=False)
+    report_dirs = []
+    for result in results:
+        if result['status'] == 'error':
+            continue
+        with open(os.path.join(result['report_dir'], STATS_STATE_FILENAME), 'rb') as f:
+            combined.merge(pickle.load(f))
+        report_dirs.append(result['report_dir'])
+        manifest[os.path.abspath(result['file'])] = {
+            'digest': result['digest'],
+            'report_dir': result['report_dir']
+        }
+    combined_summary = {section: combined.section(section) if section != 'duplicates'
+                        else combined_duplicates(report_dirs)
+                        for section in SUMMARY_SECTIONS}
+    with open(os.path.join(output_dir, COMBINED_SUMMARY_FILENAME), 'w') as f:
+        json.dump(combined_summary, f, indent=2)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    cleaned_rows = sum(result.get('rows', 0) for result in results)
+    totals = {
+        'files': len(results),
+        'cleaned': sum(result['status'] == 'cleaned' for result in results),
+        'skipped': sum(result['status'] == 'skipped' for result in results),
+        'errors': sum(result['status'] == 'error' for result in results),
+        'cleaned_rows': cleaned_rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(cleaned_rows / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    if verbose:
+        sizes = combined_summary['dataset_sizes']
+        print(f"Files: {totals['files']} ({totals['cleaned']} cleaned, {totals['skipped']} unchanged, "
+              f"{totals['errors']} failed)")
+        print(f"Combined rows: {sizes['original_row_count']} "
+              f"({sizes['included_row_count']} included, {sizes['excluded_row_count']} excluded)")
+        print(f"Throughput: {totals['rows_per_second']} rows/sec "
+              f"({cleaned_rows} rows in {totals['seconds']}s)")
+    
+    return {'results': results, 'totals': totals, 'summary': combined_summary}
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(
+        description="Clean a directory or glob of CSVs in parallel, writing each file's reports "
+                    "plus a combined summary",
+        epilog="Example: python -m src.batch 'data/2024-*.csv.gz' --output-dir reports"
+    )
+    arg_parser.add_argument('inputs', nargs='+', help="Directories, glob patterns or CSV files")
+    arg_parser.add_argument('--output-dir', default='./reports', help="Root directory for reports")
+    arg_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    arg_parser.add_argument('--parser', choices=['pandas', 'arrow'], default='pandas',
+                            help="CSV parser backend (arrow is multi-threaded)")
+    arg_parser.add_argument('--force', action='store_true', help="Re-clean files even if unchanged")
+    args = arg_parser.parse_args()
+    
+    batch = run_batch(args.inputs, output_dir=args.output_dir, workers=args.workers,
+                      parser=args.parser, force=args.force)
+    if batch['totals']['files'] == 0:
+        print("No CSV files found.")
+    sys.exit(1 if batch['totals']['errors'] else 0)
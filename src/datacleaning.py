@@ -1,35 +1,173 @@
 #import packages
 import pandas as pd
+import numpy as np
 import uuid
+import os
 import re
+import hashlib
+import binascii
+import threading
 from typing import Tuple, List, Dict
 import json
+from collections import OrderedDict
+from contextlib import nullcontext
+
+try:
+    from .duplicates import DEFAULT_MEMORY_BUDGET, DUPLICATE_FIELD_PAIRS, find_duplicate_records_external
+    from .fuzzy import BLOCKING_METHODS, DEFAULT_FUZZY_THRESHOLD, find_fuzzy_duplicates
+    from .ingest import COLUMN_MAPPING, read_csv_file
+    from .metrics import stage
+    from .profiling import PROFILE_KINDS, profile_run
+    from .rules import compile_rules
+except ImportError:  # run as a script: python src/datacleaning.py
+    from duplicates import DEFAULT_MEMORY_BUDGET, DUPLICATE_FIELD_PAIRS, find_duplicate_records_external
+    from fuzzy import BLOCKING_METHODS, DEFAULT_FUZZY_THRESHOLD, find_fuzzy_duplicates
+    from ingest import COLUMN_MAPPING, read_csv_file
+    from metrics import stage
+    from profiling import PROFILE_KINDS, profile_run
+    from rules import compile_rules
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional, row ids stay as strings without it
+    pa = None
+
+
+# Bit assigned to each field in the excluded frame's missing_mask column
+MISSING_FIELD_BITS = {
+    'name': 1,
+    'birth_day': 2,
+    'birth_month': 4,
+    'birth_year': 8
+}
+
+# Catalog of exclusion reasons produced by the validators (and the default
+# rule set), in priority order (name -> day -> month -> year). Each reason
+# owns one bit of exclusion_flags.
+EXCLUSION_REASONS = [
+    'missing name',
+    'name too short',
+    'special character in name',
+    'missing birth_day',
+    'invalid birth_day (not integer)',
+    'invalid birth_day (not numeric)',
+    'invalid day (not 1-31)',
+    'missing birth_month',
+    'invalid birth_month (not integer)',
+    'invalid birth_month (not numeric)',
+    'invalid month (not 1-12)',
+    'missing birth_year',
+    'invalid birth_year (not integer)',
+    'invalid birth_year (not numeric)',
+    'Birth year older than 1940'
+]
+REASON_BITS = {reason: 1 << i for i, reason in enumerate(EXCLUSION_REASONS)}
+
+# Sections of the summary statistics, in report order
+SUMMARY_SECTIONS = ('dataset_sizes', 'uniqueness', 'duplicates', 'top_80_names', 'exclusion_reasons')
+
+# Positions of the 32 hex digits within a canonical 36-character UUID string
+UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+class ValidationCache:
+
+    #Bounded LRU memo of per-value validation results.
+    #Thread-safe, since concurrent uploads clean through the same cache.
+    
+    def __init__(self, maxsize: int = 200000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock:
+            try:
+                result = self._entries[key]
+            except (KeyError, TypeError):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+    
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entries over maxsize"""
+        with self._lock:
+            try:
+                self._entries[key] = result
+            except TypeError:
+                # Unhashable values are simply not cached
+                return
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
 
 
 class DataCleaner:
 
     #Handles data cleaning, validation, and exclusion tracking for the dataset.
     
-    def __init__(self):
+    # Per-value validation results shared by all cleaners in the process
+    validation_cache = None
+    
+    def __init__(self, deterministic_ids: bool = False, validation_mode: str = 'distinct',
+                 rules: Dict = None, duplicates_path: str = None,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET):
+        if validation_mode not in ('distinct', 'row'):
+            raise ValueError(f"Unknown validation mode: {validation_mode}")
+        if validation_mode == 'row' and rules is not None:
+            raise ValueError("Row validation mode only supports the default rules")
+        self.deterministic_ids = deterministic_ids
+        self.validation_mode = validation_mode
+        self.rule_set = compile_rules(rules)
+        # When set, duplicate groups are found out of core and written here
+        self.duplicates_path = duplicates_path
+        self.memory_budget = memory_budget
         self.excluded_rows = []
         self.original_count = 0
         self.included_count = 0
         self.excluded_count = 0
+        self.memory_stats = {}
     
-    def add_row_id(self, df: pd.DataFrame) -> pd.DataFrame:
+    def add_row_id(self, df: pd.DataFrame, fingerprint: str = None) -> pd.DataFrame:
         """
-        Add unique row_id (UUID) to each row for tracking.
+        Add unique row_id to each row for tracking.
+        
+        Ids are generated in one batch as 16-byte UUIDs. In deterministic
+        mode they are derived from the dataset fingerprint and row position,
+        so re-cleaning the same data reproduces the same ids.
         
         Args:
             df: Input DataFrame
+            fingerprint: Dataset fingerprint for deterministic ids
+                (computed from df when deterministic mode is on and none is given)
             
         Returns:
             DataFrame with row_id column added as first column
         """
-        df['row_id'] = [str(uuid.uuid4()) for _ in range(len(df))]
-        # Move row_id to first column
-        cols = ['row_id'] + [col for col in df.columns if col != 'row_id']
-        df = df[cols]
+        with stage('row_ids', rows=len(df)):
+            if self.deterministic_ids and fingerprint is None:
+                fingerprint = dataset_fingerprint(df)
+            
+            row_ids = generate_row_ids(len(df), fingerprint if self.deterministic_ids else None)
+            
+            # Insert as first column without rebuilding the frame
+            df = df.drop(columns=['row_id'], errors='ignore')
+            df.insert(0, 'row_id', row_ids_to_binary(pd.Series(row_ids, index=df.index, dtype=object)))
         return df
     
     def validate_name(self, name) -> Tuple[bool, str]:
@@ -178,13 +316,17 @@ class DataCleaner:
         is_valid = len(reasons) == 0
         return is_valid, reasons
     
-    def clean_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def clean_data(self, df: pd.DataFrame, fingerprint: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Clean the dataset according to all validation rules.
         
+        In 'distinct' mode each column is factorized and only its distinct
+        values are validated; 'row' mode validates row by row.
+        
         Args:
             df: Input DataFrame with columns: name, birth_day, birth_month, birth_year
-            
+            fingerprint: Fingerprint for deterministic row ids (see add_row_id)
+        
         Returns:
             Tuple of (included_df, excluded_df)
         """
@@ -192,8 +334,30 @@ class DataCleaner:
         self.original_count = len(df)
         
         # Add row_id to track each row
-        df = self.add_row_id(df)
+        df = self.add_row_id(df, fingerprint)
+        
+        with stage('validation', rows=len(df)):
+            if self.validation_mode == 'distinct':
+                included_df, excluded_df = self._clean_distinct(df)
+            else:
+                included_df, excluded_df = self._clean_rows(df)
+        
+        # Update counts
+        self.included_count = len(included_df)
+        self.excluded_count = len(excluded_df)
         
+        return included_df, excluded_df
+    
+    def _clean_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Validate a frame one row at a time.
+        
+        Args:
+            df: Input DataFrame with row_id added
+            
+        Returns:
+            Tuple of (included_df, excluded_df)
+        """
         # Lists to store included and excluded rows
         included_rows = []
         excluded_rows = []
@@ -220,20 +384,282 @@ class DataCleaner:
                     'birth_day': row['birth_day'] if pd.notna(row['birth_day']) else '',
                     'birth_month': row['birth_month'] if pd.notna(row['birth_month']) else '',
                     'birth_year': row['birth_year'] if pd.notna(row['birth_year']) else '',
-                    'exclusion_reason': '; '.join(reasons)  # Join multiple reasons
+                    'exclusion_flags': encode_reasons(reasons)  # One bit per reason
                 }
                 excluded_rows.append(excluded_row)
         
         # Create DataFrames
-        included_df = pd.DataFrame(included_rows)
-        excluded_df = pd.DataFrame(excluded_rows)
+        return pd.DataFrame(included_rows), pd.DataFrame(excluded_rows)
+    
+    def _clean_distinct(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Validate a frame with the compiled rule set, checking each column's
+        distinct values once.
         
-        # Update counts
-        self.included_count = len(included_df)
-        self.excluded_count = len(excluded_df)
+        Args:
+            df: Input DataFrame with row_id added
+            
+        Returns:
+            Tuple of (included_df, excluded_df); with the default rules this
+            is identical to _clean_rows
+        """
+        # Fields are validated in priority order so flags decode in the same order
+        flags = np.zeros(len(df), dtype=self.rule_set.flags_dtype)
+        cleaned = {}
+        for field in self.rule_set.fields:
+            field_flags, cleaned[field] = self.validate_distinct(df[field], field)
+            flags |= field_flags
+        
+        # Checks spanning several fields (e.g. calendar-aware days)
+        flags |= self.rule_set.evaluate_rows(cleaned, flags)
+        
+        is_valid = flags == 0
+        
+        included_df = pd.DataFrame({
+            'row_id': df['row_id'].to_numpy()[is_valid],
+            'name': cleaned['name'][is_valid],
+            'birth_day': cleaned['birth_day'][is_valid].astype('int64'),
+            'birth_month': cleaned['birth_month'][is_valid].astype('int64'),
+            'birth_year': cleaned['birth_year'][is_valid].astype('int64')
+        }) if is_valid.any() else pd.DataFrame()
+        
+        is_excluded = ~is_valid
+        excluded_columns = {'row_id': df['row_id'].to_numpy()[is_excluded]}
+        for field in self.rule_set.fields:
+            raw = df[field].to_numpy(dtype=object)[is_excluded]
+            excluded_columns[field] = np.where(pd.isna(raw), '', raw)
+        excluded_columns['exclusion_flags'] = flags[is_excluded].astype('int64')
+        excluded_df = pd.DataFrame(excluded_columns).infer_objects() if is_excluded.any() else pd.DataFrame()
+        excluded_df.attrs['exclusion_reasons'] = list(self.rule_set.reasons)
         
         return included_df, excluded_df
     
+    def validate_distinct(self, values: pd.Series, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Validate a column by factorizing it and checking each distinct value once.
+        Results are memoized in the shared bounded validation cache, so
+        repeated values across chunks and datasets are not re-validated.
+        
+        Args:
+            values: Column to validate
+            field: Field name in the rule set
+            
+        Returns:
+            Tuple of (reason_flags, cleaned_values) arrays aligned with values
+        """
+        codes, uniques = pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=True)
+        
+        cache = DataCleaner.get_validation_cache()
+        distinct_values = list(uniques) + [None]  # last slot: missing values (code -1)
+        distinct_flags = np.zeros(len(distinct_values), dtype=self.rule_set.flags_dtype)
+        distinct_cleaned = np.empty(len(distinct_values), dtype=object)
+        
+        # Look up memoized results, collecting the values not seen before
+        keys = [(self.rule_set.digest, field, type(value).__name__, value) for value in distinct_values]
+        misses = []
+        for i, key in enumerate(keys):
+            result = cache.get(key)
+            if result is None:
+                misses.append(i)
+            else:
+                distinct_flags[i], distinct_cleaned[i] = result
+        
+        # Validate the new distinct values in one vectorized pass
+        if misses:
+            miss_values = np.empty(len(misses), dtype=object)
+            miss_values[:] = [distinct_values[i] for i in misses]
+            miss_flags, miss_cleaned = self.rule_set.evaluate_values(field, miss_values)
+            distinct_flags[misses] = miss_flags
+            distinct_cleaned[misses] = miss_cleaned
+            for i, flag, cleaned_value in zip(misses, miss_flags, miss_cleaned):
+                cache.put(keys[i], (int(flag), cleaned_value))
+        
+        return distinct_flags[codes], distinct_cleaned[codes]
+    
+    @classmethod
+    def get_validation_cache(cls) -> 'ValidationCache':
+        """Get the process-wide validation cache, creating it on first use"""
+        if cls.validation_cache is None:
+            cls.validation_cache = ValidationCache()
+        return cls.validation_cache
+    
+    def reclean(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame,
+                previous_rules: Dict = None) -> Dict:
+        """
+        Re-apply validation after a rule change without re-reading the data.
+        
+        Only the fields whose rules changed (plus the inputs of any affected
+        row checks) are re-validated, using the stored values: cleaned values
+        for included rows and raw values for excluded rows. Reason bits of the
+        other fields are carried over from exclusion_flags. Rows whose outcome
+        changed move between the frames; moved rows are appended at the end.
+        
+        Args:
+            included_df: Included rows cleaned under previous_rules (plain or compact)
+            excluded_df: Excluded rows cleaned under previous_rules (plain or compact)
+            previous_rules: Rule configuration the frames were cleaned with
+                (DEFAULT_RULES when None); self.rule_set holds the new rules
+            
+        Returns:
+            Dictionary with the new 'included_df' and 'excluded_df' (compact),
+            the rows that left each frame as stored before ('removed_included',
+            'removed_excluded'), the rows that joined each frame
+            ('added_included', 'added_excluded') and 'changed_reasons', the
+            reasons whose counts must be recounted over the whole excluded frame
+        """
+        if self.validation_mode != 'distinct':
+            raise ValueError("Re-cleaning requires the distinct validation mode")
+        previous = compile_rules(previous_rules)
+        current = self.rule_set
+        if previous.fields != current.fields:
+            raise ValueError("Rule changes that add or remove fields need a full re-clean")
+        
+        changed = {field for field in current.fields
+                   if previous.field_rules[field] != current.field_rules[field]}
+        row_check_fields = set()
+        for check in previous.row_checks + current.row_checks:
+            row_check_fields.update((check['field'], check.get('month_field', 'birth_month'),
+                                     check.get('year_field', 'birth_year')))
+        if previous.row_checks != current.row_checks or changed & row_check_fields:
+            changed |= row_check_fields
+        changed = [field for field in current.fields if field in changed]
+        
+        included_count = len(included_df)
+        excluded_values = _stored_values(excluded_df, current.fields)
+        values = {
+            field: np.concatenate([_stored_values(included_df, [field])[field], excluded_values[field]])
+            for field in current.fields
+        }
+        
+        # Carry over the bits of unchanged fields, renumbered to the new catalog
+        old_flags = np.zeros(included_count + len(excluded_df), dtype='uint64')
+        if not excluded_df.empty:
+            old_flags[included_count:] = excluded_df['exclusion_flags'].to_numpy(dtype='uint64')
+        cleared_bits = 0
+        for field in changed:
+            cleared_bits |= previous._field_bits(field)
+        flags = np.zeros(len(old_flags), dtype=current.flags_dtype)
+        for i, reason in enumerate(previous.reasons):
+            if (1 << i) & cleared_bits or reason not in current.reason_bits:
+                continue
+            has_reason = (old_flags >> np.uint64(i)) & np.uint64(1) == 1
+            flags[has_reason] |= current.reason_bits[reason]
+        
+        cleaned = {}
+        for field in changed:
+            field_flags, cleaned[field] = self.validate_distinct(pd.Series(values[field], dtype=object), field)
+            flags |= field_flags
+        if current.row_checks and row_check_fields & set(changed):
+            flags |= current.evaluate_rows(cleaned, flags)
+        
+        is_valid = flags == 0
+        moved_out = np.flatnonzero(~is_valid[:included_count])
+        moved_in = np.flatnonzero(is_valid[included_count:])
+        keep_included = np.ones(included_count, dtype=bool)
+        keep_included[moved_out] = False
+        keep_excluded = np.ones(len(excluded_df), dtype=bool)
+        keep_excluded[moved_in] = False
+        
+        # Rows joining the included frame need cleaned values for every field
+        added_included = pd.DataFrame()
+        if len(moved_in):
+            added_included = pd.DataFrame({'row_id': excluded_df['row_id'].iloc[moved_in].reset_index(drop=True)})
+            for field in current.fields:
+                if field in cleaned:
+                    field_values = cleaned[field][included_count + moved_in]
+                else:
+                    field_values = self.validate_distinct(
+                        pd.Series(excluded_values[field][moved_in], dtype=object), field)[1]
+                added_included[field] = field_values if field == 'name' else field_values.astype('int64')
+        
+        added_excluded = pd.DataFrame()
+        if len(moved_out):
+            added_excluded = pd.DataFrame({'row_id': included_df['row_id'].iloc[moved_out].reset_index(drop=True)})
+            for field in current.fields:
+                added_excluded[field] = values[field][moved_out]
+            added_excluded['exclusion_flags'] = flags[moved_out].astype('int64')
+        added_excluded.attrs['exclusion_reasons'] = list(current.reasons)
+        added_included, added_excluded = self.compact_frames(added_included, added_excluded)
+        
+        kept_excluded = excluded_df[keep_excluded].reset_index(drop=True)
+        if not kept_excluded.empty:
+            kept_excluded['exclusion_flags'] = flags[included_count:][keep_excluded]
+        kept_excluded.attrs['exclusion_reasons'] = list(current.reasons)
+        
+        changed_reasons = [reason for reason in current.reasons
+                           if any(current.reason_bits[reason] & current._field_bits(field) for field in changed)]
+        return {
+            'included_df': append_frames(included_df[keep_included].reset_index(drop=True), added_included),
+            'excluded_df': append_frames(kept_excluded, added_excluded),
+            'removed_included': included_df.iloc[moved_out],
+            'removed_excluded': excluded_df.iloc[moved_in],
+            'added_included': added_included,
+            'added_excluded': added_excluded,
+            'changed_reasons': changed_reasons
+        }
+    
+    def compact_frames(self, included_df: pd.DataFrame,
+                       excluded_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Convert cleaned frames to a compact storage schema.
+        
+        Included rows get categorical names, the smallest integer dtype that
+        holds each day/month/year column (uint8/uint16 for usual dates) and
+        16-byte binary row ids. Excluded rows keep their raw values but use
+        nullable integer (or categorical) columns plus a missing_mask column
+        instead of '' placeholders, alongside the uint16 exclusion_flags.
+        Memory before and after is stored in self.memory_stats.
+        
+        Args:
+            included_df: DataFrame of included rows from clean_data
+            excluded_df: DataFrame of excluded rows from clean_data
+            
+        Returns:
+            Tuple of (compact_included_df, compact_excluded_df)
+        """
+        bytes_before = {
+            'included': frame_memory_bytes(included_df),
+            'excluded': frame_memory_bytes(excluded_df)
+        }
+        
+        compact_included = included_df.copy()
+        if not compact_included.empty:
+            compact_included['row_id'] = row_ids_to_binary(compact_included['row_id'])
+            compact_included['name'] = compact_included['name'].astype('category')
+            for field in ('birth_day', 'birth_month', 'birth_year'):
+                compact_included[field] = compact_int(compact_included[field])
+        
+        compact_excluded = excluded_df.copy()
+        if not compact_excluded.empty:
+            missing_mask = np.zeros(len(compact_excluded), dtype='uint8')
+            for field, bit in MISSING_FIELD_BITS.items():
+                column = compact_excluded[field]
+                is_missing = (column.isna() | (column.astype(str) == '')).to_numpy()
+                missing_mask[is_missing] |= bit
+                column = column.mask(is_missing)
+                if field == 'name':
+                    compact_excluded[field] = column.astype('category')
+                else:
+                    compact_excluded[field] = compact_raw_numeric(column)
+            compact_excluded['row_id'] = row_ids_to_binary(compact_excluded['row_id'])
+            compact_excluded['exclusion_flags'] = compact_excluded['exclusion_flags'].astype(self.rule_set.flags_dtype)
+            compact_excluded['missing_mask'] = missing_mask
+        
+        bytes_after = {
+            'included': frame_memory_bytes(compact_included),
+            'excluded': frame_memory_bytes(compact_excluded)
+        }
+        total_before = sum(bytes_before.values())
+        total_after = sum(bytes_after.values())
+        self.memory_stats = {
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_saved': total_before - total_after,
+            'reduction_factor': round(total_before / total_after, 2) if total_after > 0 else 0
+        }
+        
+        return compact_included, compact_excluded
+    
     def calculate_top_80_names(self, included_df: pd.DataFrame) -> Dict:
         """
         Calculate the top 80% most common names by frequency.
@@ -297,6 +723,51 @@ class DataCleaner:
         Returns:
             Dictionary with summary statistics
         """
+        summary = {}
+        for section in SUMMARY_SECTIONS:
+            with stage(f'summary:{section}'):
+                summary[section] = self.summary_section(section, included_df, excluded_df)
+        return summary
+    
+    def summary_section(self, section: str, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        """
+        Calculate one section of the summary statistics.
+        
+        Args:
+            section: One of SUMMARY_SECTIONS
+            included_df: DataFrame of included rows
+            excluded_df: DataFrame of excluded rows
+            
+        Returns:
+            The section's value as it appears in get_summary_stats
+        """
+        if section == 'dataset_sizes':
+            return self.calculate_dataset_sizes(included_df, excluded_df)
+        if section == 'uniqueness':
+            return self.calculate_uniqueness(included_df)
+        if section == 'duplicates':
+            # Find duplicates (at least 2 of 4 fields match)
+            with stage('duplicates', rows=len(included_df)):
+                if self.duplicates_path:
+                    return self.find_duplicate_records_external(included_df, self.duplicates_path)
+                return self.find_duplicate_records(included_df)
+        if section == 'top_80_names':
+            return self.calculate_top_80_names(included_df)
+        if section == 'exclusion_reasons':
+            return self.count_exclusion_reasons(excluded_df)
+        raise ValueError(f"Unknown summary section: {section}")
+    
+    def calculate_dataset_sizes(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame) -> Dict:
+        """
+        Calculate row counts and included/excluded percentages.
+        
+        Args:
+            included_df: DataFrame of included rows
+            excluded_df: DataFrame of excluded rows
+            
+        Returns:
+            Dictionary with dataset sizes
+        """
         total_count = self.original_count
         included_count = len(included_df)
         excluded_count = len(excluded_df)
@@ -305,7 +776,24 @@ class DataCleaner:
         pct_included = (included_count / total_count * 100) if total_count > 0 else 0
         pct_excluded = (excluded_count / total_count * 100) if total_count > 0 else 0
         
-        # Uniqueness metrics (only for included data)
+        return {
+            'original_row_count': total_count,
+            'included_row_count': included_count,
+            'excluded_row_count': excluded_count,
+            'pct_included_vs_original': round(pct_included, 2),
+            'pct_excluded_vs_original': round(pct_excluded, 2)
+        }
+    
+    def calculate_uniqueness(self, included_df: pd.DataFrame) -> Dict:
+        """
+        Calculate uniqueness metrics (only for included data).
+        
+        Args:
+            included_df: DataFrame of included rows
+            
+        Returns:
+            Dictionary with uniqueness metrics
+        """
         unique_names = included_df['name'].nunique() if not included_df.empty else 0
         
         # Unique birthday combinations
@@ -334,32 +822,36 @@ class DataCleaner:
             unique_name_month = 0
             unique_name_day = 0
         
-        # Find duplicates (at least 2 of 4 fields match)
-        duplicate_records = self.find_duplicate_records(included_df)
-        
-        # Calculate top 80% names
-        top_80_data = self.calculate_top_80_names(included_df)
-        
-        summary = {
-            'dataset_sizes': {
-                'original_row_count': total_count,
-                'included_row_count': included_count,
-                'excluded_row_count': excluded_count,
-                'pct_included_vs_original': round(pct_included, 2),
-                'pct_excluded_vs_original': round(pct_excluded, 2)
-            },
-            'uniqueness': {
-                'total_unique_names': unique_names,
-                'unique_birthday_combinations': unique_birthdays,
-                'unique_name_year_combinations': unique_name_year,
-                'unique_name_month_combinations': unique_name_month,
-                'unique_name_day_combinations': unique_name_day
-            },
-            'duplicates': duplicate_records,
-            'top_80_names': top_80_data
+        return {
+            'total_unique_names': unique_names,
+            'unique_birthday_combinations': unique_birthdays,
+            'unique_name_year_combinations': unique_name_year,
+            'unique_name_month_combinations': unique_name_month,
+            'unique_name_day_combinations': unique_name_day
         }
+    
+    def count_exclusion_reasons(self, excluded_df: pd.DataFrame) -> List[Dict]:
+        """
+        Count excluded rows per exclusion reason.
+        A row excluded for several reasons is counted under each of them.
         
-        return summary
+        Args:
+            excluded_df: DataFrame of excluded rows
+            
+        Returns:
+            List of {'reason', 'count'} in catalog order, reasons with no rows omitted
+        """
+        if excluded_df.empty:
+            return []
+        
+        flags = excluded_df['exclusion_flags']
+        reasons = exclusion_catalog(excluded_df)
+        reason_counts = []
+        for reason in reasons:
+            count = int(reason_mask(flags, reason, reasons).sum())
+            if count > 0:
+                reason_counts.append({'reason': reason, 'count': count})
+        return reason_counts
     
     def find_duplicate_records(self, df: pd.DataFrame) -> Dict:
         """
@@ -381,17 +873,11 @@ class DataCleaner:
         duplicate_groups = []
         processed_rows = set()
         
+        # Report row ids as text so groups can be serialized and linked
+        df = df.assign(row_id=row_ids_to_text(df['row_id']))
+        
         # Check all possible 2-field combinations
-        field_combinations = [
-            ('name', 'birth_day'),
-            ('name', 'birth_month'),
-            ('name', 'birth_year'),
-            ('birth_day', 'birth_month'),
-            ('birth_day', 'birth_year'),
-            ('birth_month', 'birth_year')
-        ]
-        
-        for fields in field_combinations:
+        for fields in DUPLICATE_FIELD_PAIRS:
             grouped = df.groupby(list(fields))
             for group_key, group_df in grouped:
                 if len(group_df) > 1:
@@ -421,23 +907,458 @@ class DataCleaner:
             'total_duplicate_records': len(all_duplicate_row_ids),
             'duplicate_groups': duplicate_groups
         }
+    
+    def find_duplicate_records_external(self, df: pd.DataFrame, groups_path: str,
+                                        chunksize: int = 100000) -> Dict:
+        """
+        Find duplicate records with bounded memory, spilling sort runs to disk.
+        Groups are streamed to groups_path; see duplicates.find_duplicate_records_external.
+        
+        Args:
+            df: DataFrame to analyze
+            groups_path: File the duplicate groups are written to (JSON lines)
+            chunksize: Rows converted per chunk
+            
+        Returns:
+            Dictionary with duplicate analysis (leading groups only, plus groups_file)
+        """
+        chunks = (
+            df.iloc[start:start + chunksize].assign(row_id=lambda chunk: row_ids_to_text(chunk['row_id']))
+            for start in range(0, len(df), chunksize)
+        )
+        return find_duplicate_records_external(chunks, groups_path, memory_budget=self.memory_budget)
+    
+    def find_fuzzy_duplicate_records(self, df: pd.DataFrame, threshold: float = DEFAULT_FUZZY_THRESHOLD,
+                                     blocking: str = 'soundex') -> Dict:
+        """
+        Find near-duplicates: same birth date, similar but not identical names.
+        Candidates are blocked, so only a near-linear number of pairs is scored;
+        see fuzzy.find_fuzzy_duplicates.
+        
+        Args:
+            df: DataFrame to analyze
+            threshold: Minimum name similarity (1 - edit distance / longer length)
+            blocking: Name key used with the birth date to block candidates, 'soundex' or 'ngram'
+            
+        Returns:
+            Dictionary with fuzzy duplicate analysis, including the number of candidate pairs compared
+        """
+        with stage('fuzzy_duplicates', rows=len(df)):
+            result = find_fuzzy_duplicates(df, threshold=threshold, blocking=blocking)
+        for group in result['fuzzy_groups']:
+            group['row_ids'] = row_ids_to_text(df['row_id'].iloc[group.pop('rows')]).tolist()
+        return result
 
 
-def load_and_clean_data(csv_filepath: str) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+def frame_memory_bytes(df: pd.DataFrame) -> int:
+    """
+    Measure the in-memory size of a DataFrame including object payloads.
+    
+    Args:
+        df: DataFrame to measure
+        
+    Returns:
+        Size in bytes
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Compute a content fingerprint of a DataFrame.
+    
+    Args:
+        df: DataFrame to fingerprint
+        
+    Returns:
+        Hex digest identifying the column names and cell values
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def generate_row_ids(count: int, fingerprint: str = None) -> np.ndarray:
+    """
+    Generate a batch of version 4 UUIDs as 16-byte values.
+    
+    Args:
+        count: Number of ids to generate
+        fingerprint: When given, ids are derived from the fingerprint and the
+            row position (counter-based Philox stream) instead of os.urandom
+        
+    Returns:
+        Array of dtype S16
+    """
+    if fingerprint is None:
+        raw = os.urandom(16 * count)
+    else:
+        key = int.from_bytes(hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=16).digest(), 'little')
+        raw = np.random.Generator(np.random.Philox(key=key)).bytes(16 * count)
+    
+    ids = np.frombuffer(raw, dtype=np.uint8).reshape(count, 16).copy()
+    # Set the UUID version (4) and RFC 4122 variant bits
+    ids[:, 6] = (ids[:, 6] & 0x0F) | 0x40
+    ids[:, 8] = (ids[:, 8] & 0x3F) | 0x80
+    return ids.view('S16').ravel()
+
+
+def row_id_bytes(row_ids: pd.Series) -> np.ndarray:
+    """
+    Extract row ids as a contiguous S16 array whatever their storage.
+    
+    Args:
+        row_ids: Series of binary row ids (arrow or bytes objects) or UUID strings
+        
+    Returns:
+        Array of dtype S16
+    """
+    if len(row_ids) == 0:
+        return np.empty(0, dtype='S16')
+    
+    if isinstance(row_ids.dtype, pd.ArrowDtype):
+        array = pa.array(row_ids.array)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        buffer = array.buffers()[1]
+        raw = np.frombuffer(buffer, dtype=np.uint8)[array.offset * 16:(array.offset + len(array)) * 16]
+        return raw.view('S16')
+    
+    values = row_ids.to_numpy(dtype=object)
+    if isinstance(values[0], str):
+        return np.array([uuid.UUID(row_id).bytes for row_id in values], dtype='S16')
+    return np.asarray(values, dtype='S16')
+
+
+def row_ids_to_binary(row_ids: pd.Series) -> pd.Series:
+    """
+    Pack row ids into a fixed-width 16-byte binary column.
+    
+    Args:
+        row_ids: Series of row ids in any supported representation
+        
+    Returns:
+        Series of 16-byte values (bytes objects if pyarrow is unavailable)
+    """
+    if isinstance(row_ids.dtype, pd.ArrowDtype):
+        return row_ids
+    
+    raw = row_id_bytes(row_ids)
+    if pa is None:
+        return pd.Series([raw[i:i + 1].tobytes() for i in range(len(raw))],
+                         index=row_ids.index, name=row_ids.name, dtype=object)
+    
+    array = pa.FixedSizeBinaryArray.from_buffers(pa.binary(16), len(raw), [None, pa.py_buffer(raw.tobytes())])
+    return pd.Series(pd.arrays.ArrowExtensionArray(array), index=row_ids.index, name=row_ids.name)
+
+
+def row_ids_to_text(row_ids: pd.Series) -> pd.Series:
+    """
+    Render row ids as canonical UUID strings.
+    
+    Args:
+        row_ids: Series of row ids in any supported representation
+        
+    Returns:
+        Series of UUID strings
+    """
+    if len(row_ids) == 0 or isinstance(row_ids.iloc[0], str):
+        return row_ids
+    
+    raw = row_id_bytes(row_ids)
+    hex_chars = np.frombuffer(binascii.hexlify(raw.tobytes()), dtype='S1').reshape(len(raw), 32)
+    text = np.full((len(raw), 36), b'-', dtype='S1')
+    text[:, UUID_HEX_POSITIONS] = hex_chars
+    return pd.Series(text.view('S36').ravel().astype(str).astype(object),
+                     index=row_ids.index, name=row_ids.name)
+
+
+def _stored_values(df: pd.DataFrame, fields: List[str]) -> Dict[str, np.ndarray]:
+    """Values of a stored frame as object arrays, missing values as None"""
+    values = {}
+    for field in fields:
+        if field not in df.columns:
+            values[field] = np.empty(len(df), dtype=object)
+            continue
+        column = df[field].to_numpy(dtype=object, copy=True)
+        missing = pd.isna(column)
+        if 'exclusion_flags' in df.columns and 'missing_mask' not in df.columns:
+            # Plain excluded frames hold '' for missing values
+            missing |= column == ''
+        column[missing] = None
+        values[field] = column
+    return values
+
+
+def compact_int(values: pd.Series) -> pd.Series:
+    """
+    Store validated integers in the smallest dtype that holds their range.
+    Rules only bound some fields (no maximum year by default), so the dtype
+    comes from the values rather than from the field.
+    
+    Args:
+        values: Series of integers without missing entries
+        
+    Returns:
+        Series cast to the smallest unsigned (or, with negatives, signed) dtype;
+        never uint64, which pandas widens to float64 when mixed with signed columns
+    """
+    low, high = int(values.min()), int(values.max())
+    dtypes = ('uint8', 'uint16', 'uint32') if low >= 0 else ('int8', 'int16', 'int32')
+    for dtype in dtypes:
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return values.astype(dtype)
+    return values.astype('int64')
+
+
+def compact_raw_numeric(values: pd.Series) -> pd.Series:
+    """
+    Store raw excluded values in the smallest nullable integer dtype.
+    Columns containing non-integer junk fall back to a categorical of the
+    original text so nothing is lost for display.
+    
+    Args:
+        values: Series of raw values with missing entries as NA
+        
+    Returns:
+        Compact Series
+    """
+    present = values.dropna()
+    numeric = pd.to_numeric(present, errors='coerce')
+    if present.empty or numeric.isna().any() or (numeric != numeric.round()).any():
+        return values.astype(str).mask(values.isna()).astype('category')
+    
+    low, high = numeric.min(), numeric.max()
+    for dtype in ('int8', 'int16', 'int32', 'int64'):
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return pd.to_numeric(values, errors='coerce').astype(dtype.capitalize())
+    return values.astype(str).mask(values.isna()).astype('category')
+
+
+def encode_reasons(reasons: List[str]) -> int:
+    """
+    Encode exclusion reasons as a bitmask.
+    
+    Args:
+        reasons: Reasons from the validators (must be in EXCLUSION_REASONS)
+        
+    Returns:
+        Integer with one bit set per reason
+    """
+    flags = 0
+    for reason in reasons:
+        flags |= REASON_BITS[reason]
+    return flags
+
+
+def exclusion_catalog(excluded_df: pd.DataFrame) -> List[str]:
+    """
+    Get the reason catalog an excluded frame's exclusion_flags refer to.
+    
+    Args:
+        excluded_df: DataFrame of excluded rows
+        
+    Returns:
+        List of reasons, bit i meaning reasons[i]
+    """
+    return excluded_df.attrs.get('exclusion_reasons', EXCLUSION_REASONS)
+
+
+def decode_reasons(flags: pd.Series, reasons: List[str] = EXCLUSION_REASONS) -> pd.Series:
+    """
+    Render exclusion_flags as '; '-joined reason text.
+    Only the distinct flag values are decoded, then mapped back to the rows.
+    
+    Args:
+        flags: Series of exclusion bitmasks
+        reasons: Reason catalog the bits refer to
+        
+    Returns:
+        Series of reason strings in priority order
+    """
+    texts = {}
+    for value in pd.unique(flags):
+        texts[value] = '; '.join(reason for i, reason in enumerate(reasons) if int(value) >> i & 1)
+    return flags.map(texts).astype(object)
+
+
+def reason_mask(flags: pd.Series, reason: str, reasons: List[str] = EXCLUSION_REASONS) -> np.ndarray:
+    """
+    Select rows excluded for a given reason.
+    
+    Args:
+        flags: Series of exclusion bitmasks
+        reason: Reason from the catalog
+        reasons: Reason catalog the bits refer to
+        
+    Returns:
+        Boolean array, True where the reason's bit is set
+    """
+    return (flags.to_numpy().astype('uint64') >> np.uint64(reasons.index(reason)) & np.uint64(1)) != 0
+
+
+def select_included(df: pd.DataFrame, filters: Dict = None, sort_by: str = '',
+                    sort_order: str = 'asc') -> np.ndarray:
+    """
+    Filter and sort included rows in memory, matching DatasetStore.query_included.
+    
+    Args:
+        df: Included frame (plain or compact)
+        filters: Optional {'name': substring (case-insensitive), 'birth_day' /
+            'birth_month' / 'birth_year': int}
+        sort_by: Column to sort by, or '' for frame order (ties keep frame order too)
+        sort_order: 'asc' or 'desc'
+    
+    Returns:
+        Row positions in the frame, in display order
+    """
+    if df is None or df.empty:
+        return np.empty(0, dtype='int64')
+    
+    keep = np.ones(len(df), dtype=bool)
+    for field, value in (filters or {}).items():
+        values = df[field]
+        if field == 'name':
+            needle = str(value).lower()
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Match each distinct name once, then map through the codes
+                matches = values.cat.categories.astype(str).str.lower().str.contains(needle, regex=False)
+                codes = values.cat.codes.to_numpy()
+                keep &= (codes >= 0) & np.append(np.asarray(matches, dtype=bool), False)[codes]
+            else:
+                keep &= values.astype(str).str.lower().str.contains(needle, regex=False).to_numpy(dtype=bool)
+        else:
+            keep &= (values == value).fillna(False).to_numpy(dtype=bool)
+    positions = np.flatnonzero(keep)
+    
+    if sort_by and sort_by in df.columns and len(positions):
+        key = sort_key(df[sort_by])[positions]
+        order = np.lexsort((positions, -key if sort_order == 'desc' else key))
+        positions = positions[order]
+    return positions
+
+
+def select_excluded(df: pd.DataFrame, reason: str = '') -> np.ndarray:
+    """
+    Positions of excluded rows to display, matching DatasetStore.query_excluded.
+    
+    Args:
+        df: Excluded frame (plain or compact)
+        reason: Only rows excluded for this reason (ignored when not in the frame's catalog)
+    
+    Returns:
+        Row positions in the frame, in frame order
+    """
+    if df is None or df.empty:
+        return np.empty(0, dtype='int64')
+    reasons = exclusion_catalog(df)
+    if reason and reason in reasons:
+        return np.flatnonzero(reason_mask(df['exclusion_flags'], reason, reasons))
+    return np.arange(len(df))
+
+
+def sort_key(values: pd.Series) -> np.ndarray:
+    """Integer codes that sort like the column's values"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_ranks = np.argsort(np.argsort(values.cat.categories.to_numpy(dtype=object), kind='stable'))
+        return category_ranks[values.cat.codes.to_numpy()]
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.to_numpy(dtype='int64')
+    return pd.factorize(values, sort=True)[0]
+
+
+def to_display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Expand a compact frame back to the plain layout used for display and export.
+    
+    Args:
+        df: Frame produced by DataCleaner.clean_data or DataCleaner.compact_frames
+        
+    Returns:
+        DataFrame with UUID string row ids, '' for missing excluded values
+        and exclusion_reason text rendered from exclusion_flags
+    """
+    if df is None or df.empty:
+        return df
+    
+    display_df = df.copy()
+    display_df['row_id'] = row_ids_to_text(display_df['row_id'])
+    
+    if 'exclusion_flags' in display_df.columns:
+        display_df.insert(display_df.columns.get_loc('exclusion_flags'), 'exclusion_reason',
+                          decode_reasons(display_df['exclusion_flags'], exclusion_catalog(df)))
+        display_df = display_df.drop(columns=['exclusion_flags'])
+    
+    if 'missing_mask' in display_df.columns:
+        for field in MISSING_FIELD_BITS:
+            column = display_df[field].astype(object)
+            display_df[field] = column.where(column.notna(), '')
+        display_df = display_df.drop(columns=['missing_mask'])
+    elif isinstance(display_df['name'].dtype, pd.CategoricalDtype):
+        display_df['name'] = display_df['name'].astype(object)
+        for field in ('birth_day', 'birth_month', 'birth_year'):
+            display_df[field] = display_df[field].astype('int64')
+    
+    return display_df
+
+
+def append_frames(df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Append newly cleaned rows to a stored frame, keeping the compact schema.
+    Categorical columns are merged with union_categoricals instead of falling
+    back to object, and the exclusion reason catalog is carried over.
+    
+    Args:
+        df: Existing frame (plain or compact)
+        new_df: Frame of new rows in the same layout
+    
+    Returns:
+        Combined frame with a fresh RangeIndex
+    """
+    if df is None or df.empty:
+        combined = new_df.reset_index(drop=True)
+    elif new_df is None or new_df.empty:
+        combined = df
+    else:
+        columns = {}
+        for column in df.columns:
+            old, new = df[column], new_df[column]
+            if isinstance(old.dtype, pd.CategoricalDtype) or isinstance(new.dtype, pd.CategoricalDtype):
+                if old.dtype != new.dtype:
+                    # e.g. raw excluded values stored as Int8 in one batch, text in another
+                    old = old if isinstance(old.dtype, pd.CategoricalDtype) else old.astype(str).mask(old.isna()).astype('category')
+                    new = new if isinstance(new.dtype, pd.CategoricalDtype) else new.astype(str).mask(new.isna()).astype('category')
+                columns[column] = pd.Series(pd.api.types.union_categoricals([old, new]))
+            else:
+                columns[column] = pd.concat([old, new], ignore_index=True)
+        combined = pd.DataFrame(columns)
+    
+    combined.attrs.update(df.attrs if df is not None else {})
+    return combined
+
+
+def load_and_clean_data(csv_filepath: str, parser: str = 'pandas', duplicates_path: str = None,
+                        memory_budget: int = DEFAULT_MEMORY_BUDGET) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
     """
     Main function to load and clean data from CSV file.
     
     Args:
         csv_filepath: Path to the CSV file
+        parser: CSV parser backend, 'pandas' or 'arrow' (multi-threaded)
+        duplicates_path: Find duplicates out of core, writing groups to this file
+        memory_budget: Memory budget in bytes for out-of-core duplicate detection
         
     Returns:
         Tuple of (included_df, excluded_df, summary_stats)
     """
-    # Load the CSV
-    df = pd.read_csv(csv_filepath)
+    # Load the CSV and map upload column names (FirstName, ...) if present
+    df = read_csv_file(csv_filepath, parser=parser).rename(columns=COLUMN_MAPPING)
     
     # Initialize cleaner
-    cleaner = DataCleaner()
+    cleaner = DataCleaner(duplicates_path=duplicates_path, memory_budget=memory_budget)
     
     # Clean the data
     included_df, excluded_df = cleaner.clean_data(df)
@@ -449,7 +1370,7 @@ def load_and_clean_data(csv_filepath: str) -> Tuple[pd.DataFrame, pd.DataFrame,
 
 
 def save_reports(included_df: pd.DataFrame, excluded_df: pd.DataFrame, 
-                summary_stats: Dict, output_dir: str = '.'):
+                summary_stats: Dict, output_dir: str = '.', verbose: bool = True):
     """
     Save the cleaning reports to files.
     
@@ -458,6 +1379,7 @@ def save_reports(included_df: pd.DataFrame, excluded_df: pd.DataFrame,
         excluded_df: DataFrame of excluded rows
         summary_stats: Dictionary of summary statistics
         output_dir: Directory to save reports (default: current directory)
+        verbose: Print the saved paths and a summary to the console
     """
     import os
     
@@ -466,18 +1388,22 @@ def save_reports(included_df: pd.DataFrame, excluded_df: pd.DataFrame,
     
     # Save included data
     included_path = os.path.join(output_dir, 'data_included.csv')
-    included_df.to_csv(included_path, index=False)
-    print(f"✓ Saved included data to: {included_path}")
+    to_display_frame(included_df).to_csv(included_path, index=False)
+    if verbose:
+        print(f"✓ Saved included data to: {included_path}")
     
     # Save excluded data
     excluded_path = os.path.join(output_dir, 'data_excluded.csv')
-    excluded_df.to_csv(excluded_path, index=False)
-    print(f"✓ Saved excluded data to: {excluded_path}")
+    to_display_frame(excluded_df).to_csv(excluded_path, index=False)
+    if verbose:
+        print(f"✓ Saved excluded data to: {excluded_path}")
     
     # Save summary statistics
     summary_path = os.path.join(output_dir, 'summary_stats.json')
     with open(summary_path, 'w') as f:
         json.dump(summary_stats, f, indent=2)
+    if not verbose:
+        return
     print(f"✓ Saved summary statistics to: {summary_path}")
     
     # Print summary to console
@@ -498,6 +1424,10 @@ def save_reports(included_df: pd.DataFrame, excluded_df: pd.DataFrame,
     print("\nDuplicate Analysis:")
     print(f"  Duplicate groups: {summary_stats['duplicates']['total_duplicate_groups']}")
     print(f"  Records involved in duplicates: {summary_stats['duplicates']['total_duplicate_records']}")
+    if summary_stats.get('exclusion_reasons'):
+        print("\nExclusion Reasons:")
+        for reason_info in summary_stats['exclusion_reasons']:
+            print(f"  {reason_info['reason']}: {reason_info['count']}")
     print("\nTop 80% Names:")
     print(f"  Names covering 80%: {summary_stats['top_80_names']['top_names_count']}")
     print(f"  Actual coverage: {summary_stats['top_80_names']['coverage_pct']}%")
@@ -507,23 +1437,59 @@ def save_reports(included_df: pd.DataFrame, excluded_df: pd.DataFrame,
 # Example usage
 if __name__ == "__main__":
     import sys
+    import argparse
     
-    # Check if CSV file path is provided
-    if len(sys.argv) < 2:
-        print("Usage: python datacleaning.py <csv_filepath>")
-        print("Example: python datacleaning.py january_data.csv")
-        sys.exit(1)
+    arg_parser = argparse.ArgumentParser(
+        description="Clean a CSV of names and birth dates into ./reports",
+        epilog="Example: python datacleaning.py january_data.csv"
+    )
+    arg_parser.add_argument('csv_filepath', help="CSV file to clean")
+    arg_parser.add_argument('--parser', choices=['pandas', 'arrow'], default='pandas',
+                            help="CSV parser backend (arrow is multi-threaded)")
+    arg_parser.add_argument('--external-duplicates', action='store_true',
+                            help="Find duplicates out of core into reports/duplicate_groups.jsonl")
+    arg_parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                            help="Memory budget for out-of-core duplicate detection")
+    arg_parser.add_argument('--fuzzy-threshold', type=float, default=None,
+                            help="Also find near-duplicate names (e.g. 0.85) into reports/fuzzy_duplicates.json")
+    arg_parser.add_argument('--fuzzy-blocking', choices=BLOCKING_METHODS, default='soundex',
+                            help="Name key used with the birth date to block fuzzy candidates")
+    arg_parser.add_argument('--profile', choices=PROFILE_KINDS, default=None,
+                            help="Profile the run; the report is saved under reports/profiles/<run id>")
+    args = arg_parser.parse_args()
     
-    csv_file = sys.argv[1]
+    csv_file = args.csv_filepath
     
     print(f"Loading data from: {csv_file}")
     
     try:
-        # Load and clean data
-        included_df, excluded_df, summary_stats = load_and_clean_data(csv_file)
+        profiler = profile_run('./reports/profiles', args.profile, label=f"clean {csv_file}") if args.profile else nullcontext()
+        with profiler as run:
+            # Load and clean data
+            duplicates_path = None
+            if args.external_duplicates:
+                os.makedirs('./reports', exist_ok=True)
+                duplicates_path = os.path.join('./reports', 'duplicate_groups.jsonl')
+            included_df, excluded_df, summary_stats = load_and_clean_data(
+                csv_file, parser=args.parser, duplicates_path=duplicates_path,
+                memory_budget=args.memory_budget_mb * 1024 * 1024
+            )
+            
+            # Save reports
+            save_reports(included_df, excluded_df, summary_stats, output_dir='./reports')
+            
+            if args.fuzzy_threshold is not None:
+                fuzzy = DataCleaner().find_fuzzy_duplicate_records(included_df, threshold=args.fuzzy_threshold,
+                                                                   blocking=args.fuzzy_blocking)
+                fuzzy_path = os.path.join('./reports', 'fuzzy_duplicates.json')
+                with open(fuzzy_path, 'w') as f:
+                    json.dump(fuzzy, f, indent=2, default=str)
+                print(f"\nNear-duplicate groups: {fuzzy['total_fuzzy_groups']} "
+                      f"({fuzzy['candidate_pairs']} candidate pairs, {fuzzy['scored_pairs']} scored)")
+                print(f"✓ Saved fuzzy duplicates to: {fuzzy_path}")
         
-        # Save reports
-        save_reports(included_df, excluded_df, summary_stats, output_dir='./reports')
+        if run is not None:
+            print(f"✓ Saved {run.kind} profile {run.run_id} to: {run.path}")
         
         print("\n✓ Data cleaning completed successfully!")
         
@@ -534,4 +1500,4 @@ if __name__ == "__main__":
         print(f"Error during data cleaning: {str(e)}")
         import traceback
         traceback.print_exc()
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
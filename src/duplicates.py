@@ -0,0 +1,494 @@
+#import packages
+import pandas as pd
+import numpy as np
+import os
+import json
+import heapq
+import hashlib
+import tempfile
+from typing import Dict, Iterable, Iterator, List
+
+
+# Field pairs checked for duplicates (at least 2 of 4 fields match), in report order
+DUPLICATE_FIELD_PAIRS = [
+    ('name', 'birth_day'),
+    ('name', 'birth_month'),
+    ('name', 'birth_year'),
+    ('birth_day', 'birth_month'),
+    ('birth_day', 'birth_year'),
+    ('birth_month', 'birth_year')
+]
+
+NUMERIC_FIELDS = ('birth_day', 'birth_month', 'birth_year')
+
+# Separators that can't appear in cleaned names or numbers
+FIELD_SEP = '\x1f'
+RECORD_SEP = '\x1e'
+
+# Rough in-memory cost of one sort record (Python string plus list slot)
+RECORD_BYTES_ESTIMATE = 160
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # 64MB
+
+# Group fingerprints are sums of 64-bit row hashes modulo 2**64
+HASH_MASK = (1 << 64) - 1
+
+# Set bits per byte value, for counting rows in the duplicate bitmap
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+
+# Maximum run files merged at once; more runs are merged in several passes
+MAX_MERGE_FAN_IN = 64
+
+
+def _encode_value(field: str, value) -> str:
+    """Encode a key value so string order matches pandas' sort order"""
+    if field in NUMERIC_FIELDS:
+        # Zero padding keeps numeric order under string comparison
+        return f"{int(value):012d}"
+    return str(value)
+
+
+def _decode_value(field: str, text: str):
+    """Reverse _encode_value"""
+    return int(text) if field in NUMERIC_FIELDS else text
+
+
+def _write_run(records: List[str], temp_dir: str) -> str:
+    """Sort records in memory and write them to a temporary run file"""
+    records.sort()
+    fd, path = tempfile.mkstemp(prefix='dup_run_', suffix='.txt', dir=temp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+        for record in records:
+            f.write(record)
+            f.write('\n')
+    return path
+
+
+def _read_run(path: str) -> Iterator[str]:
+    """Stream records back from a run file"""
+    with open(path, 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            yield line[:-1]
+
+
+def _merge_runs(run_paths: List[str], temp_dir: str) -> List[str]:
+    """Merge run files in batches until at most MAX_MERGE_FAN_IN remain"""
+    while len(run_paths) > MAX_MERGE_FAN_IN:
+        merged_paths = []
+        for start in range(0, len(run_paths), MAX_MERGE_FAN_IN):
+            batch = run_paths[start:start + MAX_MERGE_FAN_IN]
+            fd, path = tempfile.mkstemp(prefix='dup_run_', suffix='.txt', dir=temp_dir)
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+                for record in heapq.merge(*[_read_run(batch_path) for batch_path in batch]):
+                    f.write(record)
+                    f.write('\n')
+            for batch_path in batch:
+                os.unlink(batch_path)
+            merged_paths.append(path)
+        run_paths = merged_paths
+    return run_paths
+
+
+def _temp_file(temp_dir: str, temp_paths: List[str]) -> str:
+    """Create an empty temporary spill file, recording it for cleanup"""
+    fd, path = tempfile.mkstemp(prefix='dup_spill_', suffix='.txt', dir=temp_dir)
+    os.close(fd)
+    temp_paths.append(path)
+    return path
+
+
+def _mark_rows(duplicate_rows: np.ndarray, positions: List[int]):
+    """Set the bits of row positions in the duplicate bitmap"""
+    if positions:
+        positions = np.array(positions, dtype=np.int64)
+        np.bitwise_or.at(duplicate_rows, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+
+
+def find_duplicate_records_external(chunks: Iterable[pd.DataFrame], groups_path: str,
+                                    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                                    temp_dir: str = None, preview_groups: int = 20) -> Dict:
+    """
+    Find records where at least 2 of 4 fields match, using bounded memory.
+
+    Every (field pair, key, row position) record is written to sorted run
+    files no larger than the memory budget, the runs are k-way merged, and
+    duplicate groups are streamed to groups_path as JSON lines. Groups with
+    the same rows as an earlier group are dropped through sorted runs of
+    group digests, so apart from a one-bit-per-row bitmap and the preview,
+    memory stays within the budget however many or large the groups are.
+    Groups are the same as DataCleaner.find_duplicate_records produces,
+    in the same order.
+
+    Args:
+        chunks: Included rows as DataFrames (row_id as text, name, birth_day,
+            birth_month, birth_year), e.g. pd.read_csv(..., chunksize=...)
+        groups_path: File the duplicate groups are written to (JSON lines)
+        memory_budget: Approximate bytes of sort records held in memory
+        temp_dir: Directory for run files (system temp dir by default)
+        preview_groups: Number of leading groups also returned in memory
+
+    Returns:
+        Dictionary with duplicate analysis; 'duplicate_groups' holds only the
+        preview and 'groups_file' points at the full list
+    """
+    run_capacity = max(1000, memory_budget // RECORD_BYTES_ESTIMATE)
+    run_paths = []
+    digest_paths = []
+    skip_paths = []
+    temp_paths = []
+    records = []
+    row_count = 0
+
+    try:
+        # Phase 1: emit sort records and spill sorted runs to disk
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            positions = np.arange(row_count, row_count + len(chunk))
+            row_count += len(chunk)
+            row_ids = chunk['row_id'].astype(str).tolist()
+            for pair_index, fields in enumerate(DUPLICATE_FIELD_PAIRS):
+                first = [_encode_value(fields[0], value) for value in chunk[fields[0]].tolist()]
+                second = [_encode_value(fields[1], value) for value in chunk[fields[1]].tolist()]
+                for position, row_id, a, b in zip(positions.tolist(), row_ids, first, second):
+                    records.append(f"{pair_index}{FIELD_SEP}{a}{FIELD_SEP}{b}{RECORD_SEP}{position:012d}{RECORD_SEP}{row_id}")
+                    if len(records) >= run_capacity:
+                        run_paths.append(_write_run(records, temp_dir))
+                        records = []
+        if records:
+            run_paths.append(_write_run(records, temp_dir))
+            records = []
+
+        # Phase 2: merge the runs. Members of each key run go straight to a spill
+        # file and the run's row-set digest to sorted digest runs, so no group is
+        # ever held in memory whole
+        run_paths[:] = _merge_runs(run_paths, temp_dir)
+        headers_path = _temp_file(temp_dir, temp_paths)  # group key and size per candidate group
+        members_path = _temp_file(temp_dir, temp_paths)  # position and row id per member, in group order
+        digests = []
+        candidate_count = 0
+
+        with open(headers_path, 'w', encoding='utf-8', newline='\n') as headers_file, \
+                open(members_path, 'w', encoding='utf-8', newline='\n') as members_file:
+            def end_group(group_key, size, digest):
+                nonlocal candidate_count, digests
+                headers_file.write(f"{group_key}{RECORD_SEP}{size}\n")
+                digests.append(f"{digest.hexdigest()}{RECORD_SEP}{candidate_count:012d}")
+                candidate_count += 1
+                if len(digests) >= run_capacity:
+                    digest_paths.append(_write_run(digests, temp_dir))
+                    digests = []
+
+            current_key, first_member, size, digest = None, None, 0, None
+            for record in heapq.merge(*[_read_run(path) for path in run_paths]):
+                group_key, member = record.split(RECORD_SEP, 1)
+                # Records of a key run come in position order, so the digest needs no sort
+                position = int(member[:12])
+                if group_key != current_key:
+                    if size > 1:
+                        end_group(current_key, size, digest)
+                    current_key, first_member, size = group_key, member, 1
+                    digest = hashlib.blake2b(position.to_bytes(8, 'little'), digest_size=16)
+                    continue
+                if size == 1:
+                    members_file.write(first_member)
+                    members_file.write('\n')
+                members_file.write(member)
+                members_file.write('\n')
+                digest.update(position.to_bytes(8, 'little'))
+                size += 1
+            if size > 1:
+                end_group(current_key, size, digest)
+        for path in run_paths:
+            os.unlink(path)
+        run_paths[:] = []
+        if digests:
+            digest_paths.append(_write_run(digests, temp_dir))
+            digests = []
+
+        # Phase 3: a group with the same exact rows as an earlier group is skipped;
+        # sorted digests bring those together, and skipped groups are sorted back
+        # into group order
+        digest_paths[:] = _merge_runs(digest_paths, temp_dir)
+        skipped = []
+        previous_digest = None
+        for record in heapq.merge(*[_read_run(path) for path in digest_paths]):
+            digest, candidate = record.split(RECORD_SEP)
+            if digest == previous_digest:
+                skipped.append(candidate)
+                if len(skipped) >= run_capacity:
+                    skip_paths.append(_write_run(skipped, temp_dir))
+                    skipped = []
+            previous_digest = digest
+        if skipped:
+            skip_paths.append(_write_run(skipped, temp_dir))
+            skipped = []
+        skip_paths[:] = _merge_runs(skip_paths, temp_dir)
+
+        # Phase 4: stream the reported groups out
+        duplicate_rows = np.zeros((row_count + 7) // 8, dtype=np.uint8)  # one bit per row
+        marked = []
+        total_groups = 0
+        preview = []
+        skips = heapq.merge(*[_read_run(path) for path in skip_paths])
+        next_skip = next(skips, None)
+
+        with open(groups_path, 'w', encoding='utf-8') as groups_file, \
+                open(headers_path, 'r', encoding='utf-8', newline='\n') as headers_file, \
+                open(members_path, 'r', encoding='utf-8', newline='\n') as members_file:
+            for candidate, header in enumerate(headers_file):
+                group_key, size = header[:-1].split(RECORD_SEP)
+                members = (members_file.readline()[:-1].split(RECORD_SEP) for _ in range(int(size)))
+                if next_skip is not None and int(next_skip) == candidate:
+                    for _ in members:
+                        pass
+                    next_skip = next(skips, None)
+                    continue
+
+                pair_index, first, second = group_key.split(FIELD_SEP)
+                fields = DUPLICATE_FIELD_PAIRS[int(pair_index)]
+                group = {
+                    'matching_fields': list(fields),
+                    'matching_values': {
+                        fields[0]: _decode_value(fields[0], first),
+                        fields[1]: _decode_value(fields[1], second)
+                    },
+                    'count': int(size)
+                }
+                in_preview = len(preview) < preview_groups
+                if in_preview:
+                    group['row_ids'] = []
+                else:
+                    # Written as it is read, in the layout json.dumps gives preview groups
+                    groups_file.write(json.dumps(group)[:-1] + ', "row_ids": [')
+                for i, (position, row_id) in enumerate(members):
+                    if in_preview:
+                        group['row_ids'].append(row_id)
+                    else:
+                        groups_file.write(f"{', ' if i else ''}{json.dumps(row_id)}")
+                    marked.append(int(position))
+                    if len(marked) >= run_capacity:
+                        _mark_rows(duplicate_rows, marked)
+                        marked = []
+                if in_preview:
+                    groups_file.write(json.dumps(group))
+                    preview.append(group)
+                else:
+                    groups_file.write(']}')
+                groups_file.write('\n')
+                total_groups += 1
+        _mark_rows(duplicate_rows, marked)
+    finally:
+        for path in run_paths + digest_paths + skip_paths + temp_paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    return {
+        'total_duplicate_groups': total_groups,
+        'total_duplicate_records': int(POPCOUNT[duplicate_rows].sum()),
+        'duplicate_groups': preview,
+        'groups_file': groups_path
+    }
+
+
+class DuplicateIndex:
+
+    #Duplicate groups (at least 2 of 4 fields match) maintained incrementally as rows are added or removed.
+    
+    def __init__(self):
+        self.groups = {}          # (pair_index, key) -> dict of row_ids in arrival order
+        self.fingerprints = {}    # (pair_index, key) -> (sum of row hashes mod 2**64, size)
+        self.buckets = {}         # fingerprint -> group keys with that exact row set
+        self.active_counts = {}   # row_id -> number of reported groups containing it
+        self.total_groups = 0
+    
+    def add_rows(self, df: pd.DataFrame):
+        """
+        Add rows to the index. Cost is proportional to the rows added, except
+        in the rare case where a group's row set starts or stops matching
+        another pair's group exactly.
+        
+        Args:
+            df: Included rows with text row_id, name, birth_day, birth_month, birth_year
+        """
+        self._apply_rows(df, removing=False)
+    
+    def remove_rows(self, df: pd.DataFrame):
+        """
+        Remove rows previously added to the index, at the same cost as add_rows.
+        
+        Args:
+            df: Rows to remove, with the values they were added with
+        """
+        self._apply_rows(df, removing=True)
+    
+    def merge(self, other: 'DuplicateIndex'):
+        """
+        Add every row of another index, at a cost proportional to its groups.
+        
+        Args:
+            other: Index over rows whose ids don't overlap this index's rows
+        """
+        for group_key, members in other.groups.items():
+            self._update_group(group_key, list(members), other.fingerprints[group_key][0], removing=False)
+    
+    def _apply_rows(self, df: pd.DataFrame, removing: bool):
+        if df.empty:
+            return
+        
+        row_ids = df['row_id'].astype(str).tolist()
+        # Row ids are random UUIDs, so their leading 64 bits hash them well
+        row_hashes = [int(row_id.replace('-', '')[:16], 16) for row_id in row_ids]
+        
+        for pair_index, fields in enumerate(DUPLICATE_FIELD_PAIRS):
+            keyed_rows = {}
+            for i, key in enumerate(zip(df[fields[0]].tolist(), df[fields[1]].tolist())):
+                keyed_rows.setdefault(key, []).append(i)
+            for key, positions in keyed_rows.items():
+                self._update_group(
+                    (pair_index, key),
+                    [row_ids[i] for i in positions],
+                    sum(row_hashes[i] for i in positions),
+                    removing
+                )
+    
+    def _is_active(self, group_key) -> bool:
+        """A group is reported when it has 2+ rows and is the first group with its row set"""
+        fingerprint = self.fingerprints.get(group_key)
+        return fingerprint is not None and fingerprint[1] > 1 and min(self.buckets[fingerprint]) == group_key
+    
+    def _activate(self, row_ids: Iterable[str], count_group: bool = True):
+        if count_group:
+            self.total_groups += 1
+        for row_id in row_ids:
+            self.active_counts[row_id] = self.active_counts.get(row_id, 0) + 1
+    
+    def _deactivate(self, row_ids: Iterable[str], count_group: bool = True):
+        if count_group:
+            self.total_groups -= 1
+        for row_id in row_ids:
+            remaining = self.active_counts[row_id] - 1
+            if remaining:
+                self.active_counts[row_id] = remaining
+            else:
+                del self.active_counts[row_id]
+    
+    def _update_group(self, group_key, changed_row_ids: List[str], changed_hash: int, removing: bool):
+        """Add or remove rows of one group and update which groups are reported"""
+        was_active = self._is_active(group_key)
+        old_fingerprint = self.fingerprints.get(group_key)
+        successor = None
+        
+        # Leave the old row-set bucket; the next group with that set takes over
+        if old_fingerprint is not None:
+            bucket = self.buckets[old_fingerprint]
+            was_owner = min(bucket) == group_key
+            bucket.discard(group_key)
+            if not bucket:
+                del self.buckets[old_fingerprint]
+            elif was_owner and old_fingerprint[1] > 1:
+                successor = min(bucket)
+        
+        members = self.groups.setdefault(group_key, {})
+        old_members = list(members) if was_active else None
+        if removing:
+            for row_id in changed_row_ids:
+                del members[row_id]
+            changed_hash = -changed_hash
+        else:
+            members.update(dict.fromkeys(changed_row_ids))
+        
+        if members:
+            old_hash = old_fingerprint[0] if old_fingerprint else 0
+            new_fingerprint = ((old_hash + changed_hash) & HASH_MASK, len(members))
+            self.fingerprints[group_key] = new_fingerprint
+            bucket = self.buckets.setdefault(new_fingerprint, set())
+            previous_owner = min(bucket) if bucket else None
+            bucket.add(group_key)
+            now_active = self._is_active(group_key)
+        else:
+            del self.groups[group_key]
+            del self.fingerprints[group_key]
+            previous_owner = None
+            now_active = False
+        
+        if was_active and now_active:
+            if removing:
+                self._deactivate(changed_row_ids, count_group=False)
+            else:
+                self._activate(changed_row_ids, count_group=False)
+        elif was_active:
+            self._deactivate(old_members)
+        elif now_active:
+            self._activate(members)
+        
+        # An earlier-reported group with the same row set is now shadowed
+        if now_active and previous_owner is not None:
+            self._deactivate(self.groups[previous_owner])
+        if successor is not None:
+            self._activate(self.groups[successor])
+    
+    def summary(self) -> Dict:
+        """
+        Get the duplicate analysis in the shape DataCleaner.find_duplicate_records returns.
+        
+        Returns:
+            Dictionary with duplicate analysis
+        """
+        duplicate_groups = []
+        for group_key in sorted(key for key in self.groups if self._is_active(key)):
+            pair_index, values = group_key
+            fields = DUPLICATE_FIELD_PAIRS[pair_index]
+            duplicate_groups.append({
+                'matching_fields': list(fields),
+                'matching_values': {fields[0]: values[0], fields[1]: values[1]},
+                'count': len(self.groups[group_key]),
+                'row_ids': list(self.groups[group_key])
+            })
+        
+        return {
+            'total_duplicate_groups': self.total_groups,
+            'total_duplicate_records': len(self.active_counts),
+            'duplicate_groups': duplicate_groups
+        }
+
+
+def iter_duplicate_groups(groups_path: str) -> Iterator[Dict]:
+    """
+    Stream duplicate groups back from a file written by find_duplicate_records_external.
+
+    Args:
+        groups_path: Path to the JSON lines group file
+
+    Yields:
+        Duplicate group dictionaries
+    """
+    with open(groups_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Find duplicate groups in an included-data CSV (e.g. reports/data_included.csv) "
+                    "without loading it into memory"
+    )
+    arg_parser.add_argument('included_csv', help="CSV with row_id, name, birth_day, birth_month, birth_year")
+    arg_parser.add_argument('groups_path', help="Output file for duplicate groups (JSON lines)")
+    arg_parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                            help="Approximate memory for in-memory sort runs")
+    arg_parser.add_argument('--chunksize', type=int, default=100000, help="Rows read per chunk")
+    args = arg_parser.parse_args()
+
+    result = find_duplicate_records_external(
+        pd.read_csv(args.included_csv, chunksize=args.chunksize, keep_default_na=False),
+        args.groups_path,
+        memory_budget=args.memory_budget_mb * 1024 * 1024
+    )
+    print(f"Duplicate groups: {result['total_duplicate_groups']}")
+    print(f"Records involved in duplicates: {result['total_duplicate_records']}")
+    print(f"Groups written to: {result['groups_file']}")
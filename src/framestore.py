@@ -0,0 +1,373 @@
+#import packages
+import os
+import json
+import time
+import uuid
+import pickle
+import shutil
+import weakref
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; without it row ids are plain bytes and frames hold no Arrow columns
+    pa = None
+
+# File naming the version a dataset's metadata currently points at
+CURRENT_FILENAME = 'CURRENT'
+
+# Directory of per-process lease files inside each version
+LEASES_DIRNAME = 'leases'
+
+
+class SharedFrameStore:
+    
+    #Cleaned frames saved as memory-mapped column files, so every worker process
+    #maps the same read-only pages instead of unpickling its own copy.
+    #
+    #Each save of changed frames writes a new immutable version directory. A
+    #process mapping a version holds a lease file on it; versions that are no
+    #longer current are deleted once no live process holds a lease.
+    
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._mapped = {}    # (dataset_id, version) -> {frame name: mapped frame}
+        self._written = {}   # dataset_id -> (version, {frame name: weakref to the frame saved})
+    
+    # Metadata pickles
+    
+    def save_metadata(self, dataset_id: str, metadata: Dict, path: str, frame_keys=('included_df', 'excluded_df')):
+        """
+        Pickle dataset metadata with its frames replaced by references to
+        shared column files. Objects inside the metadata that refer to the
+        same frames (e.g. a LazySummary) pickle the reference too.
+        
+        Args:
+            dataset_id: Dataset the metadata belongs to
+            metadata: Dataset metadata dict
+            path: Metadata pickle file, replaced atomically
+            frame_keys: Metadata keys holding frames to share
+        """
+        frames = {key: metadata[key] for key in frame_keys if isinstance(metadata.get(key), pd.DataFrame)}
+        version = self.save_frames(dataset_id, frames) if frames else None
+        references = {id(frame): (dataset_id, version, key) for key, frame in frames.items()}
+        
+        staging = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(staging, 'wb') as f:
+            pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.persistent_id = lambda obj: references.get(id(obj)) if isinstance(obj, pd.DataFrame) else None
+            pickler.dump(metadata)
+        os.replace(staging, path)
+        # Older versions can go once the metadata no longer points at them
+        self.sweep(dataset_id)
+    
+    def load_metadata(self, dataset_id: str, path: str, attempts: int = 3) -> Optional[Dict]:
+        """
+        Unpickle dataset metadata, mapping its frames from the shared column
+        files. Older versions of the dataset mapped by this process are released.
+        
+        Args:
+            dataset_id: Dataset the metadata belongs to
+            path: Metadata pickle file written by save_metadata
+            attempts: Reads to try when a version is swept between reading the
+                pickle and mapping its frames (the pickle is newer by then)
+        
+        Returns:
+            Dataset metadata dict, or None when the file does not exist
+        """
+        for attempt in range(attempts):
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, 'rb') as f:
+                    unpickler = pickle.Unpickler(f)
+                    unpickler.persistent_load = lambda reference: self.frame(*reference)
+                    return unpickler.load()
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+        return None
+    
+    # Frames
+    
+    def save_frames(self, dataset_id: str, frames: Dict[str, pd.DataFrame]) -> str:
+        """
+        Save a dataset's frames as a new version, unless they are the frames
+        of a version already saved or mapped by this process.
+        
+        Args:
+            dataset_id: Dataset the frames belong to
+            frames: Frames by name
+        
+        Returns:
+            Version name
+        """
+        with self._lock:
+            unchanged = self._unchanged_version(dataset_id, frames)
+            if unchanged is not None:
+                return unchanged
+        
+        version = f"{time.time_ns():x}-{os.getpid()}"
+        dataset_dir = os.path.join(self.root, dataset_id)
+        staging_dir = os.path.join(dataset_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(staging_dir)
+        for name, frame in frames.items():
+            _write_frame(frame, os.path.join(staging_dir, name))
+        # Readers only ever see complete versions
+        os.rename(staging_dir, os.path.join(dataset_dir, version))
+        _write_atomic(os.path.join(dataset_dir, CURRENT_FILENAME), version)
+        
+        with self._lock:
+            self._written[dataset_id] = (version, {name: weakref.ref(frame) for name, frame in frames.items()})
+        return version
+    
+    def frame(self, dataset_id: str, version: str, name: str) -> pd.DataFrame:
+        """
+        Map one frame of a saved version. Mapped versions are cached per
+        process, and mapping a version releases this process's older ones.
+        
+        Args:
+            dataset_id: Dataset the frame belongs to
+            version: Version name returned by save_frames
+            name: Frame name
+        
+        Returns:
+            DataFrame whose columns are read-only views of the shared files
+        """
+        stale = []
+        with self._lock:
+            mapped = self._mapped.get((dataset_id, version))
+            if mapped is None:
+                version_dir = os.path.join(self.root, dataset_id, version)
+                if not os.path.isdir(version_dir):
+                    raise FileNotFoundError(version_dir)
+                stale = [key for key in self._mapped if key[0] == dataset_id]
+                for key in stale:
+                    self._release(*key)
+                mapped = self._mapped[(dataset_id, version)] = {}
+                _write_atomic(self._lease_path(dataset_id, version), str(os.getpid()))
+            if name not in mapped:
+                try:
+                    mapped[name] = _read_frame(os.path.join(self.root, dataset_id, version, name))
+                except FileNotFoundError:
+                    # Swept before the lease was taken
+                    self._release(dataset_id, version)
+                    raise
+            frame = mapped[name]
+        if stale:
+            self.sweep(dataset_id)
+        return frame
+    
+    def release(self, dataset_id: str):
+        """Unmap every version of a dataset held by this process"""
+        with self._lock:
+            for key in [key for key in self._mapped if key[0] == dataset_id]:
+                self._release(*key)
+            self._written.pop(dataset_id, None)
+        self.sweep(dataset_id)
+    
+    def remove(self, dataset_id: str):
+        """
+        Drop a dataset: it no longer has a current version, and its files are
+        deleted as soon as no process holds a lease on them.
+        
+        Args:
+            dataset_id: Dataset to drop
+        """
+        try:
+            os.unlink(os.path.join(self.root, dataset_id, CURRENT_FILENAME))
+        except FileNotFoundError:
+            pass
+        self.release(dataset_id)
+    
+    def references(self, dataset_id: str) -> Dict[str, int]:
+        """Live processes holding a lease on each saved version of a dataset"""
+        dataset_dir = os.path.join(self.root, dataset_id)
+        if not os.path.isdir(dataset_dir):
+            return {}
+        return {version: len(self._live_leases(dataset_id, version))
+                for version in os.listdir(dataset_dir)
+                if not version.startswith(('.', CURRENT_FILENAME))}
+    
+    def sweep(self, dataset_id: str):
+        """Delete versions of a dataset that are not current and have no live leases"""
+        dataset_dir = os.path.join(self.root, dataset_id)
+        if not os.path.isdir(dataset_dir):
+            return
+        current = _read_text(os.path.join(dataset_dir, CURRENT_FILENAME))
+        for version, leases in self.references(dataset_id).items():
+            if version != current and leases == 0:
+                shutil.rmtree(os.path.join(dataset_dir, version), ignore_errors=True)
+        if current is None and not os.listdir(dataset_dir):
+            os.rmdir(dataset_dir)
+    
+    def _unchanged_version(self, dataset_id: str, frames: Dict[str, pd.DataFrame]) -> Optional[str]:
+        """Version whose frames are these very objects, if any"""
+        written = self._written.get(dataset_id)
+        if written is not None:
+            version, refs = written
+            if refs.keys() == frames.keys() and all(refs[name]() is frame for name, frame in frames.items()):
+                return version
+        for (mapped_id, version), mapped in self._mapped.items():
+            if mapped_id == dataset_id and all(mapped.get(name) is frame for name, frame in frames.items()):
+                return version
+        return None
+    
+    def _release(self, dataset_id: str, version: str):
+        """Drop a mapped version from this process (caller holds the lock)"""
+        del self._mapped[(dataset_id, version)]
+        try:
+            os.unlink(self._lease_path(dataset_id, version))
+        except FileNotFoundError:
+            pass
+    
+    def _lease_path(self, dataset_id: str, version: str) -> str:
+        leases_dir = os.path.join(self.root, dataset_id, version, LEASES_DIRNAME)
+        os.makedirs(leases_dir, exist_ok=True)
+        return os.path.join(leases_dir, str(os.getpid()))
+    
+    def _live_leases(self, dataset_id: str, version: str):
+        """PIDs of running processes holding a lease on a version; stale leases are removed"""
+        leases_dir = os.path.join(self.root, dataset_id, version, LEASES_DIRNAME)
+        if not os.path.isdir(leases_dir):
+            return []
+        live = []
+        for name in os.listdir(leases_dir):
+            pid = int(name) if name.isdigit() else None
+            if pid is not None and _process_alive(pid):
+                live.append(pid)
+            else:
+                try:
+                    os.unlink(os.path.join(leases_dir, name))
+                except FileNotFoundError:
+                    pass
+        return live
+
+
+def _write_frame(df: pd.DataFrame, frame_dir: str):
+    """Write a frame as one .npy file per array plus a JSON description"""
+    os.makedirs(frame_dir)
+    description = {'length': len(df), 'attrs': df.attrs, 'columns': []}
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        # Frames are kept with a fresh RangeIndex; anything else is stored whole
+        description['pickled'] = True
+        with open(os.path.join(frame_dir, 'frame.pkl'), 'wb') as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(frame_dir, 'frame.json'), 'w') as f:
+            json.dump(description, f, default=str)
+        return
+    
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        dtype = series.dtype
+        entry = {'name': column, 'file': f"{i}"}
+        path = os.path.join(frame_dir, f"{i}")
+        if isinstance(dtype, pd.CategoricalDtype):
+            entry.update(kind='categorical', ordered=bool(dtype.ordered))
+            np.save(f"{path}.codes.npy", series.array.codes)
+            with open(f"{path}.categories.pkl", 'wb') as f:
+                pickle.dump(dtype.categories, f, protocol=pickle.HIGHEST_PROTOCOL)
+        elif pa is not None and isinstance(dtype, pd.ArrowDtype) and pa.types.is_fixed_size_binary(dtype.pyarrow_dtype) \
+                and series.array._pa_array.null_count == 0:
+            chunks = series.array._pa_array.combine_chunks()
+            width = dtype.pyarrow_dtype.byte_width
+            data = np.frombuffer(chunks.buffers()[1], dtype=np.uint8)[chunks.offset * width:(chunks.offset + len(chunks)) * width]
+            entry.update(kind='fixed_binary', width=width)
+            np.save(f"{path}.npy", data)
+        elif isinstance(series.array, pd.arrays.IntegerArray) or isinstance(series.array, pd.arrays.BooleanArray):
+            entry.update(kind='masked', dtype=str(dtype))
+            np.save(f"{path}.data.npy", series.array._data)
+            np.save(f"{path}.mask.npy", series.array._mask)
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'biufM':
+            entry.update(kind='numpy')
+            np.save(f"{path}.npy", series.to_numpy())
+        else:
+            # Object and other extension columns are not shared, only stored
+            entry.update(kind='pickle')
+            with open(f"{path}.pkl", 'wb') as f:
+                pickle.dump(series, f, protocol=pickle.HIGHEST_PROTOCOL)
+        description['columns'].append(entry)
+    with open(os.path.join(frame_dir, 'frame.json'), 'w') as f:
+        json.dump(description, f, default=str)
+
+
+def _read_frame(frame_dir: str) -> pd.DataFrame:
+    """Map a frame written by _write_frame; array columns are read-only views of the files"""
+    with open(os.path.join(frame_dir, 'frame.json'), 'r') as f:
+        description = json.load(f)
+    if description.get('pickled'):
+        with open(os.path.join(frame_dir, 'frame.pkl'), 'rb') as f:
+            return pickle.load(f)
+    
+    length = description['length']
+    columns = {}
+    for entry in description['columns']:
+        path = os.path.join(frame_dir, entry['file'])
+        kind = entry['kind']
+        if kind == 'categorical':
+            with open(f"{path}.categories.pkl", 'rb') as f:
+                categories = pickle.load(f)
+            codes = _map_array(f"{path}.codes.npy")
+            values = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories, entry['ordered']),
+                                               validate=False)
+        elif kind == 'fixed_binary':
+            if pa is None:
+                raise ImportError("pyarrow is required to read frames saved with binary row ids")
+            data = _map_array(f"{path}.npy")
+            array = pa.FixedSizeBinaryArray.from_buffers(pa.binary(entry['width']), length, [None, pa.py_buffer(data)])
+            values = pd.arrays.ArrowExtensionArray(array)
+        elif kind == 'masked':
+            data = _map_array(f"{path}.data.npy")
+            mask = _map_array(f"{path}.mask.npy")
+            array_type = pd.arrays.BooleanArray if entry['dtype'] == 'boolean' else pd.arrays.IntegerArray
+            values = array_type(data, mask)
+        elif kind == 'numpy':
+            values = _map_array(f"{path}.npy")
+        else:
+            with open(f"{path}.pkl", 'rb') as f:
+                values = pickle.load(f).array
+        columns[entry['name']] = pd.Series(values, copy=False)
+    
+    df = pd.DataFrame(columns, copy=False) if columns else pd.DataFrame(index=pd.RangeIndex(length))
+    df.attrs.update(description['attrs'])
+    return df
+
+
+def _map_array(path: str) -> np.ndarray:
+    """Map an .npy file read-only, as a plain ndarray view of the mapping"""
+    return np.asarray(np.load(path, mmap_mode='r'))
+
+
+def _write_atomic(path: str, text: str):
+    """Write a small text file so readers see either the old or the new content"""
+    staging = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(staging, 'w') as f:
+        f.write(text)
+    os.replace(staging, path)
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this PID is running"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,278 @@
+#import packages
+import pandas as pd
+import numpy as np
+import unicodedata
+from typing import Dict, Iterable, List
+
+try:
+    from rapidfuzz.distance import Levenshtein as rapidfuzz_levenshtein
+except ImportError:  # rapidfuzz is optional, a pure Python edit distance is used without it
+    rapidfuzz_levenshtein = None
+
+
+# Minimum name similarity (1 - edit distance / longer length) for a near-duplicate
+DEFAULT_FUZZY_THRESHOLD = 0.85
+
+# Name keys candidates are blocked on, in addition to the full birth date
+BLOCKING_METHODS = ('soundex', 'ngram')
+
+# Character n-gram length for 'ngram' blocking
+NGRAM_SIZE = 3
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('BFPV', '1'),
+    **dict.fromkeys('CGJKQSXZ', '2'),
+    **dict.fromkeys('DT', '3'),
+    'L': '4',
+    **dict.fromkeys('MN', '5'),
+    'R': '6'
+}
+
+DATE_FIELDS = ['birth_day', 'birth_month', 'birth_year']
+
+
+def normalize_name(name: str) -> str:
+    """Casefold a name and strip accents, so 'José' and 'jose' compare equal"""
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def soundex(name: str) -> str:
+    """
+    American Soundex code of a name, e.g. 'Jon Smith' and 'John Smith' -> 'J525'.
+    
+    Args:
+        name: Name to encode
+    
+    Returns:
+        Letter plus three digits, or '' for a name without letters
+    """
+    letters = [c for c in normalize_name(name).upper() if 'A' <= c <= 'Z']
+    if not letters:
+        return ''
+    
+    code = letters[0]
+    last = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W don't separate letters with the same code; vowels do
+        if letter not in 'HW':
+            last = digit
+    return code.ljust(4, '0')
+
+
+def name_ngrams(name: str, size: int = NGRAM_SIZE) -> List[str]:
+    """
+    Distinct character n-grams of a name, padded so short names still have one.
+    
+    Args:
+        name: Name to split
+        size: n-gram length
+    
+    Returns:
+        List of n-grams
+    """
+    padded = f" {normalize_name(name)} "
+    if len(padded) <= size:
+        return [padded]
+    return list(dict.fromkeys(padded[i:i + size] for i in range(len(padded) - size + 1)))
+
+
+def levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Edit distance between two strings, giving up once it must exceed max_distance.
+    Only a band of width 2 * max_distance + 1 around the diagonal is computed.
+    
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Largest distance of interest
+    
+    Returns:
+        The distance, or max_distance + 1 when it is larger than max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if rapidfuzz_levenshtein is not None:
+        return rapidfuzz_levenshtein.distance(a, b, score_cutoff=max_distance)
+    
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [i if low == 1 else max_distance + 1] + [max_distance + 1] * len(b)
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[len(b)], max_distance + 1)
+
+
+def name_similarity(a: str, b: str, threshold: float) -> float:
+    """
+    Similarity of two names, 1 - edit distance / length of the longer name.
+    
+    Args:
+        a: First name (normalized)
+        b: Second name (normalized)
+        threshold: Similarity of interest; lower similarities return 0.0 early
+    
+    Returns:
+        Similarity between 0.0 and 1.0 (0.0 when below threshold)
+    """
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    max_distance = int((1 - threshold) * longest + 1e-9)
+    distance = levenshtein(a, b, max_distance)
+    if distance > max_distance:
+        return 0.0
+    return 1 - distance / longest
+
+
+def _block_keys(names: Iterable[str], blocking: str) -> List[List[str]]:
+    """Name keys of each distinct name for the blocking method"""
+    if blocking == 'soundex':
+        return [[soundex(name)] for name in names]
+    if blocking == 'ngram':
+        return [name_ngrams(name) for name in names]
+    raise ValueError(f"Unknown blocking method: {blocking}")
+
+
+def find_fuzzy_duplicates(df: pd.DataFrame, threshold: float = DEFAULT_FUZZY_THRESHOLD,
+                          blocking: str = 'soundex') -> Dict:
+    """
+    Find near-duplicate records: the same birth date and similar but not
+    identical names (e.g. 'Jon Smith' vs 'John Smith').
+    
+    Rows are blocked by birth date plus a phonetic (Soundex) or n-gram key of
+    the name, and only distinct names sharing a block are scored, each pair
+    once, with a banded edit distance. Names linked by a similarity of at
+    least threshold are chained into groups. Exact name matches are left to
+    the exact duplicate report.
+    
+    Args:
+        df: Included rows (plain or compact) with name, birth_day, birth_month, birth_year
+        threshold: Minimum similarity, between 0 and 1
+        blocking: 'soundex' or 'ngram'
+    
+    Returns:
+        Dictionary with the group count, the number of records involved,
+        the number of blocks, the within-block candidate pairs and the
+        distinct name pairs actually scored, and the groups (birth date,
+        names, row positions in df and the weakest link's similarity)
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Fuzzy threshold must be in (0, 1]: {threshold}")
+    if blocking not in BLOCKING_METHODS:
+        raise ValueError(f"Unknown blocking method: {blocking}")
+    
+    result = {
+        'threshold': threshold,
+        'blocking': blocking,
+        'rows': len(df),
+        'blocks': 0,
+        'candidate_pairs': 0,
+        'scored_pairs': 0,
+        'total_fuzzy_groups': 0,
+        'total_fuzzy_records': 0,
+        'fuzzy_groups': []
+    }
+    if df.empty:
+        return result
+    
+    # Work on distinct names and distinct (birth date, name) nodes, not rows
+    name_codes, names = pd.factorize(df['name'].astype(object).to_numpy(), use_na_sentinel=False)
+    normalized = [normalize_name(name) for name in names]
+    rows = pd.DataFrame({field: df[field].to_numpy(dtype='int64') for field in DATE_FIELDS})
+    rows['name_code'] = name_codes
+    node_ids = rows.groupby(DATE_FIELDS + ['name_code'], sort=False).ngroup().to_numpy()
+    _, first_rows = np.unique(node_ids, return_index=True)
+    node_table = rows.iloc[first_rows].reset_index(drop=True)  # row n describes node n
+    node_names = node_table['name_code'].to_numpy()
+    
+    # One block entry per node and name key; with n-grams a node sits in several blocks
+    key_codes = {}
+    name_keys = [[key_codes.setdefault(key, len(key_codes)) for key in keys] for keys in _block_keys(names, blocking)]
+    key_counts = np.array([len(keys) for keys in name_keys], dtype=np.int64)
+    flat_keys = np.array([key for keys in name_keys for key in keys], dtype=np.int64)
+    key_starts = np.r_[0, np.cumsum(key_counts)[:-1]]
+    
+    repeats = key_counts[node_names]
+    entry_nodes = np.repeat(np.arange(len(node_table)), repeats)
+    within = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    entries = pd.DataFrame(node_table[DATE_FIELDS].to_numpy()[entry_nodes], columns=DATE_FIELDS)
+    entries['key'] = flat_keys[key_starts[node_names][entry_nodes] + within]
+    block_ids = entries.groupby(DATE_FIELDS + ['key'], sort=False).ngroup().to_numpy()
+    
+    # Only blocks holding two or more distinct names can contain near-duplicates
+    shared = np.bincount(block_ids)[block_ids] > 1
+    entry_nodes, block_ids = entry_nodes[shared], block_ids[shared]
+    order = np.argsort(block_ids, kind='stable')
+    entry_nodes, block_ids = entry_nodes[order], block_ids[order]
+    block_starts = np.flatnonzero(np.r_[True, block_ids[1:] != block_ids[:-1]]) if len(block_ids) else np.empty(0, dtype=np.int64)
+    block_ends = np.r_[block_starts[1:], len(block_ids)]
+    result['blocks'] = len(block_starts)
+    
+    # Score each distinct name pair once; link nodes whose names are similar enough
+    scores = {}
+    parent = {}
+    weakest = {}  # root -> lowest similarity among the links of its group
+    
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    for start, end in zip(block_starts, block_ends):
+        members = entry_nodes[start:end].tolist()
+        result['candidate_pairs'] += len(members) * (len(members) - 1) // 2
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                a, b = node_names[members[i]], node_names[members[j]]
+                pair = (a, b) if a < b else (b, a)
+                if pair not in scores:
+                    result['scored_pairs'] += 1
+                    scores[pair] = name_similarity(normalized[a], normalized[b], threshold)
+                if scores[pair] < threshold:
+                    continue
+                root_a = find(parent.setdefault(members[i], members[i]))
+                root_b = find(parent.setdefault(members[j], members[j]))
+                link = min(scores[pair], weakest.get(root_a, 1.0), weakest.get(root_b, 1.0))
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                weakest[root_a] = link
+    
+    # Groups are linked nodes: one birth date, several names, all of their rows
+    components = {}
+    for node in parent:
+        components.setdefault(find(node), []).append(node)
+    row_order = np.argsort(node_ids, kind='stable')
+    row_starts = np.searchsorted(node_ids[row_order], np.arange(len(node_table) + 1))
+    
+    groups = []
+    for root, group_nodes in sorted(components.items(), key=lambda item: min(item[1])):
+        group_nodes.sort()
+        positions = np.sort(np.concatenate([row_order[row_starts[node]:row_starts[node + 1]] for node in group_nodes]))
+        first = node_table.iloc[group_nodes[0]]
+        groups.append({
+            'matching_values': {field: int(first[field]) for field in DATE_FIELDS},
+            'names': [names[node_names[node]] for node in group_nodes],
+            'count': len(positions),
+            'min_similarity': round(weakest[root], 4),
+            'rows': positions.tolist()
+        })
+    
+    result['total_fuzzy_groups'] = len(groups)
+    result['total_fuzzy_records'] = sum(group['count'] for group in groups)
+    result['fuzzy_groups'] = groups
+    return result
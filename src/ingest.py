@@ -0,0 +1,540 @@
+#import packages
+import pandas as pd
+import numpy as np
+import csv
+import gzip
+import io
+import itertools
+import mmap
+import os
+import shutil
+import zipfile
+from typing import BinaryIO, Dict, Iterable, List, Optional, TextIO, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional, only the arrow parser needs it
+    pa = None
+    pa_compute = None
+    pa_csv = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, only .zst files need it
+    zstandard = None
+
+try:
+    from .metrics import stage
+except ImportError:  # run as a script: python src/datacleaning.py
+    from metrics import stage
+
+
+# Upload column names -> names DataCleaner expects
+COLUMN_MAPPING = {
+    'FirstName': 'name',
+    'BirthDay': 'birth_day',
+    'BirthMonth': 'birth_month',
+    'BirthYear': 'birth_year'
+}
+
+# Strings pd.read_csv treats as missing by default
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null'
+]
+
+# Strings pd.read_csv reads as booleans (a column of only these becomes bool)
+TRUE_VALUES = ['True', 'TRUE', 'true']
+FALSE_VALUES = ['False', 'FALSE', 'false']
+
+PARSERS = ('pandas', 'arrow')
+
+# Dtype pd.read_csv gives text columns (object, or str from pandas 3)
+STRING_DTYPE = pd.Series(['text']).dtype
+
+# Bytes scanned per step when indexing record offsets
+SCAN_CHUNK_BYTES = 4 * 1024 * 1024
+
+# File suffix -> compression codec of compressed CSV files
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.zip': 'zip',
+    '.zst': 'zstd'
+}
+
+# Bytes copied per step when streaming a file through (de)compression
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class DecompressedSizeExceeded(ValueError):
+    
+    #A compressed upload expands past the allowed size (e.g. a decompression bomb).
+    
+    def __init__(self, limit: int):
+        super().__init__(f"File is larger than {limit} bytes once decompressed")
+        self.limit = limit
+
+
+def compression_of(filepath: str) -> Optional[str]:
+    """
+    Get the compression codec of a file from its suffix.
+    
+    Args:
+        filepath: File path or name
+    
+    Returns:
+        'gzip', 'zip' or 'zstd', or None for an uncompressed file
+    """
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(filepath)[1].lower())
+
+
+def strip_compression_suffix(filepath: str) -> str:
+    """
+    Remove the compression suffix from a file path, e.g. data.csv.gz -> data.csv.
+    """
+    if compression_of(filepath) is None:
+        return filepath
+    return os.path.splitext(filepath)[0]
+
+
+def is_csv_upload(filename: str) -> bool:
+    """
+    Check whether a file name is a CSV, either plain or compressed
+    (data.csv, data.csv.gz, data.csv.zst, or a zip archive holding a CSV).
+    """
+    if compression_of(filename) == 'zip':
+        return True
+    return strip_compression_suffix(filename).lower().endswith('.csv')
+
+
+def open_binary(source, codec: Optional[str] = None) -> BinaryIO:
+    """
+    Open a CSV file for reading, decompressing on the fly. Nothing is written
+    to disk: the decompressed bytes are produced as the stream is read.
+    Forward seeks work on every codec (by decompressing up to the target).
+    
+    Args:
+        source: File path, or a binary file object when codec is given
+        codec: Compression codec (inferred from the path when source is a path)
+    
+    Returns:
+        Binary file object yielding the uncompressed CSV bytes
+    """
+    if isinstance(source, (str, os.PathLike)):
+        codec = compression_of(os.fspath(source))
+    
+    if codec is None:
+        return open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    if codec == 'gzip':
+        return gzip.open(source, 'rb')
+    if codec == 'zip':
+        archive = zipfile.ZipFile(source)
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        if not members:
+            raise ValueError("Zip archive contains no files")
+        # The first CSV in the archive, or its first file when none is named .csv
+        member = next((info for info in members if info.filename.lower().endswith('.csv')), members[0])
+        return archive.open(member)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstandard is required for .zst files")
+        fileobj = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+        # Appends add frames, so reading must continue across them
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=True)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def open_text(filepath: str, encoding: str = 'utf-8', errors: str = 'strict') -> TextIO:
+    """
+    Open a (possibly compressed) CSV file as text for the csv module.
+    """
+    return io.TextIOWrapper(open_binary(filepath), encoding=encoding, errors=errors, newline='')
+
+
+def copy_limited(source: BinaryIO, target: Optional[BinaryIO], max_bytes: Optional[int] = None) -> int:
+    """
+    Copy a stream in chunks, stopping once more than max_bytes were read.
+    
+    Args:
+        source: Stream to read (e.g. a decompressing reader)
+        target: Stream to write to, or None to only count the bytes
+        max_bytes: Most bytes the source may yield; None or 0 for no limit
+    
+    Returns:
+        Number of bytes copied
+    
+    Raises:
+        DecompressedSizeExceeded: If the source yields more than max_bytes
+    """
+    copied = 0
+    while True:
+        chunk = source.read(COPY_CHUNK_BYTES)
+        if not chunk:
+            return copied
+        copied += len(chunk)
+        if max_bytes and copied > max_bytes:
+            raise DecompressedSizeExceeded(max_bytes)
+        if target is not None:
+            target.write(chunk)
+
+
+def save_raw_file(source: BinaryIO, filepath: str, keep_compressed: bool = False,
+                  max_bytes: Optional[int] = None) -> str:
+    """
+    Stream an uploaded file into the data folder. Compressed uploads are
+    decompressed on the fly unless keep_compressed is set, in which case
+    gzip and zstd uploads are stored as they are and plain or zip uploads
+    are gzip-compressed while being written. Zip is never stored, since
+    appends can't extend an archive member the way they add gzip members
+    or zstd frames.
+    
+    Args:
+        source: Binary stream of the upload
+        filepath: Destination path, named after the upload
+        keep_compressed: Store the raw file compressed
+        max_bytes: Most bytes the upload may decompress to; None or 0 for no limit
+    
+    Returns:
+        Path the file was written to (its suffix may differ from filepath)
+    
+    Raises:
+        DecompressedSizeExceeded: If the upload decompresses past max_bytes;
+            nothing is left on disk
+    """
+    codec = compression_of(filepath)
+    if keep_compressed and codec in ('gzip', 'zstd'):
+        with open(filepath, 'wb') as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_BYTES)
+        if max_bytes:
+            # Stored as it is, but it is decompressed whenever it is read
+            try:
+                with open_binary(filepath) as reader:
+                    copy_limited(reader, None, max_bytes)
+            except DecompressedSizeExceeded:
+                os.unlink(filepath)
+                raise
+        return filepath
+    
+    stored_path = strip_compression_suffix(filepath)
+    if codec == 'zip' and not stored_path.lower().endswith('.csv'):
+        stored_path += '.csv'
+    if keep_compressed:
+        stored_path += '.gz'
+    
+    try:
+        with open_binary(source, codec) as reader:
+            target = gzip.open(stored_path, 'wb') if keep_compressed else open(stored_path, 'wb')
+            with target:
+                copy_limited(reader, target, max_bytes)
+    except DecompressedSizeExceeded:
+        os.unlink(stored_path)
+        raise
+    return stored_path
+
+
+def append_raw_file(filepath: str, delta_filepath: str, max_bytes: Optional[int] = None):
+    """
+    Append a delta file's data lines (everything after its header) to a
+    raw dataset file. Either file may be compressed; a compressed dataset
+    gets a new gzip member or zstd frame, so nothing is rewritten.
+    
+    Args:
+        filepath: Raw dataset file to extend
+        delta_filepath: File whose data lines are appended
+        max_bytes: Most bytes the delta may decompress to; None or 0 for no limit
+    
+    Raises:
+        DecompressedSizeExceeded: If the delta decompresses past max_bytes;
+            the caller truncates the partly extended file
+    """
+    codec = compression_of(filepath)
+    if codec == 'zip':
+        raise ValueError("Cannot append to a zip archive")
+    
+    with open_binary(delta_filepath) as source:
+        source.readline()
+        if codec is None:
+            with open(filepath, 'rb+') as target:
+                target.seek(0, os.SEEK_END)
+                if target.tell() > 0:
+                    target.seek(-1, os.SEEK_END)
+                    if target.read(1) not in (b'\n', b'\r'):
+                        target.write(b'\n')
+                copy_limited(source, target, max_bytes)
+            return
+        
+        # Finding the last byte would mean decompressing the whole file, so
+        # always start on a new line; a resulting blank line is skipped by readers
+        if codec == 'gzip':
+            target = gzip.open(filepath, 'ab')
+        else:
+            if zstandard is None:
+                raise ImportError("zstandard is required for .zst files")
+            target = zstandard.ZstdCompressor().stream_writer(open(filepath, 'ab'), closefd=True)
+        with target:
+            target.write(b'\n')
+            copy_limited(source, target, max_bytes)
+
+
+def read_csv_file(filepath: str, parser: str = 'pandas') -> pd.DataFrame:
+    """
+    Read an upload CSV into a DataFrame. gzip, zip and zstd files are
+    decompressed as they are parsed.
+    
+    The 'pandas' parser is plain pd.read_csv. The 'arrow' parser uses the
+    multi-threaded pyarrow CSV reader with every column declared as string,
+    then coerces columns the way pd.read_csv infers them, so both parsers
+    return identical frames. Files the Arrow reader rejects (e.g. rows with
+    extra fields, which pd.read_csv shifts into the index) and columns of
+    integers past int64 (which pd.read_csv reads as uint64 or Python ints)
+    are read with pd.read_csv instead.
+    
+    Args:
+        filepath: Path to the CSV file (optionally .gz, .zip or .zst)
+        parser: 'pandas' or 'arrow'
+    
+    Returns:
+        DataFrame with the file's original column names
+    """
+    with stage('parse', nbytes=os.path.getsize(filepath)) as timing:
+        df = _read_csv_file(filepath, parser)
+        timing.rows = len(df)
+    return df
+
+
+def _read_csv_file(filepath: str, parser: str) -> pd.DataFrame:
+    if parser == 'pandas':
+        with open_binary(filepath) as f:
+            return pd.read_csv(f)
+    if parser != 'arrow':
+        raise ValueError(f"Unknown CSV parser: {parser}")
+    if pa_csv is None:
+        raise ImportError("pyarrow is required for the arrow CSV parser")
+    
+    # Explicit all-string schema: junk in numeric columns can't derail inference
+    column_types = {column: pa.string() for column in read_header(filepath)}
+    codec = compression_of(filepath)
+    if codec in ('gzip', 'zstd') and pa.Codec.is_available(codec):
+        # Arrow decompresses natively while its reader threads parse
+        source = pa.input_stream(filepath, compression=codec)
+    else:
+        source = open_binary(filepath)
+    try:
+        with source:
+            table = pa_csv.read_csv(
+                source,
+                read_options=pa_csv.ReadOptions(use_threads=True),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=column_types,
+                    null_values=NA_VALUES,
+                    strings_can_be_null=True
+                )
+            )
+    except pa.ArrowInvalid:
+        # Ragged rows: pd.read_csv shifts extra fields into the index and pads short rows
+        return _read_csv_file(filepath, 'pandas')
+    
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        columns[name] = coerce_like_read_csv(column)
+        if columns[name] is None:
+            return _read_csv_file(filepath, 'pandas')
+    return pd.DataFrame(columns)
+
+
+def read_header(filepath: str, encoding: str = 'utf-8') -> List[str]:
+    """
+    Read the column names from the first line of a CSV file. Bytes that
+    aren't valid in the encoding are replaced, as they are for the rows.
+    
+    Args:
+        filepath: Path to the CSV file (optionally compressed)
+        encoding: Text encoding of the file
+    
+    Returns:
+        List of column names
+    """
+    with open_text(filepath, encoding, errors='replace') as f:
+        return next(csv.reader(f), [])
+
+
+def coerce_like_read_csv(column: 'pa.ChunkedArray') -> pd.Series:
+    """
+    Convert a column read as strings to the dtype pd.read_csv would infer.
+    The numeric casts run in Arrow compute, so no per-value Python work.
+    
+    Args:
+        column: Arrow string column with missing values as nulls
+    
+    Returns:
+        int64 when every value is an integer and none are missing, float64
+        when every value is numeric, bool when every value is True/False
+        (object with NaN for missing ones), otherwise the strings unchanged;
+        None for integers past int64, which pd.read_csv has to read itself
+    """
+    if column.null_count == len(column):
+        return pd.Series(float('nan'), index=pd.RangeIndex(len(column)), dtype='float64')
+    
+    is_true = pa_compute.is_in(column, value_set=pa.array(TRUE_VALUES))
+    is_false = pa_compute.is_in(column, value_set=pa.array(FALSE_VALUES))
+    if pa_compute.all(pa_compute.or_(pa_compute.or_(is_true, is_false), column.is_null())).as_py():
+        values = is_true.to_pandas()
+        if column.null_count == 0:
+            return values
+        return values.astype(object).mask(column.is_null().to_pandas(), float('nan'))
+    
+    trimmed = pa_compute.utf8_trim_whitespace(column)
+    for target in (pa.int64(), pa.float64()):
+        try:
+            numeric = pa_compute.cast(trimmed, target)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+        if target == pa.int64() and column.null_count == 0:
+            return numeric.to_pandas()
+        if target == pa.float64() and \
+                pa_compute.all(pa_compute.match_substring_regex(trimmed, r'^[+-]?[0-9]+$')).as_py():
+            # Integers that overflowed int64
+            return None
+        return numeric.to_pandas().astype('float64')
+    
+    values = column.to_pandas()
+    if values.dtype == object:
+        values = values.where(values.notna(), float('nan'))
+    return values.astype(STRING_DTYPE)
+
+
+def scan_record_starts(chunks: Iterable[bytes], offset: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Find where CSV records start, i.e. just after each newline outside quotes.
+    Quote state is tracked by parity across chunks, so quoted fields may
+    contain newlines. The scan assumes offset is outside any quoted field.
+    The chunks can come from a decompressing stream, so compressed files
+    are indexed without being decompressed to disk.
+    
+    Args:
+        chunks: Consecutive byte chunks of the file
+        offset: Offset of the first chunk in the (uncompressed) file
+    
+    Returns:
+        int64 array of record start offsets, a bool array marking the starts
+        whose preceding newline is part of a CRLF, and the offset the scan
+        stopped at
+    """
+    starts = []
+    crlf = []
+    in_quotes = 0
+    previous = 0
+    for chunk in chunks:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        if not len(data):
+            continue
+        quotes = data == ord('"')
+        newlines = np.flatnonzero(data == ord('\n'))
+        if quotes.any():
+            # Quote parity at every byte of the chunk
+            parity = np.bitwise_xor.accumulate(quotes.view(np.uint8)) ^ in_quotes
+            newlines = newlines[parity[newlines] == 0]
+            in_quotes = int(parity[-1])
+        elif in_quotes:
+            # The whole chunk lies inside a quoted field
+            newlines = newlines[:0]
+        # The byte before a newline at the chunk's start ended the previous chunk
+        before = np.where(newlines > 0, data[newlines - 1], previous)
+        starts.append(newlines.astype(np.int64) + offset + 1)
+        crlf.append(before == ord('\r'))
+        previous = int(data[-1])
+        offset += len(data)
+    
+    if not starts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), offset
+    return np.concatenate(starts), np.concatenate(crlf), offset
+
+
+class RawRowIndex:
+    
+    #Byte offsets of the data records in a raw CSV file, for random-access previews.
+    #For a compressed file the offsets are into the decompressed stream.
+    
+    # Defaults for indexes pickled before compressed files were supported
+    compression = None
+    stored_size = 0
+    
+    def __init__(self, filepath: str, encoding: str = 'utf-8'):
+        self.filepath = filepath
+        self.encoding = encoding
+        self.compression = compression_of(filepath)
+        self.header = read_header(filepath, encoding)
+        self.size = 0
+        self.stored_size = 0
+        self.offsets = np.empty(0, dtype=np.uint32)
+        self.extend()
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def extend(self):
+        """
+        Index records appended to the file since the last scan. Only the new
+        bytes are scanned (a compressed file is decompressed up to them first,
+        as streams can only seek by reading forward).
+        """
+        stored_size = os.path.getsize(self.filepath)
+        if stored_size == self.stored_size:
+            return
+        
+        with open_binary(self.filepath) as f:
+            # On the first scan the first record is the header
+            begin = self.size
+            chunks = iter(lambda: f.read(SCAN_CHUNK_BYTES), b'')
+            if begin > 0:
+                # Include the old final newline so the first new record is found
+                # (streams can't seek backwards, so it is re-read going forward)
+                f.seek(begin - 1)
+                last = f.read(1)
+                if last == b'\n':
+                    begin -= 1
+                    chunks = itertools.chain([last], chunks)
+            starts, crlf, size = scan_record_starts(chunks, begin)
+        
+        # Drop blank lines (and the empty record after a final newline), which csv readers skip
+        ends = np.append(starts[1:], size)
+        lengths = ends - starts
+        blank = (lengths <= 1) | ((lengths == 2) & np.append(crlf[1:], False))
+        starts = starts[~blank]
+        
+        dtype = np.uint32 if size <= np.iinfo(np.uint32).max else np.uint64
+        self.offsets = np.concatenate([self.offsets.astype(dtype), starts.astype(dtype)])
+        self.size = size
+        self.stored_size = stored_size
+    
+    def read_rows(self, start: int, stop: int) -> List[Dict[str, str]]:
+        """
+        Parse a range of data records straight from the file: through a
+        memory map for an uncompressed file, or by decompressing up to the
+        range for a compressed one.
+        
+        Args:
+            start: First record number
+            stop: Record number to stop before
+        
+        Returns:
+            List of row dictionaries keyed by the header's column names
+        """
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return []
+        
+        begin = int(self.offsets[start])
+        end = int(self.offsets[stop]) if stop < len(self) else self.size
+        if self.compression is None:
+            with open(self.filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[begin:end]
+        else:
+            with open_binary(self.filepath) as f:
+                f.seek(begin)
+                data = f.read(end - begin)
+        text = data.decode(self.encoding, errors='replace')
+        return list(csv.DictReader(io.StringIO(text, newline=''), fieldnames=self.header))
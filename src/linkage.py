@@ -0,0 +1,225 @@
+#import packages
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple
+
+from .datacleaning import row_ids_to_text
+from .duplicates import DUPLICATE_FIELD_PAIRS
+
+# Linkage keys: the whole record (same person) plus each duplicate field pair, named as /api/duplicates pairs
+LINKAGE_KEYS = {
+    'record': ('name', 'birth_day', 'birth_month', 'birth_year'),
+    **{','.join(fields): fields for fields in DUPLICATE_FIELD_PAIRS}
+}
+
+# Cross-dataset groups described in full per key; the rest are only counted
+LINKAGE_PREVIEW_GROUPS = 20
+
+
+def key_hashes(included_df: pd.DataFrame, fields: Tuple[str, ...]) -> np.ndarray:
+    """
+    Hash each row's values of some fields to 64 bits. Hashes depend only on
+    the values, not on dtypes (categorical vs plain names, uint8 vs int64
+    numbers), so they can be compared across datasets and sessions.
+    
+    Args:
+        included_df: Included rows (plain or compact)
+        fields: Fields making up the key
+    
+    Returns:
+        uint64 array aligned with the rows
+    """
+    columns = {}
+    for field in fields:
+        column = included_df[field]
+        if field == 'name':
+            # Hashing a categorical hashes its categories once, then takes codes
+            columns[field] = column if isinstance(column.dtype, pd.CategoricalDtype) else column.astype('category')
+        else:
+            columns[field] = column.astype('int64')
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+class LinkageIndex:
+    
+    #Sorted 64-bit hashes of every linkage key of a dataset's included rows.
+    #Datasets are joined through these indexes, never through their frames.
+    
+    def __init__(self):
+        self.row_count = 0
+        self.hashes = {key: np.empty(0, dtype=np.uint64) for key in LINKAGE_KEYS}     # sorted
+        self.positions = {key: np.empty(0, dtype=np.int32) for key in LINKAGE_KEYS}   # row of each hash
+    
+    @classmethod
+    def from_frame(cls, included_df: pd.DataFrame) -> 'LinkageIndex':
+        """
+        Build the index for a cleaned dataset.
+        
+        Args:
+            included_df: Included rows (plain or compact)
+        
+        Returns:
+            LinkageIndex over the rows
+        """
+        index = cls()
+        index.extend(included_df)
+        return index
+    
+    def extend(self, included_df: pd.DataFrame):
+        """
+        Index rows appended to the included frame. Only the new rows are hashed.
+        
+        Args:
+            included_df: New included rows, appended after the rows already indexed
+        """
+        if included_df is None or included_df.empty:
+            return
+        
+        if self.row_count + len(included_df) > np.iinfo(np.int32).max:
+            raise ValueError("Linkage indexes hold at most 2**31 - 1 rows")
+        new_positions = np.arange(self.row_count, self.row_count + len(included_df), dtype=np.int32)
+        for key, fields in LINKAGE_KEYS.items():
+            hashes = np.concatenate([self.hashes[key], key_hashes(included_df, fields)])
+            positions = np.concatenate([self.positions[key], new_positions])
+            # Stable, so rows with equal hashes stay in frame order
+            order = np.argsort(hashes, kind='stable')
+            self.hashes[key] = hashes[order]
+            self.positions[key] = positions[order]
+        self.row_count += len(included_df)
+
+
+def find_links(indexes: List[LinkageIndex], key: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the groups of rows sharing a key value that span several datasets.
+    Cost is a sort of the datasets' combined hashes, so it scales with the
+    sum of their sizes.
+    
+    Args:
+        indexes: Linkage indexes of the datasets to join
+        key: One of LINKAGE_KEYS
+    
+    Returns:
+        Tuple of (offsets, dataset_numbers, positions): group i's rows are
+        entries offsets[i]:offsets[i + 1] of the other two arrays, ordered
+        by dataset and then by row
+    """
+    hashes = np.concatenate([index.hashes[key] for index in indexes])
+    positions = np.concatenate([index.positions[key] for index in indexes])
+    dataset_numbers = np.repeat(np.arange(len(indexes), dtype=np.int32), [len(index.hashes[key]) for index in indexes])
+    if len(hashes) == 0:
+        return np.zeros(1, dtype=np.int64), dataset_numbers, positions
+    
+    # Each index is sorted already; the stable sort keeps dataset order within equal hashes
+    order = np.argsort(hashes, kind='stable')
+    hashes, positions, dataset_numbers = hashes[order], positions[order], dataset_numbers[order]
+    
+    starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+    ends = np.r_[starts[1:], len(hashes)]
+    # A run of equal hashes links datasets when it holds more than one dataset number
+    cross = np.minimum.reduceat(dataset_numbers, starts) != np.maximum.reduceat(dataset_numbers, starts)
+    starts, ends = starts[cross], ends[cross]
+    
+    lengths = ends - starts
+    offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    rows = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+    return offsets, dataset_numbers[rows], positions[rows]
+
+
+def dataset_overlaps(offsets: np.ndarray, dataset_numbers: np.ndarray,
+                     dataset_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count the datasets each group touches and the groups each pair of datasets
+    shares, from the sparse (group, dataset) pairs of find_links. Memory
+    scales with the groups, not with groups times datasets.
+    
+    Args:
+        offsets: Group offsets from find_links
+        dataset_numbers: Dataset of each group row from find_links (ordered by dataset within a group)
+        dataset_count: Number of datasets joined
+    
+    Returns:
+        Tuple of (datasets per group, dataset_count x dataset_count matrix
+        whose entry [a, b] with a < b counts the groups datasets a and b share)
+    """
+    group_count = len(offsets) - 1
+    group_of_row = np.repeat(np.arange(group_count), np.diff(offsets))
+    # Rows are ordered by dataset within a group, so each (group, dataset) pair starts a run
+    first = np.r_[True, (group_of_row[1:] != group_of_row[:-1]) | (dataset_numbers[1:] != dataset_numbers[:-1])]
+    pair_groups = group_of_row[first[:len(group_of_row)]]
+    pair_datasets = dataset_numbers[first[:len(group_of_row)]].astype(np.int64)
+    group_datasets = np.bincount(pair_groups, minlength=group_count)
+    
+    # Pair every dataset of a group with each later dataset of the same group
+    group_starts = np.cumsum(group_datasets) - group_datasets
+    later = group_datasets[pair_groups] - (np.arange(len(pair_groups)) - group_starts[pair_groups]) - 1
+    left = np.repeat(np.arange(len(pair_groups)), later)
+    right = left + 1 + np.arange(len(left)) - np.repeat(np.cumsum(later) - later, later)
+    shared = np.bincount(pair_datasets[left] * dataset_count + pair_datasets[right],
+                         minlength=dataset_count * dataset_count)
+    return group_datasets, shared.reshape(dataset_count, dataset_count)
+
+
+def linkage_report(dataset_ids: List[str], indexes: List[LinkageIndex], frames: List[pd.DataFrame],
+                   keys: List[str] = None, preview_groups: int = LINKAGE_PREVIEW_GROUPS) -> Dict:
+    """
+    Report which records and field-pair keys appear in several datasets.
+    
+    Args:
+        dataset_ids: Names of the datasets, aligned with indexes and frames
+        indexes: Each dataset's LinkageIndex
+        frames: Each dataset's included rows, only read for the preview groups
+        keys: Linkage keys to report (all of LINKAGE_KEYS by default)
+        preview_groups: Groups per key described with their values and row ids
+    
+    Returns:
+        Dictionary with, per key, the number of cross-dataset groups and
+        rows, the values shared by each pair of datasets, and preview groups
+    """
+    report = {
+        'datasets': list(dataset_ids),
+        'row_counts': {dataset_id: index.row_count for dataset_id, index in zip(dataset_ids, indexes)},
+        'keys': {}
+    }
+    for key in keys or LINKAGE_KEYS:
+        fields = LINKAGE_KEYS[key]
+        offsets, dataset_numbers, positions = find_links(indexes, key)
+        group_count = len(offsets) - 1
+        
+        group_datasets, shared = dataset_overlaps(offsets, dataset_numbers, len(indexes))
+        overlaps = [
+            {'datasets': [dataset_ids[a], dataset_ids[b]], 'shared_values': int(shared[a, b])}
+            for a in range(len(indexes)) for b in range(a + 1, len(indexes)) if shared[a, b]
+        ]
+        
+        groups = []
+        for i in range(min(group_count, preview_groups)):
+            members = slice(offsets[i], offsets[i + 1])
+            first = frames[dataset_numbers[members][0]].iloc[positions[members][0]]
+            rows_by_dataset = {}
+            for number in np.unique(dataset_numbers[members]):
+                in_dataset = positions[members][dataset_numbers[members] == number]
+                row_ids = row_ids_to_text(frames[number]['row_id'].iloc[in_dataset])
+                rows_by_dataset[dataset_ids[number]] = row_ids.tolist()
+            groups.append({
+                'matching_fields': list(fields),
+                'matching_values': {field: _plain(first[field]) for field in fields},
+                'count': int(offsets[i + 1] - offsets[i]),
+                'row_ids': rows_by_dataset
+            })
+        
+        report['keys'][key] = {
+            'matching_fields': list(fields),
+            'total_groups': group_count,
+            'total_records': int(offsets[-1]),
+            'datasets_per_group': {str(count): int(total) for count, total in
+                                   zip(*np.unique(group_datasets, return_counts=True))},
+            'overlaps': overlaps,
+            'groups': groups
+        }
+    return report
+
+
+def _plain(value):
+    """Convert a numpy scalar to the matching Python value"""
+    return value.item() if hasattr(value, 'item') else value
@@ -0,0 +1,374 @@
+#import packages
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the ledger is then only shared by this process's threads
+    fcntl = None
+
+# Peak memory per row of the dataset, measured on 10^5-10^6 row uploads with
+# benchmarks/run.py (the raw strings, the cleaned and compact frames, the
+# display dicts and the pickle buffer are all alive at once), plus ~20% margin.
+# Re-cleaning and appending include loading the stored dataset.
+JOB_BYTES_PER_ROW = {
+    'clean': 1200,
+    'reclean': 2000,
+    'append': 1300
+}
+
+# Peak memory per byte of raw CSV, for jobs whose row count is not known yet
+JOB_BYTES_PER_INPUT_BYTE = 75
+
+# Interpreter, imports and buffers every job needs regardless of its size
+JOB_BASE_BYTES = 16 * 1024 * 1024
+
+# Jobs wait this long for memory to be released before they are rejected
+QUEUE_TIMEOUT_SECONDS = 60
+
+# Jobs waiting beyond this many are rejected right away
+MAX_QUEUED_JOBS = 16
+
+# Seconds between checks of the ledger while queued
+POLL_INTERVAL = 0.25
+
+# Entries sized per container when measuring statistics; larger containers are extrapolated
+SAMPLE_ITEMS = 1000
+
+LEDGER_FILENAME = 'memory_ledger.json'
+LOCK_FILENAME = '.memory.lock'
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    
+    #A job was rejected: it is larger than the budget, the queue is full, or it waited too long.
+    
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after  # seconds worth waiting before retrying, None when retrying can't help
+
+
+class MemoryBudget:
+    
+    #Admission control for memory-heavy jobs (uploads, cleans, appends). A job
+    #reserves its estimated peak memory in a ledger file shared by all worker
+    #processes; jobs that don't fit wait in FIFO order until enough is released,
+    #and are rejected when they can never fit, the queue is full or they time out.
+    
+    def __init__(self, state_dir: str, budget_bytes: int = 0, queue_timeout: float = QUEUE_TIMEOUT_SECONDS,
+                 max_queued: int = MAX_QUEUED_JOBS, poll_interval: float = POLL_INTERVAL):
+        self.state_dir = state_dir
+        self.budget_bytes = budget_bytes  # 0: unlimited (reservations are still accounted)
+        self.queue_timeout = queue_timeout
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        os.makedirs(state_dir, exist_ok=True)
+    
+    def reserve(self, job: str, nbytes: int, dataset_id: str = None) -> str:
+        """
+        Reserve memory for a job, waiting in the queue while it doesn't fit.
+        
+        Args:
+            job: Kind of job, e.g. 'clean'
+            nbytes: Estimated peak memory of the job
+            dataset_id: Dataset the job works on
+        
+        Returns:
+            Reservation key, to pass to release()
+        
+        Raises:
+            MemoryBudgetExceeded: The job was rejected
+        """
+        key = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        entry = {'job': job, 'dataset_id': dataset_id, 'bytes': int(nbytes), 'pid': os.getpid(), 'since': time.time()}
+        with self._ledger() as ledger:
+            if self.budget_bytes and nbytes > self.budget_bytes:
+                ledger['counters']['rejected'] += 1
+                raise MemoryBudgetExceeded(
+                    f"{job} of {dataset_id} needs about {_megabytes(nbytes)} MB, "
+                    f"more than the whole {_megabytes(self.budget_bytes)} MB memory budget")
+            if self._can_admit(ledger, key, nbytes, queued=False):
+                ledger['reservations'][key] = dict(entry, state='admitted')
+                ledger['counters']['admitted'] += 1
+                return key
+            if self._queued(ledger) >= self.max_queued:
+                ledger['counters']['rejected'] += 1
+                raise MemoryBudgetExceeded(f"{job} of {dataset_id} rejected: {self.max_queued} jobs are already "
+                                           f"waiting for memory", retry_after=int(self.queue_timeout))
+            ledger['reservations'][key] = dict(entry, state='queued')
+            ledger['counters']['queued'] += 1
+        
+        logging.info(f"Queued {job} of {dataset_id} for {_megabytes(nbytes)} MB of memory")
+        deadline = time.time() + self.queue_timeout
+        while True:
+            time.sleep(self.poll_interval)
+            with self._ledger() as ledger:
+                if key not in ledger['reservations']:
+                    # Dropped by another process (e.g. the ledger was reset); queue again
+                    ledger['reservations'][key] = dict(entry, state='queued')
+                if self._can_admit(ledger, key, nbytes, queued=True):
+                    ledger['reservations'][key]['state'] = 'admitted'
+                    ledger['counters']['admitted'] += 1
+                    logging.info(f"Admitted {job} of {dataset_id} after {time.time() - entry['since']:.1f}s in the queue")
+                    return key
+                if time.time() >= deadline:
+                    del ledger['reservations'][key]
+                    ledger['counters']['rejected'] += 1
+                    raise MemoryBudgetExceeded(f"{job} of {dataset_id} waited {self.queue_timeout:.0f}s for "
+                                               f"{_megabytes(nbytes)} MB of memory", retry_after=int(self.queue_timeout))
+    
+    def release(self, key: str):
+        """Return a job's reservation to the budget"""
+        with self._ledger() as ledger:
+            ledger['reservations'].pop(key, None)
+    
+    @contextmanager
+    def admit(self, job: str, nbytes: int, dataset_id: str = None):
+        """Hold a reservation for the enclosed block (see reserve)"""
+        key = self.reserve(job, nbytes, dataset_id)
+        try:
+            yield key
+        finally:
+            self.release(key)
+    
+    def record_footprint(self, dataset_id: str, footprint: Dict[str, int]):
+        """Store a dataset's in-memory size, as measured by dataset_footprint()"""
+        with self._ledger() as ledger:
+            ledger['footprints'][dataset_id] = footprint
+    
+    def forget(self, dataset_id: str):
+        """Drop a deleted dataset's footprint"""
+        with self._ledger() as ledger:
+            ledger['footprints'].pop(dataset_id, None)
+    
+    def metrics(self) -> Dict:
+        """
+        Current accounting.
+        
+        Returns:
+            Dictionary with the budget, bytes reserved by admitted jobs, queued
+            jobs and bytes, admission counters, the jobs themselves, and the
+            footprint of every dataset
+        """
+        with self._ledger() as ledger:
+            reservations = ledger['reservations']
+            footprints = ledger['footprints']
+            admitted = [entry for entry in reservations.values() if entry['state'] == 'admitted']
+            queued = [entry for entry in reservations.values() if entry['state'] == 'queued']
+            return {
+                'budget_bytes': self.budget_bytes,
+                'reserved_bytes': sum(entry['bytes'] for entry in admitted),
+                'running_jobs': len(admitted),
+                'queued_jobs': len(queued),
+                'queued_bytes': sum(entry['bytes'] for entry in queued),
+                **ledger['counters'],
+                'jobs': sorted(reservations.values(), key=lambda entry: entry['since']),
+                'datasets': len(footprints),
+                'dataset_bytes': sum(footprint.get('total', 0) for footprint in footprints.values()),
+                'footprints': footprints
+            }
+    
+    def _can_admit(self, ledger: Dict, key: str, nbytes: int, queued: bool) -> bool:
+        """Whether a job fits now without overtaking a job queued before it"""
+        reservations = ledger['reservations']
+        waiting = sorted((entry['since'], other) for other, entry in reservations.items() if entry['state'] == 'queued')
+        if queued:
+            if waiting and waiting[0][1] != key:
+                return False
+        elif waiting:
+            return False
+        if not self.budget_bytes:
+            return True
+        reserved = sum(entry['bytes'] for entry in reservations.values() if entry['state'] == 'admitted')
+        return reserved + nbytes <= self.budget_bytes
+    
+    @staticmethod
+    def _queued(ledger: Dict) -> int:
+        return sum(1 for entry in ledger['reservations'].values() if entry['state'] == 'queued')
+    
+    @contextmanager
+    def _ledger(self):
+        """Read-modify-write the ledger under an exclusive lock, dropping jobs of processes that died"""
+        path = os.path.join(self.state_dir, LEDGER_FILENAME)
+        with self._lock, _FileLock(os.path.join(self.state_dir, LOCK_FILENAME)):
+            ledger = {'reservations': {}, 'footprints': {}, 'counters': {}}
+            try:
+                with open(path, 'r') as f:
+                    ledger.update(json.load(f))
+            except (FileNotFoundError, ValueError):
+                pass
+            for counter in ('admitted', 'queued', 'rejected'):
+                ledger['counters'].setdefault(counter, 0)
+            ledger['reservations'] = {key: entry for key, entry in ledger['reservations'].items()
+                                      if _process_alive(entry['pid'])}
+            try:
+                yield ledger
+            finally:
+                staging = f"{path}.{os.getpid()}.tmp"
+                with open(staging, 'w') as f:
+                    json.dump(ledger, f)
+                os.replace(staging, path)
+
+
+class _FileLock:
+    
+    #Blocking exclusive lock file shared by the worker processes.
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+    
+    def __enter__(self):
+        if fcntl is not None:
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def estimate_job_bytes(job: str, rows: Optional[int] = None, nbytes: int = 0, new_bytes: int = 0) -> int:
+    """
+    Estimate the peak memory of a job.
+    
+    Args:
+        job: 'clean', 'reclean' or 'append'
+        rows: Rows of the dataset (None to estimate from nbytes)
+        nbytes: Raw CSV bytes, used when the row count is unknown
+        new_bytes: Raw CSV bytes added by an append, cleaned on top of the loaded dataset
+    
+    Returns:
+        Estimated peak bytes
+    """
+    if rows is None:
+        estimate = nbytes * JOB_BYTES_PER_INPUT_BYTE
+    else:
+        estimate = rows * JOB_BYTES_PER_ROW[job]
+    return JOB_BASE_BYTES + estimate + new_bytes * JOB_BYTES_PER_INPUT_BYTE
+
+
+def dataset_footprint(metadata: Dict) -> Dict[str, int]:
+    """
+    Measure how much memory a loaded dataset holds.
+    
+    Args:
+        metadata: Dataset metadata as loaded from the cache
+    
+    Returns:
+        Bytes per component ('frames', 'indexes', 'statistics') and 'total'
+    """
+    frames = 0
+    for key in ('included_df', 'excluded_df'):
+        if metadata.get(key) is not None:
+            frames += int(metadata[key].memory_usage(index=True, deep=True).sum())
+    indexes = sum(_array_bytes(metadata.get(key)) for key in ('raw_index', 'row_index'))
+    # Incremental statistics, plus summary sections and duplicate groups the
+    # summary has computed; the frames it references are counted above
+    seen = {id(metadata.get(key)) for key in ('included_df', 'excluded_df')}
+    statistics = _object_bytes(metadata.get('stats_state'), seen) + _object_bytes(metadata.get('summary_stats'), seen)
+    return {
+        'frames': frames,
+        'indexes': indexes,
+        'statistics': statistics,
+        'total': frames + indexes + statistics
+    }
+
+
+def default_budget_bytes(fraction: float = 0.5) -> int:
+    """A fraction of physical memory, or 0 (unlimited) where it can't be determined"""
+    try:
+        return int(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') * fraction)
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+def _array_bytes(obj, depth: int = 3) -> int:
+    """Bytes of the arrays an index object holds (attributes, dicts, lists and tuples are followed)"""
+    if obj is None or depth < 0:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.Index, pd.Series)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, dict):
+        return sum(_array_bytes(value, depth - 1) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_array_bytes(value, depth - 1) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return _array_bytes(vars(obj), depth)
+    return 0
+
+
+def _object_bytes(obj, seen: set) -> int:
+    """
+    Approximate deep size of an object of plain containers and arrays, each
+    object counted once. Containers with more than SAMPLE_ITEMS entries are
+    extrapolated from their first entries, so measuring stays cheap.
+    """
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.Index, pd.Series)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj
+    elif hasattr(obj, '__dict__'):
+        return size + _object_bytes(vars(obj), seen)
+    else:
+        return size
+    
+    sampled = 0
+    sample_bytes = 0
+    for item in items:
+        if sampled == SAMPLE_ITEMS:
+            break
+        sample_bytes += sum(_object_bytes(part, seen) for part in item) if isinstance(obj, dict) \
+            else _object_bytes(item, seen)
+        sampled += 1
+    if sampled:
+        size += sample_bytes * len(obj) // sampled
+    return size
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if fcntl is None:
+        # Without fcntl no other process shares the ledger (and os.kill(pid, 0) terminates on Windows)
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _megabytes(nbytes: int) -> int:
+    return int(round(nbytes / (1024 * 1024)))
@@ -0,0 +1,235 @@
+#import packages
+import math
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds, for pipeline stages and requests
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _Metric:
+    
+    #Base of the registry's metric types: one value (or bucket set) per label combination.
+    
+    kind = None
+    
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values = {}  # sorted (label, value) tuple -> value
+    
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> Tuple:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+    
+    def lines(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    
+    #Monotonic total, e.g. rows processed.
+    
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def lines(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    
+    #Value that is set rather than accumulated, e.g. bytes on disk.
+    
+    kind = 'gauge'
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def lines(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    
+    #Distribution of observations over fixed buckets, plus their sum and count.
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+    
+    def lines(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    
+    #Metrics of this process, rendered in the Prometheus text exposition format.
+    
+    def __init__(self):
+        self._metrics = {}
+    
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))
+    
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, help_text))
+    
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+    
+    def render(self) -> str:
+        """All metrics as Prometheus text (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram('datacleaning_stage_duration_seconds', 'Time spent in each pipeline stage')
+STAGE_ROWS = REGISTRY.counter('datacleaning_stage_rows_total', 'Rows processed by each pipeline stage')
+STAGE_BYTES = REGISTRY.counter('datacleaning_stage_bytes_total', 'Bytes read or written by each pipeline stage')
+STAGE_ERRORS = REGISTRY.counter('datacleaning_stage_errors_total', 'Pipeline stages that raised an exception')
+REQUEST_SECONDS = REGISTRY.histogram('datacleaning_http_request_duration_seconds', 'HTTP request latency')
+
+# Stage records of the current request (or upload job), when one is being collected
+_records = ContextVar('stage_records', default=None)
+
+
+class StageTiming:
+    
+    #One timed run of a pipeline stage; rows and bytes can be filled in while it runs.
+    
+    def __init__(self, name: str, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+        self.nbytes = nbytes
+        self.seconds = None
+        self.error = None
+    
+    def as_dict(self) -> Dict:
+        record = {'stage': self.name, 'seconds': round(self.seconds, 6)}
+        if self.rows is not None:
+            record['rows'] = int(self.rows)
+        if self.nbytes is not None:
+            record['bytes'] = int(self.nbytes)
+        if self.error is not None:
+            record['error'] = self.error
+        return record
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None, nbytes: Optional[int] = None):
+    """
+    Time a pipeline stage, recording its duration, rows and bytes.
+    
+    Args:
+        name: Stage name, e.g. 'parse' or 'summary:uniqueness'
+        rows: Rows processed, if known up front (or set on the yielded timing)
+        nbytes: Bytes read or written, if known up front (or set on the yielded timing)
+    
+    Yields:
+        StageTiming whose rows and nbytes can be set before the stage ends
+    """
+    timing = StageTiming(name, rows, nbytes)
+    started = time.perf_counter()
+    try:
+        yield timing
+    except BaseException as e:
+        timing.error = type(e).__name__
+        raise
+    finally:
+        timing.seconds = time.perf_counter() - started
+        record_stages([timing.as_dict()])
+
+
+def record_stages(records: List[Dict], collect: bool = True):
+    """
+    Add stage records to the metrics, e.g. records returned by a worker process.
+    
+    Args:
+        records: Dicts as produced by StageTiming.as_dict
+        collect: Also add them to the records being collected for this request
+    """
+    for record in records:
+        STAGE_SECONDS.observe(record['seconds'], stage=record['stage'])
+        if 'rows' in record:
+            STAGE_ROWS.inc(record['rows'], stage=record['stage'])
+        if 'bytes' in record:
+            STAGE_BYTES.inc(record['bytes'], stage=record['stage'])
+        if 'error' in record:
+            STAGE_ERRORS.inc(stage=record['stage'])
+    collected = _records.get()
+    if collect and collected is not None:
+        collected.extend(records)
+
+
+def start_collecting():
+    """Start collecting this context's stage records; returns a token for stop_collecting"""
+    return _records.set([])
+
+
+def stop_collecting(token) -> List[Dict]:
+    """
+    Stop collecting and return the stage records collected since start_collecting.
+    Collections nest: the records are also passed on to an enclosing collection.
+    """
+    records = _records.get() or []
+    _records.reset(token)
+    enclosing = _records.get()
+    if enclosing is not None:
+        enclosing.extend(records)
+    return records
+
+
+def _format_labels(key: Tuple) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,269 @@
+#import packages
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 'cprofile' traces every call (exact counts, top table from pstats);
+# 'sampling' only snapshots the stack every few milliseconds (low overhead)
+PROFILE_KINDS = ('cprofile', 'sampling')
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Functions listed in the top-functions table
+TOP_FUNCTIONS = 40
+
+# Report files written per run
+STACKS_FILENAME = 'stacks.folded'  # collapsed stacks, for flamegraph.pl / speedscope
+TOP_FILENAME = 'top.txt'
+REPORT_FILENAME = 'profile.json'
+PSTATS_FILENAME = 'profile.pstats'  # cprofile runs only, for snakeviz / pstats
+
+RUN_ID_PATTERN = re.compile(r'^\d{8}_\d{6}_[0-9a-f]{8}$')
+
+# cProfile can only trace one run per process at a time
+_cprofile_lock = threading.Lock()
+
+
+class StackSampler:
+    
+    #Samples one thread's Python stack in a background thread and counts collapsed stacks.
+    
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # root-to-leaf tuple of frame labels -> samples
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+
+class ProfileRun:
+    
+    #One profiled run: started, stopped, then written to <profile_dir>/<run_id>/.
+    
+    def __init__(self, profile_dir: str, kind: str = 'cprofile', label: str = None):
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"Unknown profile kind: {kind}")
+        self.profile_dir = profile_dir
+        self.kind = kind
+        self.label = label
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.seconds = None
+        self._profiler = None
+        self._sampler = None
+        self._started = None
+    
+    @property
+    def path(self) -> str:
+        return os.path.join(self.profile_dir, self.run_id)
+    
+    def start(self) -> bool:
+        """
+        Start profiling the calling thread.
+        
+        Returns:
+            False when a cprofile run is already active in this process (nothing is started)
+        """
+        if self.kind == 'cprofile':
+            if not _cprofile_lock.acquire(blocking=False):
+                return False
+            self._profiler = cProfile.Profile()
+        # Stacks are sampled for both kinds: cProfile records call edges, not whole stacks
+        self._sampler = StackSampler(threading.get_ident())
+        self._sampler.start()
+        self._started = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+        return True
+    
+    def stop(self) -> str:
+        """
+        Stop profiling and write the reports.
+        
+        Returns:
+            Directory holding the run's reports
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+        self.seconds = time.perf_counter() - self._started
+        self._sampler.stop()
+        return self.save()
+    
+    def save(self) -> str:
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, STACKS_FILENAME), 'w') as f:
+            for stack, count in sorted(self._sampler.stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+        
+        if self._profiler is not None:
+            self._profiler.dump_stats(os.path.join(self.path, PSTATS_FILENAME))
+            top = _pstats_top(self._profiler)
+        else:
+            top = _sampled_top(self._sampler)
+        with open(os.path.join(self.path, TOP_FILENAME), 'w') as f:
+            f.write(format_top(top, self.kind))
+        
+        report = {
+            'run_id': self.run_id,
+            'kind': self.kind,
+            'label': self.label,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(self.seconds, 6),
+            'samples': self._sampler.samples,
+            'top_functions': top
+        }
+        with open(os.path.join(self.path, REPORT_FILENAME), 'w') as f:
+            json.dump(report, f, indent=2)
+        return self.path
+
+
+@contextmanager
+def profile_run(profile_dir: str, kind: str = 'cprofile', label: str = None):
+    """
+    Profile the enclosed block and save its reports, even if the block raises.
+    
+    Args:
+        profile_dir: Directory the run's report directory is created in
+        kind: 'cprofile' or 'sampling'
+        label: What was profiled, e.g. the request path
+    
+    Yields:
+        The ProfileRun, or None when another cprofile run was active
+    """
+    run = ProfileRun(profile_dir, kind, label)
+    if not run.start():
+        yield None
+        return
+    try:
+        yield run
+    finally:
+        run.stop()
+
+
+def load_report(profile_dir: str, run_id: str) -> Optional[Dict]:
+    """
+    Load a saved run's report.
+    
+    Args:
+        profile_dir: Directory holding the runs
+        run_id: ID of the run
+    
+    Returns:
+        The run's profile.json contents, or None for an unknown run id
+    """
+    path = report_path(profile_dir, run_id, REPORT_FILENAME)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def report_path(profile_dir: str, run_id: str, filename: str) -> Optional[str]:
+    """Path of one of a run's report files, or None when run_id is not a valid run id"""
+    if not RUN_ID_PATTERN.match(run_id):
+        return None
+    return os.path.join(profile_dir, run_id, filename)
+
+
+def list_runs(profile_dir: str) -> List[Dict]:
+    """
+    Saved runs, newest first.
+    
+    Args:
+        profile_dir: Directory holding the runs
+    
+    Returns:
+        List of run summaries (report without the top-functions table)
+    """
+    runs = []
+    for run_id in sorted(os.listdir(profile_dir) if os.path.isdir(profile_dir) else [], reverse=True):
+        report = load_report(profile_dir, run_id)
+        if report is not None:
+            report.pop('top_functions', None)
+            runs.append(report)
+    return runs
+
+
+def format_top(top: List[Dict], kind: str) -> str:
+    """Top-functions table as aligned text"""
+    if kind == 'cprofile':
+        lines = [f"{'calls':>10} {'self s':>10} {'total s':>10}  function"]
+        lines += [f"{row['calls']:>10} {row['self_seconds']:>10.4f} {row['total_seconds']:>10.4f}  {row['function']}"
+                  for row in top]
+    else:
+        lines = [f"{'self %':>8} {'total %':>8}  function"]
+        lines += [f"{row['self_pct']:>8.1f} {row['total_pct']:>8.1f}  {row['function']}" for row in top]
+    return '\n'.join(lines) + '\n'
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames and ' ' the count in collapsed stacks
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ':')
+
+
+def _pstats_top(profiler: cProfile.Profile, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+    """Functions with the most time spent in them, from cProfile's statistics"""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, self_time, total_time, _) in stats.stats.items():
+        rows.append({
+            'function': f"{name} ({os.path.basename(filename)}:{line})",
+            'calls': calls,
+            'self_seconds': round(self_time, 6),
+            'total_seconds': round(total_time, 6)
+        })
+    rows.sort(key=lambda row: row['self_seconds'], reverse=True)
+    return rows[:limit]
+
+
+def _sampled_top(sampler: StackSampler, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+    """Functions seen most often at the top of (self) and anywhere in (total) the sampled stacks"""
+    self_counts = Counter()
+    total_counts = Counter()
+    for stack, count in sampler.stacks.items():
+        self_counts[stack[-1]] += count
+        for label in set(stack):
+            total_counts[label] += count
+    samples = max(sampler.samples, 1)
+    return [
+        {
+            'function': label,
+            'self_samples': self_counts[label],
+            'self_pct': round(self_counts[label] / samples * 100, 2),
+            'total_pct': round(total_counts[label] / samples * 100, 2)
+        }
+        for label, _ in sorted(total_counts.items(), key=lambda item: (self_counts[item[0]], item[1]), reverse=True)[:limit]
+    ]
@@ -0,0 +1,129 @@
+import uuid
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .datacleaning import row_id_bytes, to_display_frame
+
+
+class RowIdIndex:
+
+    #Sorted index from row_id to the record's location in the included/excluded frames.
+    
+    # Appended batches get their own index segment; past this many they are merged
+    MAX_SEGMENTS = 16
+    
+    def __init__(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        self.included_count = 0
+        self.excluded_count = 0
+        self._segments = []  # (table, offset, sorted S16 ids, int32 position of each id in the segment)
+        self.extend(included_df, excluded_df)
+    
+    def __setstate__(self, state: Dict):
+        # Indexes pickled before ids were kept sorted hold a pd.Index of bytes per segment
+        self.__dict__.update(state)
+        self._segments = [
+            segment if len(segment) == 4 else (segment[0], segment[1]) + _sorted_ids(_legacy_ids(segment[2]))
+            for segment in self._segments
+        ]
+    
+    def __len__(self) -> int:
+        return self.included_count + self.excluded_count
+    
+    def extend(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        """
+        Index rows appended after the rows already indexed. Only the new
+        rows are sorted, so the cost scales with the batch size.
+        
+        Args:
+            included_df: New included rows, appended to the included frame
+            excluded_df: New excluded rows, appended to the excluded frame
+        """
+        for table, df in (('included', included_df), ('excluded', excluded_df)):
+            if df is None or df.empty:
+                continue
+            offset = self.included_count if table == 'included' else self.excluded_count
+            self._segments.append((table, offset) + _sorted_ids(row_id_bytes(df['row_id'])))
+            if table == 'included':
+                self.included_count += len(df)
+            else:
+                self.excluded_count += len(df)
+        
+        if len(self._segments) > self.MAX_SEGMENTS:
+            merged = []
+            for table in ('included', 'excluded'):
+                segments = [segment for segment in self._segments if segment[0] == table]
+                if not segments:
+                    continue
+                ids = np.concatenate([ids for _, _, ids, _ in segments])
+                positions = np.concatenate([offset + positions.astype(np.int64) for _, offset, _, positions in segments])
+                order = np.argsort(ids, kind='stable')
+                merged.append((table, 0, ids[order], _positions(positions[order])))
+            self._segments = merged
+    
+    def locate(self, row_id: str) -> Optional[Tuple[str, int]]:
+        """
+        Find where a row lives.
+        
+        Args:
+            row_id: UUID string of the row
+            
+        Returns:
+            Tuple of (table, position) where table is 'included' or 'excluded',
+            or None if the row_id is unknown
+            
+        Raises:
+            ValueError: If row_id is not a valid UUID
+        """
+        key = np.frombuffer(uuid.UUID(row_id).bytes, dtype='S16')
+        for table, offset, ids, positions in self._segments:
+            # Duplicate ids should never happen; the first occurrence is reported
+            i = int(np.searchsorted(ids, key[0]))
+            if i < len(ids) and ids[i] == key[0]:
+                return table, int(offset + positions[i])
+        return None
+    
+    def lookup(self, row_id: str, included_df: pd.DataFrame, excluded_df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Fetch a single record by row_id.
+        
+        Args:
+            row_id: UUID string of the row
+            included_df: DataFrame of included rows the index was built from
+            excluded_df: DataFrame of excluded rows the index was built from
+            
+        Returns:
+            Dictionary with table, position and the display record, or None
+        """
+        location = self.locate(row_id)
+        if location is None:
+            return None
+        
+        table, position = location
+        frame = included_df if table == 'included' else excluded_df
+        record = to_display_frame(frame.iloc[position:position + 1]).to_dict('records')[0]
+        return {
+            'table': table,
+            'position': position,
+            'record': record
+        }
+
+
+def _sorted_ids(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """An S16 id array sorted for searchsorted, with each id's position in the input"""
+    order = np.argsort(ids, kind='stable')
+    return ids[order], _positions(order)
+
+
+def _positions(positions: np.ndarray) -> np.ndarray:
+    """Positions in the smallest integer dtype that holds them"""
+    return positions.astype(np.int32 if len(positions) <= np.iinfo(np.int32).max else np.int64)
+
+
+def _legacy_ids(index: pd.Index) -> np.ndarray:
+    """
+    S16 array of the ids of an old pd.Index segment. Some old indexes hold
+    ids with trailing NULs stripped, which padding to 16 bytes restores.
+    """
+    return np.array([key.ljust(16, b'\x00') for key in index], dtype='S16')
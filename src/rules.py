@@ -0,0 +1,368 @@
+#import packages
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, JSON rule files always work
+    yaml = None
+
+
+# The validation rules DataCleaner has always applied. Fields are validated in
+# this order, and within a field the first failing check supplies the reason.
+DEFAULT_RULES = {
+    'fields': [
+        {
+            'field': 'name',
+            'type': 'text',
+            'missing_reason': 'missing name',
+            'checks': [
+                {'check': 'min_length', 'value': 3, 'reason': 'name too short'},
+                {'check': 'pattern', 'value': r'^[A-Za-z ]+$', 'reason': 'special character in name'}
+            ]
+        },
+        {
+            'field': 'birth_day',
+            'type': 'integer',
+            'missing_reason': 'missing birth_day',
+            'not_integer_reason': 'invalid birth_day (not integer)',
+            'not_numeric_reason': 'invalid birth_day (not numeric)',
+            'checks': [
+                {'check': 'range', 'min': 1, 'max': 31, 'reason': 'invalid day (not 1-31)'}
+            ]
+        },
+        {
+            'field': 'birth_month',
+            'type': 'integer',
+            'missing_reason': 'missing birth_month',
+            'not_integer_reason': 'invalid birth_month (not integer)',
+            'not_numeric_reason': 'invalid birth_month (not numeric)',
+            'checks': [
+                {'check': 'range', 'min': 1, 'max': 12, 'reason': 'invalid month (not 1-12)'}
+            ]
+        },
+        {
+            'field': 'birth_year',
+            'type': 'integer',
+            'missing_reason': 'missing birth_year',
+            'not_integer_reason': 'invalid birth_year (not integer)',
+            'not_numeric_reason': 'invalid birth_year (not numeric)',
+            'checks': [
+                {'check': 'min', 'value': 1940, 'reason': 'Birth year older than 1940'}
+            ]
+        }
+    ]
+}
+
+# Checks that look at one value at a time; 'calendar_day' needs the whole row
+VALUE_CHECKS = {
+    'text': ('min_length', 'max_length', 'pattern'),
+    'integer': ('min', 'max', 'range')
+}
+ROW_CHECKS = ('calendar_day',)
+
+# Fields the cleaned frames are built from, and the type each must be validated as
+REQUIRED_FIELDS = {'name': 'text', 'birth_day': 'integer', 'birth_month': 'integer', 'birth_year': 'integer'}
+
+# Parameters each check takes, and the types allowed for them
+CHECK_PARAMETERS = {
+    'min_length': {'value': (int,)},
+    'max_length': {'value': (int,)},
+    'pattern': {'value': (str,)},
+    'min': {'value': (int, float)},
+    'max': {'value': (int, float)},
+    'range': {'min': (int, float), 'max': (int, float)},
+    'calendar_day': {}
+}
+
+# Compiled rule sets by content hash
+_compiled_rule_sets = {}
+
+
+def load_rules(filepath: str) -> Dict:
+    """
+    Load a rule configuration from a JSON or YAML file.
+
+    Args:
+        filepath: Path to a .json, .yaml or .yml file
+
+    Returns:
+        Rule configuration dictionary
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if os.path.splitext(filepath)[1].lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ImportError("PyYAML is required to load YAML rule files")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def rules_hash(config: Dict) -> str:
+    """
+    Hash a rule configuration by its canonical JSON form.
+
+    Args:
+        config: Rule configuration dictionary
+
+    Returns:
+        Hex digest of the configuration
+    """
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def compile_rules(config: Dict = None) -> 'RuleSet':
+    """
+    Compile a rule configuration, reusing an earlier compilation of the same rules.
+
+    Args:
+        config: Rule configuration (DEFAULT_RULES when None)
+
+    Returns:
+        Compiled RuleSet
+    """
+    if config is None:
+        config = DEFAULT_RULES
+    validate_rules(config)
+    digest = rules_hash(config)
+    if digest not in _compiled_rule_sets:
+        _compiled_rule_sets[digest] = RuleSet(config, digest)
+    return _compiled_rule_sets[digest]
+
+
+def validate_rules(config) -> None:
+    """
+    Check that a rule configuration has the structure RuleSet expects, e.g.
+    before applying one received from a client.
+
+    Args:
+        config: Rule configuration to check
+
+    Raises:
+        ValueError: Describing the first problem found
+    """
+    if not isinstance(config, dict) or not isinstance(config.get('fields'), list):
+        raise ValueError("Rules must be an object with a 'fields' list")
+
+    field_types = {}
+    for field_config in config['fields']:
+        if not isinstance(field_config, dict) or not isinstance(field_config.get('field'), str):
+            raise ValueError("Each field rule must be an object with a 'field' name")
+        field = field_config['field']
+        if field in field_types:
+            raise ValueError(f"Field {field} has more than one rule")
+        field_type = field_config.get('type', 'text')
+        if field_type not in VALUE_CHECKS:
+            raise ValueError(f"Unknown field type for {field}: {field_type}")
+        field_types[field] = field_type
+
+        reason_keys = ['missing_reason']
+        if field_type == 'integer':
+            reason_keys += ['not_integer_reason', 'not_numeric_reason']
+        for key in reason_keys:
+            if not isinstance(field_config.get(key), str):
+                raise ValueError(f"Field {field} needs a '{key}' text")
+
+        checks = field_config.get('checks', [])
+        if not isinstance(checks, list):
+            raise ValueError(f"Checks of {field} must be a list")
+        for check in checks:
+            if not isinstance(check, dict) or check.get('check') not in VALUE_CHECKS[field_type] + ROW_CHECKS:
+                name = check.get('check') if isinstance(check, dict) else check
+                raise ValueError(f"Unknown check for {field}: {name}")
+            if not isinstance(check.get('reason'), str):
+                raise ValueError(f"Check {check['check']} of {field} needs a 'reason' text")
+            for parameter, types in CHECK_PARAMETERS[check['check']].items():
+                value = check.get(parameter)
+                if isinstance(value, bool) or not isinstance(value, types):
+                    raise ValueError(f"Check {check['check']} of {field} needs '{parameter}' of type "
+                                     f"{' or '.join(kind.__name__ for kind in types)}")
+            if check['check'] == 'pattern':
+                try:
+                    re.compile(check['value'])
+                except re.error as e:
+                    raise ValueError(f"Invalid pattern for {field}: {e}")
+
+    for field, field_type in REQUIRED_FIELDS.items():
+        if field_types.get(field) != field_type:
+            raise ValueError(f"Rules must validate {field} as {field_type}")
+    for field_config in config['fields']:
+        for check in field_config.get('checks', []):
+            if check['check'] == 'calendar_day':
+                for key in ('field', 'month_field', 'year_field'):
+                    other = field_config['field'] if key == 'field' else check.get(key, f"birth_{key[:-6]}")
+                    if field_types.get(other) != 'integer':
+                        raise ValueError(f"calendar_day of {field_config['field']} needs integer field {other}")
+
+
+def _parse_float(value) -> float:
+    """Parse a value the way float() does, returning NaN when it is not numeric"""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return np.nan
+    return number if np.isfinite(number) else np.nan
+
+
+class RuleSet:
+
+    #Validation rules compiled to vectorized predicates with one reason bit each.
+
+    def __init__(self, config: Dict, digest: str):
+        self.digest = digest
+        self.field_rules = {}
+        self.row_checks = []
+        self.reasons = []
+
+        for field_config in config['fields']:
+            field = field_config['field']
+            field_type = field_config.get('type', 'text')
+            if field_type not in VALUE_CHECKS:
+                raise ValueError(f"Unknown field type for {field}: {field_type}")
+
+            # Reasons in catalog order: missing, parse failures, then checks
+            self._add_reason(field_config['missing_reason'])
+            if field_type == 'integer':
+                self._add_reason(field_config['not_integer_reason'])
+                self._add_reason(field_config['not_numeric_reason'])
+
+            value_checks = []
+            for check in field_config.get('checks', []):
+                self._add_reason(check['reason'])
+                if check['check'] in VALUE_CHECKS[field_type]:
+                    value_checks.append(check)
+                elif check['check'] in ROW_CHECKS:
+                    self.row_checks.append(dict(check, field=field))
+                else:
+                    raise ValueError(f"Unknown check for {field}: {check['check']}")
+
+            self.field_rules[field] = dict(field_config, type=field_type, checks=value_checks)
+
+        self.reason_bits = {reason: 1 << i for i, reason in enumerate(self.reasons)}
+        if len(self.reasons) <= 16:
+            self.flags_dtype = np.dtype('uint16')
+        elif len(self.reasons) <= 32:
+            self.flags_dtype = np.dtype('uint32')
+        elif len(self.reasons) <= 64:
+            self.flags_dtype = np.dtype('uint64')
+        else:
+            raise ValueError("A rule set can define at most 64 exclusion reasons")
+
+    def _add_reason(self, reason: str):
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    @property
+    def fields(self) -> List[str]:
+        """Fields in validation priority order"""
+        return list(self.field_rules)
+
+    def evaluate_values(self, field: str, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Validate values of one field.
+
+        Args:
+            field: Field name
+            values: Object array of raw values
+
+        Returns:
+            Tuple of (reason_flags, cleaned_values); cleaned values are None
+            where validation failed
+        """
+        rules = self.field_rules[field]
+        raw = pd.Series(values, dtype=object)
+        flags = np.zeros(len(raw), dtype=self.flags_dtype)
+
+        if rules['type'] == 'text':
+            text = raw.where(raw.isna(), raw.astype(str)).str.strip()
+            failed = (raw.isna() | (text == '')).to_numpy(dtype=bool, copy=True)
+            flags[failed] = self.reason_bits[rules['missing_reason']]
+
+            for check in rules['checks']:
+                if check['check'] == 'min_length':
+                    passes = text.str.len() >= check['value']
+                elif check['check'] == 'max_length':
+                    passes = text.str.len() <= check['value']
+                else:
+                    passes = text.str.match(check['value'])
+                newly_failed = ~failed & ~passes.fillna(False).to_numpy(dtype=bool)
+                flags[newly_failed] = self.reason_bits[check['reason']]
+                failed |= newly_failed
+
+            cleaned = text.to_numpy(dtype=object, copy=True)
+        else:
+            missing = raw.isna().to_numpy()
+            numbers = np.array([_parse_float(value) for value in raw], dtype='float64')
+            not_numeric = ~missing & np.isnan(numbers)
+            not_integer = ~missing & ~not_numeric & (numbers != np.floor(numbers))
+            flags[missing] = self.reason_bits[rules['missing_reason']]
+            flags[not_numeric] = self.reason_bits[rules['not_numeric_reason']]
+            flags[not_integer] = self.reason_bits[rules['not_integer_reason']]
+            failed = missing | not_numeric | not_integer
+
+            for check in rules['checks']:
+                if check['check'] == 'min':
+                    passes = numbers >= check['value']
+                elif check['check'] == 'max':
+                    passes = numbers <= check['value']
+                else:
+                    passes = (numbers >= check['min']) & (numbers <= check['max'])
+                newly_failed = ~failed & ~passes
+                flags[newly_failed] = self.reason_bits[check['reason']]
+                failed |= newly_failed
+
+            cleaned = np.empty(len(raw), dtype=object)
+            cleaned[~failed] = numbers[~failed].astype('int64').tolist()
+
+        cleaned[failed] = None
+        return flags, cleaned
+
+    def evaluate_rows(self, cleaned: Dict[str, np.ndarray], flags: np.ndarray) -> np.ndarray:
+        """
+        Apply checks that need several fields of the same row.
+
+        Args:
+            cleaned: Cleaned values per field, None where the field failed
+            flags: Reason flags from the per-field validation
+
+        Returns:
+            Additional reason flags per row
+        """
+        extra_flags = np.zeros(len(flags), dtype=self.flags_dtype)
+        for check in self.row_checks:
+            # calendar_day: the day must exist in the row's month and year
+            day_field = check['field']
+            month_field = check.get('month_field', 'birth_month')
+            year_field = check.get('year_field', 'birth_year')
+            day_failed = (flags & self._field_bits(day_field)) != 0
+            known = ~day_failed & ~((flags & (self._field_bits(month_field) | self._field_bits(year_field))) != 0)
+            if not known.any():
+                continue
+
+            dates = pd.to_datetime(pd.DataFrame({
+                'year': cleaned[year_field][known].astype('int64'),
+                'month': cleaned[month_field][known].astype('int64'),
+                'day': cleaned[day_field][known].astype('int64')
+            }), errors='coerce')
+            invalid = np.zeros(len(flags), dtype=bool)
+            invalid[known] = dates.isna().to_numpy()
+            extra_flags[invalid] |= self.reason_bits[check['reason']]
+            cleaned[day_field][invalid] = None
+        return extra_flags
+
+    def _field_bits(self, field: str) -> int:
+        """Combined bits of every reason a field can produce"""
+        rules = self.field_rules[field]
+        reasons = [rules['missing_reason']] + [check['reason'] for check in rules['checks']]
+        if rules['type'] == 'integer':
+            reasons += [rules['not_integer_reason'], rules['not_numeric_reason']]
+        reasons += [check['reason'] for check in self.row_checks if check['field'] == field]
+        bits = 0
+        for reason in reasons:
+            bits |= self.reason_bits[reason]
+        return bits
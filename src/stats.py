@@ -0,0 +1,573 @@
+#import packages
+import pandas as pd
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+from .datacleaning import (EXCLUSION_REASONS, SUMMARY_SECTIONS, DataCleaner, exclusion_catalog,
+                           reason_mask, sort_key, to_display_frame)
+from .duplicates import DUPLICATE_FIELD_PAIRS, DuplicateIndex
+from .metrics import stage
+
+# Groups listed in the stored duplicates section; the rest are paged from DuplicateGroups
+DUPLICATE_PREVIEW_GROUPS = 20
+
+DUPLICATE_SORT_ORDERS = ('report', 'size_desc', 'size_asc')
+
+
+class IncrementalStats:
+    
+    #Summary statistics kept as mergeable state so appended rows update them in place.
+    
+    def __init__(self, reasons: List[str] = EXCLUSION_REASONS, track_duplicates: bool = True):
+        self.original_count = 0
+        self.included_count = 0
+        self.excluded_count = 0
+        self.name_counts = {}  # name -> frequency, in order of first appearance
+        # Row counts per combination, so rows can be removed as well as added
+        self.birthdays = {}
+        self.name_years = {}
+        self.name_months = {}
+        self.name_days = {}
+        self.reasons = list(reasons)
+        self.reason_counts = [0] * len(self.reasons)
+        # Per-row duplicate groups; datasets leave them out, as they grow with the rows
+        self.duplicates = DuplicateIndex() if track_duplicates else None
+    
+    @classmethod
+    def from_frames(cls, included_df: pd.DataFrame, excluded_df: pd.DataFrame,
+                    original_count: int, track_duplicates: bool = True) -> 'IncrementalStats':
+        """
+        Build the state for an already cleaned dataset.
+        
+        Args:
+            included_df: DataFrame of included rows (plain or compact)
+            excluded_df: DataFrame of excluded rows (plain or compact)
+            original_count: Number of rows in the source data
+            track_duplicates: Also keep the duplicate groups (row ids per group)
+        
+        Returns:
+            IncrementalStats holding the dataset's statistics
+        """
+        stats = cls(exclusion_catalog(excluded_df), track_duplicates)
+        stats.update(included_df, excluded_df, original_count)
+        return stats
+    
+    def update(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame, original_count: int):
+        """
+        Fold newly cleaned rows into the statistics. Cost scales with the new rows.
+        
+        Args:
+            included_df: DataFrame of new included rows
+            excluded_df: DataFrame of new excluded rows
+            original_count: Number of new source rows
+        """
+        self.original_count += original_count
+        self.included_count += len(included_df)
+        self.excluded_count += len(excluded_df)
+        
+        self._count_included(included_df, 1)
+        self._count_reasons(excluded_df, 1)
+    
+    def remove(self, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        """
+        Take rows back out of the statistics, e.g. rows moved between the
+        included and excluded frames by a re-clean. Cost scales with the rows.
+        
+        Args:
+            included_df: Included rows to remove, as they were added
+            excluded_df: Excluded rows to remove, with the flags they were added with
+        """
+        self.included_count -= len(included_df)
+        self.excluded_count -= len(excluded_df)
+        self._count_included(included_df, -1)
+        self._count_reasons(excluded_df, -1)
+    
+    def merge(self, other: 'IncrementalStats'):
+        """
+        Fold another dataset's statistics into these, giving the statistics of
+        both datasets' rows together (as if other's rows were added by update).
+        Cost scales with other's distinct values and groups, not its rows.
+        
+        Args:
+            other: Statistics of rows whose ids don't overlap these rows' ids
+        """
+        self.original_count += other.original_count
+        self.included_count += other.included_count
+        self.excluded_count += other.excluded_count
+        
+        for mine, theirs in ((self.name_counts, other.name_counts),
+                             (self.birthdays, other.birthdays),
+                             (self.name_years, other.name_years),
+                             (self.name_months, other.name_months),
+                             (self.name_days, other.name_days)):
+            for key, count in theirs.items():
+                _add_count(mine, key, count)
+        
+        # Catalogs may differ; reasons are matched by name
+        for reason, count in zip(other.reasons, other.reason_counts):
+            if reason not in self.reasons:
+                self.reasons.append(reason)
+                self.reason_counts.append(0)
+            self.reason_counts[self.reasons.index(reason)] += count
+        
+        if self.duplicates is not None and other.duplicates is not None:
+            self.duplicates.merge(other.duplicates)
+        else:
+            self.duplicates = None
+    
+    def set_reasons(self, reasons: List[str]):
+        """
+        Switch to a new exclusion reason catalog. Counts of reasons kept by the
+        new catalog carry over; new reasons start at zero.
+        
+        Args:
+            reasons: New reason catalog
+        """
+        old_counts = dict(zip(self.reasons, self.reason_counts))
+        self.reasons = list(reasons)
+        self.reason_counts = [old_counts.get(reason, 0) for reason in self.reasons]
+    
+    def apply_reclean(self, result: Dict):
+        """
+        Patch the statistics after DataCleaner.reclean, touching only the
+        moved rows plus a recount of the reasons whose rules changed.
+        
+        Args:
+            result: Dictionary returned by DataCleaner.reclean
+        """
+        self.remove(result['removed_included'], result['removed_excluded'])
+        self.set_reasons(exclusion_catalog(result['excluded_df']))
+        self.update(result['added_included'], result['added_excluded'], 0)
+        
+        # Flags of rows that stayed excluded may have changed for these reasons
+        excluded_df = result['excluded_df']
+        for reason in result['changed_reasons']:
+            i = self.reasons.index(reason)
+            self.reason_counts[i] = 0 if excluded_df.empty else \
+                int(reason_mask(excluded_df['exclusion_flags'], reason, self.reasons).sum())
+    
+    def _count_included(self, included_df: pd.DataFrame, sign: int):
+        if included_df.empty:
+            return
+        rows = to_display_frame(included_df)
+        for name, count in rows['name'].value_counts(sort=False).items():
+            _add_count(self.name_counts, name, sign * int(count))
+        names = rows['name'].tolist()
+        days = rows['birth_day'].tolist()
+        months = rows['birth_month'].tolist()
+        years = rows['birth_year'].tolist()
+        for combinations, keys in ((self.birthdays, zip(days, months, years)),
+                                   (self.name_years, zip(names, years)),
+                                   (self.name_months, zip(names, months)),
+                                   (self.name_days, zip(names, days))):
+            for key in keys:
+                _add_count(combinations, key, sign)
+        if self.duplicates is None:
+            return
+        if sign > 0:
+            self.duplicates.add_rows(rows)
+        else:
+            self.duplicates.remove_rows(rows)
+    
+    def _count_reasons(self, excluded_df: pd.DataFrame, sign: int):
+        if excluded_df.empty:
+            return
+        flags = excluded_df['exclusion_flags']
+        for i, reason in enumerate(self.reasons):
+            self.reason_counts[i] += sign * int(reason_mask(flags, reason, self.reasons).sum())
+    
+    def calculate_top_80_names(self) -> Dict:
+        """
+        Calculate the top 80% most common names from the name frequencies.
+        
+        Returns:
+            Dictionary with top 80% names data, as DataCleaner.calculate_top_80_names
+        """
+        total_records = self.included_count
+        if total_records == 0:
+            return {
+                'total_records': 0,
+                'target_80_pct_count': 0,
+                'top_names_count': 0,
+                'top_names': [],
+                'coverage_pct': 0
+            }
+        
+        target_count = int(total_records * 0.8)
+        cumulative_count = 0
+        top_names = []
+        
+        # Stable sort keeps first-appearance order between equal frequencies
+        for name, frequency in sorted(self.name_counts.items(), key=lambda item: -item[1]):
+            cumulative_count += frequency
+            top_names.append({
+                'name': name,
+                'frequency': frequency,
+                'percentage': round((frequency / total_records) * 100, 2)
+            })
+            
+            if cumulative_count >= target_count:
+                break
+        
+        return {
+            'total_records': total_records,
+            'target_80_pct_count': target_count,
+            'actual_count': cumulative_count,
+            'top_names_count': len(top_names),
+            'top_names': top_names,
+            'coverage_pct': round((cumulative_count / total_records) * 100, 2)
+        }
+    
+    def section(self, section: str):
+        """
+        Get one section of the summary statistics.
+        
+        Args:
+            section: One of SUMMARY_SECTIONS
+            
+        Returns:
+            The section's value as DataCleaner.summary_section returns it
+        """
+        if section == 'dataset_sizes':
+            total_count = self.original_count
+            pct_included = (self.included_count / total_count * 100) if total_count > 0 else 0
+            pct_excluded = (self.excluded_count / total_count * 100) if total_count > 0 else 0
+            return {
+                'original_row_count': total_count,
+                'included_row_count': self.included_count,
+                'excluded_row_count': self.excluded_count,
+                'pct_included_vs_original': round(pct_included, 2),
+                'pct_excluded_vs_original': round(pct_excluded, 2)
+            }
+        if section == 'uniqueness':
+            return {
+                'total_unique_names': len(self.name_counts),
+                'unique_birthday_combinations': len(self.birthdays),
+                'unique_name_year_combinations': len(self.name_years),
+                'unique_name_month_combinations': len(self.name_months),
+                'unique_name_day_combinations': len(self.name_days)
+            }
+        if section == 'duplicates':
+            if self.duplicates is None:
+                raise ValueError("Duplicate groups are not tracked by these statistics")
+            return self.duplicates.summary()
+        if section == 'top_80_names':
+            return self.calculate_top_80_names()
+        if section == 'exclusion_reasons':
+            return [
+                {'reason': reason, 'count': count}
+                for reason, count in zip(self.reasons, self.reason_counts) if count > 0
+            ]
+        raise ValueError(f"Unknown summary section: {section}")
+    
+    def summary(self) -> Dict:
+        """
+        Get the summary statistics in the shape DataCleaner.get_summary_stats returns.
+        
+        Returns:
+            Dictionary with summary statistics
+        """
+        return {section: self.section(section) for section in SUMMARY_SECTIONS}
+
+
+class DuplicateGroups:
+    
+    #Duplicate groups stored as group keys plus offsets into one row-position array.
+    
+    # Default for groups pickled before the sort orders were kept
+    orders = None
+    
+    def __init__(self, pair_index: np.ndarray, offsets: np.ndarray, positions: np.ndarray, total_records: int,
+                 orders: List[np.ndarray] = None):
+        self.pair_index = pair_index  # uint8 index into DUPLICATE_FIELD_PAIRS per group
+        self.offsets = offsets        # group i's rows are positions[offsets[i]:offsets[i + 1]]
+        self.positions = positions    # row positions in the included frame
+        self.total_records = total_records
+        self.orders = orders          # per field pair, every row position sorted by the pair's values
+    
+    @classmethod
+    def from_frame(cls, included_df: pd.DataFrame) -> 'DuplicateGroups':
+        """
+        Find duplicate groups (at least 2 of 4 fields match) with vectorized sorts.
+        Groups come out in the order DataCleaner.find_duplicate_records reports them:
+        by field pair, then by matching values, skipping row sets already reported.
+        
+        Args:
+            included_df: Included rows (plain or compact)
+            
+        Returns:
+            DuplicateGroups for the frame
+        """
+        count = len(included_df)
+        if count == 0:
+            return cls(np.empty(0, dtype='uint8'), np.zeros(1, dtype='int64'), np.empty(0, dtype='int32'), 0)
+        
+        sort_keys = _duplicate_sort_keys(included_df)
+        row_positions = np.arange(count, dtype='int32')
+        orders, group_starts = [], []
+        for first, second in DUPLICATE_FIELD_PAIRS:
+            order = np.lexsort((row_positions, sort_keys[second], sort_keys[first])).astype('int32')
+            first_sorted, second_sorted = sort_keys[first][order], sort_keys[second][order]
+            new_group = np.ones(count, dtype=bool)
+            new_group[1:] = (first_sorted[1:] != first_sorted[:-1]) | (second_sorted[1:] != second_sorted[:-1])
+            orders.append(order)
+            group_starts.append(new_group)
+        return cls._from_orders(orders, group_starts)
+    
+    def extend(self, included_df: pd.DataFrame) -> 'DuplicateGroups':
+        """
+        Groups after rows were appended to the included frame. The new rows are
+        sorted on their own and merged into each pair's kept sort order, so the
+        full frame is never sorted again.
+        
+        Args:
+            included_df: The included frame with the new rows appended after
+                the rows these groups were found in
+            
+        Returns:
+            DuplicateGroups for the whole frame, the same as from_frame finds
+        """
+        if self.orders is None or len(self.orders[0]) == 0:
+            return DuplicateGroups.from_frame(included_df)
+        old_count = len(self.orders[0])
+        if len(included_df) == old_count:
+            return self
+        
+        sort_keys = _duplicate_sort_keys(included_df)
+        orders, group_starts = [], []
+        for (first, second), order in zip(DUPLICATE_FIELD_PAIRS, self.orders):
+            # One integer per row that sorts like the (first, second) values
+            first_key = sort_keys[first] - sort_keys[first].min()
+            second_key = sort_keys[second] - sort_keys[second].min()
+            width = int(second_key.max()) + 1
+            if int(first_key.max()) >= np.iinfo('int64').max // width:
+                return DuplicateGroups.from_frame(included_df)
+            keys = first_key * width + second_key
+            
+            new_order = np.argsort(keys[old_count:], kind='stable').astype('int32') + old_count
+            # Appended rows come after existing rows with the same values, as in a full sort
+            old_sorted = keys[order]
+            insert_at = np.searchsorted(old_sorted, keys[new_order], side='right')
+            sorted_keys = np.insert(old_sorted, insert_at, keys[new_order])
+            new_group = np.ones(len(sorted_keys), dtype=bool)
+            new_group[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            orders.append(np.insert(order, insert_at, new_order))
+            group_starts.append(new_group)
+        return DuplicateGroups._from_orders(orders, group_starts)
+    
+    @classmethod
+    def _from_orders(cls, orders: List[np.ndarray], group_starts: List[np.ndarray]) -> 'DuplicateGroups':
+        """Groups from each field pair's sort order of the rows and where its runs of equal values start"""
+        count = len(orders[0])
+        pair_parts, size_parts, position_parts = [], [], []
+        for pair_index, (order, new_group) in enumerate(zip(orders, group_starts)):
+            starts = np.flatnonzero(new_group)
+            sizes = np.diff(np.append(starts, count))
+            duplicated = sizes > 1
+            in_duplicate = np.repeat(duplicated, sizes)
+            pair_parts.append(np.full(int(duplicated.sum()), pair_index, dtype='uint8'))
+            size_parts.append(sizes[duplicated])
+            position_parts.append(order[in_duplicate])
+        
+        pair_index = np.concatenate(pair_parts)
+        sizes = np.concatenate(size_parts)
+        positions = np.concatenate(position_parts)
+        offsets = np.zeros(len(sizes) + 1, dtype='int64')
+        np.cumsum(sizes, out=offsets[1:])
+        
+        # Report each row set once: fingerprint groups by a sum of random row hashes
+        if len(sizes):
+            row_hashes = np.random.Generator(np.random.Philox(key=0)).integers(
+                0, np.iinfo('uint64').max, size=count, dtype='uint64', endpoint=True)
+            fingerprints = np.add.reduceat(row_hashes[positions], offsets[:-1])
+            keep = ~pd.DataFrame({'fingerprint': fingerprints, 'size': sizes}).duplicated().to_numpy()
+            if not keep.all():
+                pair_index, sizes = pair_index[keep], sizes[keep]
+                positions = positions[np.repeat(keep, np.diff(offsets))]
+                offsets = np.zeros(len(sizes) + 1, dtype='int64')
+                np.cumsum(sizes, out=offsets[1:])
+        
+        in_any_group = np.zeros(count, dtype=bool)
+        in_any_group[positions] = True
+        return cls(pair_index, offsets, positions, int(in_any_group.sum()), orders)
+    
+    def __len__(self) -> int:
+        return len(self.pair_index)
+    
+    @property
+    def sizes(self) -> np.ndarray:
+        """Number of rows in each group"""
+        return np.diff(self.offsets)
+    
+    def select(self, pair: Optional[tuple] = None, sort: str = 'report') -> np.ndarray:
+        """
+        Group numbers matching a field pair filter, in the requested order.
+        
+        Args:
+            pair: Matching fields, e.g. ('name', 'birth_year'); None for all pairs
+            sort: 'report' (pair, then values), 'size_desc' or 'size_asc'
+            
+        Returns:
+            Array of group numbers
+        """
+        if sort not in DUPLICATE_SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+        groups = np.arange(len(self))
+        if pair is not None:
+            groups = groups[self.pair_index == DUPLICATE_FIELD_PAIRS.index(tuple(pair))]
+        if sort == 'size_desc':
+            groups = groups[np.argsort(-self.sizes[groups], kind='stable')]
+        elif sort == 'size_asc':
+            groups = groups[np.argsort(self.sizes[groups], kind='stable')]
+        return groups
+    
+    def describe(self, groups: np.ndarray, included_df: pd.DataFrame) -> List[Dict]:
+        """
+        Expand groups to the dictionaries find_duplicate_records reports.
+        
+        Args:
+            groups: Group numbers, e.g. one page from select()
+            included_df: The included frame the groups were found in
+            
+        Returns:
+            List of duplicate group dictionaries with row_id lists
+        """
+        if len(groups) == 0:
+            return []
+        bounds = [(int(self.offsets[group]), int(self.offsets[group + 1])) for group in groups]
+        positions = np.concatenate([self.positions[start:end] for start, end in bounds])
+        rows = to_display_frame(included_df.iloc[positions])
+        row_ids = rows['row_id'].tolist()
+        # Plain Python values, so the groups can be written as JSON
+        values = {field: rows[field].tolist() for field in ('name', 'birth_day', 'birth_month', 'birth_year')}
+        
+        described = []
+        cursor = 0
+        for group, (start, end) in zip(groups, bounds):
+            fields = DUPLICATE_FIELD_PAIRS[self.pair_index[group]]
+            described.append({
+                'matching_fields': list(fields),
+                'matching_values': {field: values[field][cursor] for field in fields},
+                'count': end - start,
+                'row_ids': row_ids[cursor:cursor + end - start]
+            })
+            cursor += end - start
+        return described
+    
+    def summary(self, included_df: pd.DataFrame, preview: int = DUPLICATE_PREVIEW_GROUPS) -> Dict:
+        """
+        Totals plus the first groups, in the shape of find_duplicate_records.
+        
+        Args:
+            included_df: The included frame the groups were found in
+            preview: Number of leading groups to expand
+            
+        Returns:
+            Dictionary with duplicate analysis (leading groups only)
+        """
+        return {
+            'total_duplicate_groups': len(self),
+            'total_duplicate_records': self.total_records,
+            'duplicate_groups': self.describe(np.arange(min(preview, len(self))), included_df)
+        }
+
+
+class LazySummary(Mapping):
+    
+    #Summary statistics computed section by section on first access, then cached.
+    
+    def __init__(self, included_df: pd.DataFrame = None, excluded_df: pd.DataFrame = None,
+                 original_count: int = 0, duplicates_path: str = None, stats: IncrementalStats = None):
+        self.included_df = included_df
+        self.excluded_df = excluded_df
+        self.original_count = original_count
+        self.duplicates_path = duplicates_path
+        self.stats = stats
+        self._sections = {}
+        self._duplicate_groups = None
+    
+    @classmethod
+    def from_stats(cls, stats: IncrementalStats, included_df: pd.DataFrame = None,
+                   excluded_df: pd.DataFrame = None) -> 'LazySummary':
+        """Summary whose sections are read from incrementally maintained statistics"""
+        return cls(included_df, excluded_df, stats=stats)
+    
+    def __getitem__(self, section: str):
+        if section not in SUMMARY_SECTIONS:
+            raise KeyError(section)
+        if section not in self._sections:
+            with stage(f'summary:{section}'):
+                self._sections[section] = self._compute(section)
+        return self._sections[section]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(SUMMARY_SECTIONS)
+    
+    def __len__(self) -> int:
+        return len(SUMMARY_SECTIONS)
+    
+    def __contains__(self, section) -> bool:
+        # Checking for a section must not compute it
+        return section in SUMMARY_SECTIONS
+    
+    def is_computed(self, section: str) -> bool:
+        """Whether a section has already been computed"""
+        return section in self._sections
+    
+    def restore(self, sections: Dict, duplicate_groups: DuplicateGroups = None):
+        """
+        Fill in sections (and duplicate groups) computed earlier for the same
+        rows, e.g. by another request, so they aren't computed again.
+        
+        Args:
+            sections: Section name -> value
+            duplicate_groups: Duplicate groups of the same included frame
+        """
+        for section, value in sections.items():
+            self._sections.setdefault(section, value)
+        if self._duplicate_groups is None:
+            self._duplicate_groups = duplicate_groups
+    
+    def has_duplicate_groups(self) -> bool:
+        """Whether the duplicate groups have already been found"""
+        return self._duplicate_groups is not None
+    
+    def duplicate_groups(self) -> DuplicateGroups:
+        """Compact duplicate groups of the included frame, found on first use"""
+        if self._duplicate_groups is None:
+            included_df = self.included_df if self.included_df is not None else pd.DataFrame()
+            with stage('duplicates', rows=len(included_df)):
+                self._duplicate_groups = DuplicateGroups.from_frame(included_df)
+        return self._duplicate_groups
+    
+    def _compute(self, section: str):
+        if self.stats is not None and (section != 'duplicates' or self.stats.duplicates is not None):
+            return self.stats.section(section)
+        if section == 'duplicates' and not self.duplicates_path and self.included_df is not None:
+            # Only the leading groups are expanded; the rest are paged on request
+            return self.duplicate_groups().summary(self.included_df)
+        
+        cleaner = DataCleaner(duplicates_path=self.duplicates_path)
+        cleaner.original_count = self.original_count
+        included_df = self.included_df if self.included_df is not None else pd.DataFrame()
+        excluded_df = self.excluded_df if self.excluded_df is not None else pd.DataFrame()
+        if section in ('uniqueness', 'duplicates', 'top_80_names') and not included_df.empty:
+            # Compact frames hold categorical names; group on plain values
+            included_df = to_display_frame(included_df)
+        return cleaner.summary_section(section, included_df, excluded_df)
+
+
+def _duplicate_sort_keys(included_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """int64 codes per duplicate field that sort like the field's values"""
+    return {field: sort_key(included_df[field]).astype('int64')
+            for field in ('name', 'birth_day', 'birth_month', 'birth_year')}
+
+
+def _add_count(counts: Dict, key, delta: int):
+    """Adjust a count, dropping keys that reach zero"""
+    count = counts.get(key, 0) + delta
+    if count:
+        counts[key] = count
+    else:
+        del counts[key]
@@ -0,0 +1,365 @@
+#import packages
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; sweeps are then not coordinated across processes
+    fcntl = None
+
+# Files the app writes per dataset: data/<dataset_id>_<file name>, dataset_cache/<dataset_id>_meta.pkl
+# and dataset_cache/<dataset_id>_cache.pkl (results computed on demand)
+# (IDs end in 8 random hex digits; IDs of datasets uploaded before that have none)
+DATASET_FILE_PATTERN = re.compile(r'^(dataset_\d+_\d{8}_\d{6}(?:_[0-9a-f]{8})?)_(.+)$')
+META_SUFFIX = '_meta.pkl'
+CACHE_SUFFIX = '_cache.pkl'
+FRAMES_DIRNAME = 'frames'
+
+# Files younger than this are never treated as orphans (uploads and saves in progress)
+ORPHAN_GRACE_SECONDS = 3600
+
+# Datasets used more recently than this are never evicted to meet the budget
+MIN_IDLE_SECONDS = 300
+
+# Access times are only rewritten when older than this, so busy datasets don't cost a write per request
+TOUCH_INTERVAL_SECONDS = 60
+
+STATS_FILENAME = 'storage_stats.json'
+LOCK_FILENAME = '.storage.lock'
+
+# Per-dataset lock files: dataset_cache/locks/<dataset_id>.lock, and <dataset_id>.cache.lock for the cache file
+LOCKS_DIRNAME = 'locks'
+
+
+class StorageManager:
+    
+    #Keeps data/ and dataset_cache/ within a disk budget. Datasets are evicted
+    #least recently used first, or once idle for longer than a TTL, and files
+    #no dataset (or the dataset catalog) references are garbage collected.
+    
+    def __init__(self, data_dir: str, cache_dir: str, budget_bytes: int = 0, ttl_seconds: float = 0,
+                 delete_dataset: Callable[[str], None] = None, catalog: Callable[[], Iterable[str]] = None,
+                 orphan_grace: float = ORPHAN_GRACE_SECONDS, min_idle: float = MIN_IDLE_SECONDS):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.budget_bytes = budget_bytes      # 0: unlimited
+        self.ttl_seconds = ttl_seconds        # 0: datasets never expire
+        self.delete_dataset = delete_dataset  # removes every file of a dataset
+        self.catalog = catalog                # dataset IDs a shared catalog lists, when there is one
+        self.orphan_grace = orphan_grace
+        self.min_idle = min_idle
+        self._thread = None
+    
+    def touch(self, dataset_id: str):
+        """Record that a dataset was used; its metadata file's mtime is its last access"""
+        path = os.path.join(self.cache_dir, f"{dataset_id}{META_SUFFIX}")
+        try:
+            if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(path)
+        except FileNotFoundError:
+            pass
+    
+    def scan(self) -> Dict:
+        """
+        Measure disk use per dataset and find orphaned files.
+        
+        Returns:
+            Dictionary with 'datasets' (dataset_id -> bytes and last access),
+            'orphans' (paths with bytes, past the grace period) and the bytes
+            used by data/ and dataset_cache/
+        """
+        now = time.time()
+        datasets = {}
+        orphans = []
+        
+        for name in _listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(META_SUFFIX) and os.path.isfile(path):
+                stat = os.stat(path)
+                datasets[name[:-len(META_SUFFIX)]] = {'bytes': stat.st_size, 'last_access': stat.st_mtime}
+        
+        catalog = None
+        if self.catalog is not None:
+            catalog = set(self.catalog())
+            # Metadata the catalog no longer lists belongs to no one
+            for dataset_id in [dataset_id for dataset_id in datasets if dataset_id not in catalog]:
+                info = datasets[dataset_id]
+                if now - info['last_access'] > self.orphan_grace:
+                    orphans.append({'path': os.path.join(self.cache_dir, f"{dataset_id}{META_SUFFIX}"),
+                                    'bytes': info['bytes'], 'dataset_id': dataset_id})
+                    del datasets[dataset_id]
+        
+        def claim(dataset_id, path, size, modified):
+            if dataset_id in datasets:
+                datasets[dataset_id]['bytes'] += size
+            elif now - modified > self.orphan_grace:
+                orphans.append({'path': path, 'bytes': size, 'dataset_id': dataset_id})
+        
+        data_bytes = 0
+        for name in _listdir(self.data_dir):
+            path = os.path.join(self.data_dir, name)
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            data_bytes += stat.st_size
+            match = DATASET_FILE_PATTERN.match(name)
+            if match is None:
+                continue  # not written by the app (e.g. sample CSVs)
+            if match.group(2).startswith('append_'):
+                # Append deltas are deleted after use; one left behind is an orphan
+                if now - stat.st_mtime > self.orphan_grace:
+                    orphans.append({'path': path, 'bytes': stat.st_size, 'dataset_id': match.group(1)})
+                elif match.group(1) in datasets:
+                    datasets[match.group(1)]['bytes'] += stat.st_size
+                continue
+            claim(match.group(1), path, stat.st_size, stat.st_mtime)
+        
+        for name in _listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(CACHE_SUFFIX) and os.path.isfile(path):
+                stat = os.stat(path)
+                claim(name[:-len(CACHE_SUFFIX)], path, stat.st_size, stat.st_mtime)
+        
+        frames_dir = os.path.join(self.cache_dir, FRAMES_DIRNAME)
+        for dataset_id in _listdir(frames_dir):
+            path = os.path.join(frames_dir, dataset_id)
+            claim(dataset_id, path, _tree_bytes(path), os.stat(path).st_mtime)
+        
+        for name in _listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            # Interrupted atomic writes
+            if name.endswith('.tmp') and os.path.isfile(path) and now - os.stat(path).st_mtime > self.orphan_grace:
+                orphans.append({'path': path, 'bytes': os.stat(path).st_size, 'dataset_id': None})
+        
+        return {
+            'datasets': datasets,
+            'orphans': orphans,
+            'data_bytes': data_bytes,
+            'cache_bytes': _tree_bytes(self.cache_dir)
+        }
+    
+    def sweep(self) -> Optional[Dict]:
+        """
+        Remove orphans, evict datasets idle past the TTL, then evict least
+        recently used datasets until disk use fits the budget. Only one
+        process sweeps at a time; others return immediately.
+        
+        Returns:
+            Dictionary describing the sweep, or None when another process was sweeping
+        """
+        with _SweepLock(os.path.join(self.cache_dir, LOCK_FILENAME)) as acquired:
+            if not acquired:
+                return None
+            started = time.perf_counter()
+            now = time.time()
+            scan = self.scan()
+            result = {'orphans_removed': 0, 'reclaimed_bytes': 0, 'evicted': [], 'evicted_bytes': 0}
+            
+            for orphan in scan['orphans']:
+                if _remove_path(orphan['path']):
+                    result['orphans_removed'] += 1
+                    result['reclaimed_bytes'] += orphan['bytes']
+            
+            datasets = scan['datasets']
+            used = scan['data_bytes'] + scan['cache_bytes'] - result['reclaimed_bytes']
+            # Least recently used first
+            candidates = sorted(datasets.items(), key=lambda item: item[1]['last_access'])
+            for dataset_id, info in candidates:
+                idle = now - info['last_access']
+                expired = self.ttl_seconds and idle > self.ttl_seconds
+                over_budget = self.budget_bytes and used > self.budget_bytes and idle > self.min_idle
+                if not (expired or over_budget):
+                    continue
+                self._evict(dataset_id)
+                used -= info['bytes']
+                result['evicted'].append(dataset_id)
+                result['evicted_bytes'] += info['bytes']
+                logging.info(f"Evicted dataset {dataset_id} ({info['bytes']} bytes, idle {idle:.0f}s, "
+                             f"{'expired' if expired else 'over budget'})")
+            
+            if self.budget_bytes and used > self.budget_bytes:
+                logging.warning(f"Storage use {used} bytes is over the {self.budget_bytes} byte budget; "
+                                f"the remaining datasets were used in the last {self.min_idle}s")
+            
+            result['used_bytes'] = used
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            self._record(result, now)
+            return result
+    
+    def metrics(self) -> Dict:
+        """
+        Current disk use and cumulative sweep counters.
+        
+        Returns:
+            Dictionary with bytes used (total, data/, dataset_cache/), dataset
+            count, budget and TTL settings, and bytes evicted and reclaimed so far
+        """
+        scan = self.scan()
+        stats = self._load_stats()
+        return {
+            'used_bytes': scan['data_bytes'] + scan['cache_bytes'],
+            'data_bytes': scan['data_bytes'],
+            'cache_bytes': scan['cache_bytes'],
+            'datasets': len(scan['datasets']),
+            'orphan_bytes': sum(orphan['bytes'] for orphan in scan['orphans']),
+            'budget_bytes': self.budget_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            **stats
+        }
+    
+    def start(self, interval: float):
+        """Sweep every interval seconds in a daemon thread (once per process)"""
+        if self._thread is not None or interval <= 0:
+            return
+        
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logging.error(f"Storage sweep failed: {e}")
+        
+        self._thread = threading.Thread(target=run, name='storage-sweeper', daemon=True)
+        self._thread.start()
+    
+    def _evict(self, dataset_id: str):
+        """Delete every file of a dataset"""
+        if self.delete_dataset is not None:
+            self.delete_dataset(dataset_id)
+            return
+        for path in self._dataset_paths(dataset_id):
+            _remove_path(path)
+    
+    def _dataset_paths(self, dataset_id: str) -> List[str]:
+        paths = [os.path.join(self.data_dir, name) for name in _listdir(self.data_dir)
+                 if name.startswith(f"{dataset_id}_")]
+        return paths + [os.path.join(self.cache_dir, f"{dataset_id}{META_SUFFIX}"),
+                        os.path.join(self.cache_dir, f"{dataset_id}{CACHE_SUFFIX}"),
+                        os.path.join(self.cache_dir, FRAMES_DIRNAME, dataset_id),
+                        dataset_lock_path(self.cache_dir, dataset_id),
+                        dataset_lock_path(self.cache_dir, dataset_id, 'cache')]
+    
+    def _load_stats(self) -> Dict:
+        stats = {'sweeps': 0, 'evicted_datasets': 0, 'evicted_bytes': 0, 'orphans_removed': 0,
+                 'reclaimed_bytes': 0, 'last_sweep_at': None, 'last_sweep_seconds': None}
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILENAME), 'r') as f:
+                stats.update(json.load(f))
+        except (FileNotFoundError, ValueError):
+            pass
+        return stats
+    
+    def _record(self, result: Dict, now: float):
+        """Add a sweep to the cumulative counters shared by all processes"""
+        stats = self._load_stats()
+        stats['sweeps'] += 1
+        stats['evicted_datasets'] += len(result['evicted'])
+        stats['evicted_bytes'] += result['evicted_bytes']
+        stats['orphans_removed'] += result['orphans_removed']
+        stats['reclaimed_bytes'] += result['reclaimed_bytes']
+        stats['last_sweep_at'] = now
+        stats['last_sweep_seconds'] = result['seconds']
+        path = os.path.join(self.cache_dir, STATS_FILENAME)
+        staging = f"{path}.{os.getpid()}.tmp"
+        with open(staging, 'w') as f:
+            json.dump(stats, f)
+        os.replace(staging, path)
+
+
+class DatasetLock:
+    
+    #Blocking exclusive lock on one dataset, held by a worker while it loads,
+    #changes and saves the dataset so concurrent writers don't lose updates.
+    #The 'cache' scope guards the dataset's cache file instead, so requests
+    #caching a result don't wait behind a clean or append.
+    
+    def __init__(self, cache_dir: str, dataset_id: str, scope: str = 'meta'):
+        self.path = dataset_lock_path(cache_dir, dataset_id, scope)
+        self.file = None
+    
+    def __enter__(self):
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+class _SweepLock:
+    
+    #Non-blocking exclusive lock file, so concurrent workers don't sweep at once.
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+    
+    def __enter__(self) -> bool:
+        if fcntl is None:
+            return True
+        self.file = open(self.path, 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+    
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def dataset_lock_path(cache_dir: str, dataset_id: str, scope: str = 'meta') -> str:
+    """Lock file guarding a dataset's metadata ('meta') or its cache file ('cache')"""
+    name = f"{dataset_id}.lock" if scope == 'meta' else f"{dataset_id}.{scope}.lock"
+    return os.path.join(cache_dir, LOCKS_DIRNAME, name)
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return os.listdir(path)
+    except FileNotFoundError:
+        return []
+
+
+def _tree_bytes(path: str) -> int:
+    """Total size of the files under a directory"""
+    total = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.stat(os.path.join(directory, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _remove_path(path: str) -> bool:
+    """Delete a file or directory tree; False if it was already gone or could not be removed"""
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logging.error(f"Error deleting {path}: {e}")
+        return False
@@ -0,0 +1,351 @@
+#import packages
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .datacleaning import exclusion_catalog, to_display_frame
+
+# Columns of the included/excluded tables as shown on the page; position is the row's place in its frame
+INCLUDED_COLUMNS = ['row_id', 'name', 'birth_day', 'birth_month', 'birth_year']
+EXCLUDED_COLUMNS = INCLUDED_COLUMNS + ['exclusion_reason']
+
+# Columns the included table can be sorted on
+SORT_COLUMNS = ('row_id', 'name', 'birth_day', 'birth_month', 'birth_year')
+
+# Rows written per executemany batch
+INSERT_BATCH_ROWS = 50000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset_id TEXT PRIMARY KEY,
+    filename TEXT,
+    created_at TEXT,
+    cleaned INTEGER NOT NULL DEFAULT 0,
+    included_count INTEGER NOT NULL DEFAULT 0,
+    excluded_count INTEGER NOT NULL DEFAULT 0,
+    exclusion_reasons TEXT
+);
+CREATE TABLE IF NOT EXISTS included_rows (
+    dataset_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row_id TEXT NOT NULL,
+    name TEXT,
+    name_folded TEXT,
+    birth_day INTEGER,
+    birth_month INTEGER,
+    birth_year INTEGER,
+    PRIMARY KEY (dataset_id, position)
+);
+CREATE INDEX IF NOT EXISTS included_name ON included_rows (dataset_id, name, position);
+CREATE INDEX IF NOT EXISTS included_birth_day ON included_rows (dataset_id, birth_day, position);
+CREATE INDEX IF NOT EXISTS included_birth_month ON included_rows (dataset_id, birth_month, position);
+CREATE INDEX IF NOT EXISTS included_birth_year ON included_rows (dataset_id, birth_year, position);
+CREATE INDEX IF NOT EXISTS included_row_id ON included_rows (dataset_id, row_id, position);
+CREATE TABLE IF NOT EXISTS excluded_rows (
+    dataset_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row_id TEXT NOT NULL,
+    name,
+    birth_day,
+    birth_month,
+    birth_year,
+    exclusion_flags INTEGER NOT NULL,
+    exclusion_reason TEXT,
+    PRIMARY KEY (dataset_id, position)
+);
+"""
+
+
+class DatasetStore:
+    
+    #Shared SQLite store (WAL mode) of the dataset list and the cleaned rows.
+    #Filters, sorting and pagination run as indexed SQL queries, and any number
+    #of threads and worker processes can read and write the same database file.
+    
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use (and again in a forked child)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+    
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+    
+    def _write(self, statements, connection=None):
+        """Run (sql, params, many) statements in one write transaction"""
+        if connection is None:
+            with self._transaction() as connection:
+                return self._write(statements, connection)
+        for sql, params, many in statements:
+            if many:
+                connection.executemany(sql, params)
+            else:
+                connection.execute(sql, params)
+    
+    # Dataset list
+    
+    def add_dataset(self, dataset_id: str, filename: str = None):
+        """Register a new dataset; registering it again keeps the existing entry"""
+        self._write([(
+            'INSERT OR IGNORE INTO datasets (dataset_id, filename, created_at) VALUES (?, ?, ?)',
+            (dataset_id, filename, datetime.now().isoformat(timespec='seconds')), False
+        )])
+    
+    def dataset_ids(self) -> List[str]:
+        """IDs of all datasets in the store, oldest first"""
+        rows = self._connection().execute('SELECT dataset_id FROM datasets ORDER BY created_at, rowid')
+        return [row['dataset_id'] for row in rows]
+    
+    def remove_dataset(self, dataset_id: str):
+        """Drop a dataset and its rows"""
+        self._write([
+            (f'DELETE FROM {table} WHERE dataset_id = ?', (dataset_id,), False)
+            for table in ('included_rows', 'excluded_rows', 'datasets')
+        ])
+    
+    def remove_all(self):
+        """Drop every dataset and row"""
+        self._write([(f'DELETE FROM {table}', (), False) for table in ('included_rows', 'excluded_rows', 'datasets')])
+    
+    # Cleaned rows
+    
+    def has_rows(self, dataset_id: str) -> bool:
+        """Whether the dataset's cleaned rows are in the store"""
+        row = self._connection().execute('SELECT cleaned FROM datasets WHERE dataset_id = ?', (dataset_id,)).fetchone()
+        return bool(row and row['cleaned'])
+    
+    def replace_rows(self, dataset_id: str, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        """
+        Store a dataset's cleaned rows, replacing any stored before (after cleaning or re-cleaning).
+        
+        Args:
+            dataset_id: Dataset the rows belong to
+            included_df: All included rows (plain or compact)
+            excluded_df: All excluded rows (plain or compact)
+        """
+        statements = [
+            (f'DELETE FROM {table} WHERE dataset_id = ?', (dataset_id,), False)
+            for table in ('included_rows', 'excluded_rows')
+        ]
+        statements.append(('UPDATE datasets SET cleaned = 0, included_count = 0, excluded_count = 0 '
+                           'WHERE dataset_id = ?', (dataset_id,), False))
+        self._write(statements + self._insert_statements(dataset_id, included_df, excluded_df, 0, 0))
+    
+    def append_rows(self, dataset_id: str, included_df: pd.DataFrame, excluded_df: pd.DataFrame):
+        """
+        Store rows appended to a dataset's frames, after the rows already stored.
+        
+        Args:
+            dataset_id: Dataset the rows belong to
+            included_df: New included rows (plain or compact)
+            excluded_df: New excluded rows (plain or compact)
+        """
+        # Positions are read inside the write transaction, so concurrent appends can't collide
+        with self._transaction() as connection:
+            row = connection.execute('SELECT included_count, excluded_count FROM datasets WHERE dataset_id = ?',
+                                     (dataset_id,)).fetchone()
+            included_start, excluded_start = (row['included_count'], row['excluded_count']) if row else (0, 0)
+            self._write(self._insert_statements(dataset_id, included_df, excluded_df, included_start, excluded_start),
+                        connection)
+    
+    def clear_rows(self, dataset_id: str):
+        """Forget a dataset's cleaned rows, e.g. when they were invalidated"""
+        self._write([
+            (f'DELETE FROM {table} WHERE dataset_id = ?', (dataset_id,), False)
+            for table in ('included_rows', 'excluded_rows')
+        ] + [('UPDATE datasets SET cleaned = 0, included_count = 0, excluded_count = 0 WHERE dataset_id = ?',
+              (dataset_id,), False)])
+    
+    def _insert_statements(self, dataset_id, included_df, excluded_df, included_start, excluded_start):
+        """Insert statements for new rows, plus the dataset's updated counts"""
+        statements = []
+        included_count = included_start + (0 if included_df is None else len(included_df))
+        excluded_count = excluded_start + (0 if excluded_df is None else len(excluded_df))
+        
+        if included_df is not None and not included_df.empty:
+            display_df = to_display_frame(included_df)
+            names = display_df['name'].astype(object).tolist()
+            columns = [
+                [dataset_id] * len(display_df),
+                range(included_start, included_count),
+                display_df['row_id'].tolist(),
+                names,
+                [name.lower() if isinstance(name, str) else name for name in names],
+                *(display_df[field].astype('int64').tolist() for field in ('birth_day', 'birth_month', 'birth_year'))
+            ]
+            statements += self._batches('INSERT INTO included_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)', list(zip(*columns)))
+        
+        reasons = None
+        if excluded_df is not None and not excluded_df.empty:
+            reasons = exclusion_catalog(excluded_df)
+            display_df = to_display_frame(excluded_df)
+            columns = [
+                [dataset_id] * len(display_df),
+                range(excluded_start, excluded_count),
+                *(_sql_values(display_df[field]) for field in ('row_id', 'name', 'birth_day', 'birth_month', 'birth_year')),
+                excluded_df['exclusion_flags'].astype('int64').tolist(),
+                display_df['exclusion_reason'].tolist()
+            ]
+            statements += self._batches('INSERT INTO excluded_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', list(zip(*columns)))
+        
+        statements.append((
+            'UPDATE datasets SET cleaned = 1, included_count = ?, excluded_count = ?, '
+            'exclusion_reasons = COALESCE(?, exclusion_reasons) WHERE dataset_id = ?',
+            (included_count, excluded_count, json.dumps(reasons) if reasons is not None else None, dataset_id), False
+        ))
+        return statements
+    
+    @staticmethod
+    def _batches(sql, rows):
+        return [(sql, rows[start:start + INSERT_BATCH_ROWS], True) for start in range(0, len(rows), INSERT_BATCH_ROWS)]
+    
+    # Queries
+    
+    def query_included(self, dataset_id: str, filters: Dict = None, sort_by: str = '', sort_order: str = 'asc',
+                       limit: int = 50, offset: int = 0, after: Tuple = None) -> Tuple[int, List[Dict], Optional[List]]:
+        """
+        Filter, sort and page a dataset's included rows in SQL.
+        
+        Args:
+            dataset_id: Dataset to query
+            filters: Optional 'name' (case-insensitive substring) and exact
+                'birth_day', 'birth_month', 'birth_year' values
+            sort_by: One of SORT_COLUMNS, or '' for frame order (ties keep frame order too)
+            sort_order: 'asc' or 'desc'
+            limit: Rows per page
+            offset: Rows to skip (page-number paging)
+            after: Cursor from a previous page for keyset paging; offset is ignored when given
+        
+        Returns:
+            Tuple of (matching row count, page rows, cursor for the next page or None)
+        """
+        where, params = ['dataset_id = ?'], [dataset_id]
+        for field, value in (filters or {}).items():
+            if field == 'name':
+                where.append('instr(name_folded, ?) > 0')
+                params.append(value.lower())
+            else:
+                where.append(f'{field} = ?')
+                params.append(value)
+        
+        sort_column = sort_by if sort_by in SORT_COLUMNS else None
+        descending = sort_order == 'desc'
+        
+        if len(where) == 1:
+            total = self._count('included', dataset_id)
+        else:
+            total = self._connection().execute(f"SELECT COUNT(*) FROM included_rows WHERE {' AND '.join(where)}",
+                                               params).fetchone()[0]
+        
+        # Keyset paging continues after the last row of the previous page
+        page_where, page_params = list(where), list(params)
+        if after is not None:
+            if sort_column is None:
+                page_where.append('position > ?')
+                page_params.append(after[-1])
+            else:
+                page_where.append(f"({sort_column} {'<' if descending else '>'} ? OR ({sort_column} = ? AND position > ?))")
+                page_params += [after[0], after[0], after[1]]
+            offset = 0
+        
+        order = 'position'
+        if sort_column is not None:
+            order = f"{sort_column} {'DESC' if descending else 'ASC'}, position"
+        rows = self._connection().execute(
+            f"SELECT position, {', '.join(INCLUDED_COLUMNS)} FROM included_rows "
+            f"WHERE {' AND '.join(page_where)} ORDER BY {order} LIMIT ? OFFSET ?",
+            page_params + [limit, offset]
+        ).fetchall()
+        
+        page = [{column: row[column] for column in INCLUDED_COLUMNS} for row in rows]
+        cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            cursor = [last['position']] if sort_column is None else [last[sort_column], last['position']]
+        return total, page, cursor
+    
+    def query_excluded(self, dataset_id: str, reason: str = '', limit: int = 50, offset: int = 0,
+                       after: Tuple = None) -> Tuple[int, List[Dict], Optional[List]]:
+        """
+        Filter and page a dataset's excluded rows in SQL, in frame order.
+        
+        Args:
+            dataset_id: Dataset to query
+            reason: Only rows excluded for this reason (ignored when not in the dataset's catalog)
+            limit: Rows per page
+            offset: Rows to skip (page-number paging)
+            after: Cursor from a previous page for keyset paging; offset is ignored when given
+        
+        Returns:
+            Tuple of (matching row count, page rows, cursor for the next page or None)
+        """
+        where, params = ['dataset_id = ?'], [dataset_id]
+        if reason:
+            row = self._connection().execute('SELECT exclusion_reasons FROM datasets WHERE dataset_id = ?',
+                                             (dataset_id,)).fetchone()
+            reasons = json.loads(row['exclusion_reasons']) if row and row['exclusion_reasons'] else []
+            if reason in reasons:
+                where.append('(exclusion_flags & ?) != 0')
+                params.append(1 << reasons.index(reason))
+        
+        if len(where) == 1:
+            total = self._count('excluded', dataset_id)
+        else:
+            total = self._connection().execute(f"SELECT COUNT(*) FROM excluded_rows WHERE {' AND '.join(where)}",
+                                               params).fetchone()[0]
+        
+        if after is not None:
+            where.append('position > ?')
+            params.append(after[-1])
+            offset = 0
+        rows = self._connection().execute(
+            f"SELECT position, {', '.join(EXCLUDED_COLUMNS)} FROM excluded_rows "
+            f"WHERE {' AND '.join(where)} ORDER BY position LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        
+        page = [{column: row[column] for column in EXCLUDED_COLUMNS} for row in rows]
+        cursor = [rows[-1]['position']] if len(rows) == limit else None
+        return total, page, cursor
+    
+    def _count(self, table: str, dataset_id: str) -> int:
+        row = self._connection().execute(f'SELECT {table}_count FROM datasets WHERE dataset_id = ?',
+                                         (dataset_id,)).fetchone()
+        return row[0] if row else 0
+
+
+def _sql_values(column: pd.Series) -> List:
+    """Display values as plain Python values SQLite accepts"""
+    return [value.item() if hasattr(value, 'item') else value for value in column.astype(object).tolist()]
@@ -0,0 +1,47 @@
+import json
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from generate import generate_csv
+from src.batch import COMBINED_SUMMARY_FILENAME, PREVIEW_ROW_IDS, STATS_STATE_FILENAME, run_batch
+from src.datacleaning import DataCleaner
+from src.stats import DUPLICATE_PREVIEW_GROUPS
+
+
+def test_combined_duplicates_span_files_with_bounded_output(tmp_path):
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    for i in range(3):
+        generate_csv(str(input_dir / f'part{i}.csv'), 1500, names=200, seed=i)
+    output_dir = str(tmp_path / 'reports')
+    
+    batch = run_batch([str(input_dir)], output_dir=output_dir, workers=2, verbose=False)
+    assert batch['totals']['cleaned'] == 3
+    
+    # Oracle: duplicates of every file's included rows together
+    included_df = pd.concat([pd.read_csv(os.path.join(output_dir, f'part{i}', 'data_included.csv'),
+                                         dtype={'name': str}, keep_default_na=False)
+                             for i in range(3)], ignore_index=True)
+    expected = DataCleaner().find_duplicate_records(included_df)
+    duplicates = batch['summary']['duplicates']
+    assert duplicates['total_duplicate_groups'] == expected['total_duplicate_groups']
+    assert duplicates['total_duplicate_records'] == expected['total_duplicate_records']
+    assert duplicates['duplicate_groups'] == [dict(group, row_ids=group['row_ids'][:PREVIEW_ROW_IDS])
+                                              for group in expected['duplicate_groups'][:DUPLICATE_PREVIEW_GROUPS]]
+    
+    # Only the leading groups are written out, and the per-file states hold no row-level groups
+    with open(os.path.join(output_dir, COMBINED_SUMMARY_FILENAME)) as f:
+        assert len(json.load(f)['duplicates']['duplicate_groups']) == DUPLICATE_PREVIEW_GROUPS
+    for i in range(3):
+        with open(os.path.join(output_dir, f'part{i}', STATS_STATE_FILENAME), 'rb') as f:
+            assert pickle.load(f).duplicates is None
+    
+    # Unchanged files are skipped but still counted
+    again = run_batch([str(input_dir)], output_dir=output_dir, workers=2, verbose=False)
+    assert again['totals']['skipped'] == 3
+    assert again['summary'] == batch['summary']
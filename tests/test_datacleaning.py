@@ -0,0 +1,34 @@
+import copy
+
+import pandas as pd
+
+from src.datacleaning import DataCleaner, append_frames, to_display_frame
+from src.rules import DEFAULT_RULES
+
+
+def clean(rows, rules=None):
+    cleaner = DataCleaner(deterministic_ids=True, rules=rules)
+    df = pd.DataFrame(rows, columns=['name', 'birth_day', 'birth_month', 'birth_year'])
+    return cleaner.compact_frames(*cleaner.clean_data(df))
+
+
+def test_compact_frames_keeps_values_beyond_the_usual_date_range():
+    # The default rules set no maximum year
+    included_df, _ = clean([['Alice', '1', '2', '99999'], ['Bobby', '3', '4', '1990']])
+    assert to_display_frame(included_df)['birth_year'].tolist() == [99999, 1990]
+    
+    # Rule sets without day/month limits can let through values past uint8
+    rules = copy.deepcopy(DEFAULT_RULES)
+    for field in rules['fields']:
+        if field['field'] in ('birth_day', 'birth_month'):
+            field['checks'] = []
+    wide_df, _ = clean([['Carol', '300', '-5', '2000']], rules)
+    display_df = to_display_frame(append_frames(included_df, wide_df))
+    assert display_df[['birth_day', 'birth_month', 'birth_year']].values.tolist() == \
+        [[1, 2, 99999], [3, 4, 1990], [300, -5, 2000]]
+
+
+def test_compact_frames_uses_small_dtypes_for_usual_dates():
+    included_df, _ = clean([['Alice', '1', '2', '1990']])
+    assert included_df['birth_day'].dtype == 'uint8'
+    assert included_df['birth_year'].dtype == 'uint16'
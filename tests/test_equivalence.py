@@ -0,0 +1,240 @@
+import copy
+import csv
+import gzip
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from generate import generate_csv
+from src.datacleaning import DataCleaner, append_frames, to_display_frame
+from src.duplicates import DuplicateIndex, iter_duplicate_groups
+from src.ingest import COLUMN_MAPPING, RawRowIndex, append_raw_file, read_csv_file, scan_record_starts
+from src.rules import DEFAULT_RULES
+from src.stats import DuplicateGroups, IncrementalStats, LazySummary
+
+ROWS = 4000
+
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    """Dirty source rows, as the upload route reads them"""
+    filepath = str(tmp_path_factory.mktemp('source') / 'source.csv')
+    generate_csv(filepath, ROWS, names=300, seed=7)
+    return read_csv_file(filepath).rename(columns=COLUMN_MAPPING)
+
+
+def full_clean(df, rules=None):
+    """Oracle: clean the source from scratch, as an upload does"""
+    cleaner = DataCleaner(deterministic_ids=True, rules=rules)
+    included_df, excluded_df = cleaner.clean_data(df)
+    return cleaner, cleaner.compact_frames(included_df, excluded_df)
+
+
+def included_rows(df):
+    return sorted(to_display_frame(df).itertuples(index=False, name=None))
+
+
+def excluded_reasons(df):
+    display_df = to_display_frame(df)
+    return sorted(zip(display_df['row_id'], display_df['exclusion_reason']))
+
+
+def top_80_modulo_ties(section):
+    """top_80_names with the order of equal frequencies (and which tied names make the cut) left out"""
+    names = section['top_names']
+    cutoff = names[-1]['frequency'] if names else 0
+    return {
+        'totals': {key: value for key, value in section.items() if key != 'top_names'},
+        'frequencies': sorted(name['frequency'] for name in names),
+        'above_cutoff': sorted(name['name'] for name in names if name['frequency'] > cutoff)
+    }
+
+
+def assert_same_summary(summary, expected):
+    assert summary['dataset_sizes'] == expected['dataset_sizes']
+    assert summary['uniqueness'] == expected['uniqueness']
+    assert sorted(map(tuple, (item.values() for item in summary['exclusion_reasons']))) == \
+        sorted(map(tuple, (item.values() for item in expected['exclusion_reasons'])))
+    assert top_80_modulo_ties(summary['top_80_names']) == top_80_modulo_ties(expected['top_80_names'])
+
+
+def group_sets(result):
+    return sorted((tuple(group['matching_fields']), tuple(sorted(group['row_ids'])))
+                  for group in result['duplicate_groups'])
+
+
+def changed_rules():
+    rules = copy.deepcopy(DEFAULT_RULES)
+    fields = {field['field']: field for field in rules['fields']}
+    fields['name']['checks'][0]['value'] = 5
+    fields['birth_year']['checks'][0]['value'] = 1975
+    return rules
+
+
+@pytest.mark.parametrize('rules', [changed_rules(), DEFAULT_RULES])
+def test_reclean_matches_full_clean(source, rules):
+    cleaner, (included_df, excluded_df) = full_clean(source)
+    stats = IncrementalStats.from_frames(included_df, excluded_df, len(source), track_duplicates=False)
+    
+    result = DataCleaner(deterministic_ids=True, rules=rules).reclean(included_df, excluded_df, DEFAULT_RULES)
+    stats.apply_reclean(result)
+    
+    oracle, (expected_included, expected_excluded) = full_clean(source, rules)
+    assert included_rows(result['included_df']) == included_rows(expected_included)
+    assert excluded_reasons(result['excluded_df']) == excluded_reasons(expected_excluded)
+    expected = oracle.get_summary_stats(expected_included, expected_excluded)
+    assert_same_summary({section: stats.section(section) for section in expected if section != 'duplicates'},
+                        expected)
+
+
+def test_reclean_there_and_back_restores_the_clean(source):
+    _, (included_df, excluded_df) = full_clean(source)
+    there = DataCleaner(rules=changed_rules()).reclean(included_df, excluded_df, DEFAULT_RULES)
+    back = DataCleaner().reclean(there['included_df'], there['excluded_df'], changed_rules())
+    
+    assert included_rows(back['included_df']) == included_rows(included_df)
+    assert excluded_reasons(back['excluded_df']) == excluded_reasons(excluded_df)
+
+
+def test_incremental_stats_match_full_clean(source):
+    cleaner, (included_df, excluded_df) = full_clean(source)
+    expected = cleaner.get_summary_stats(included_df, excluded_df)
+    
+    # Rows arrive as an upload and two appends, each cleaned on its own; the
+    # last append is counted separately and merged
+    bounds = [0, ROWS // 5, ROWS // 2, ROWS]
+    parts = [full_clean(source.iloc[start:stop].reset_index(drop=True))[1] + (stop - start,)
+             for start, stop in zip(bounds, bounds[1:])]
+    stats = IncrementalStats()
+    for included_part, excluded_part, count in parts[:-1]:
+        stats.update(included_part, excluded_part, count)
+    stats.merge(IncrementalStats.from_frames(*parts[-1]))
+    
+    summary = stats.summary()
+    assert_same_summary(summary, expected)
+    assert summary['duplicates']['total_duplicate_groups'] == expected['duplicates']['total_duplicate_groups']
+    assert summary['duplicates']['total_duplicate_records'] == expected['duplicates']['total_duplicate_records']
+
+
+@pytest.mark.parametrize('track_duplicates', [True, False])
+def test_lazy_summary_reads_tracked_statistics(source, track_duplicates):
+    cleaner, (included_df, excluded_df) = full_clean(source)
+    expected = cleaner.get_summary_stats(included_df, excluded_df)
+    stats = IncrementalStats.from_frames(included_df, excluded_df, len(source), track_duplicates=track_duplicates)
+    summary = LazySummary.from_stats(stats, included_df, excluded_df)
+    
+    assert_same_summary(summary, expected)
+    for key in ('total_duplicate_groups', 'total_duplicate_records'):
+        assert summary['duplicates'][key] == expected['duplicates'][key]
+    # Statistics that track duplicates answer for them; otherwise the compact groups are found
+    assert summary.has_duplicate_groups() != track_duplicates
+
+
+def test_duplicate_structures_match_full_scan(source, tmp_path):
+    cleaner, (included_df, _) = full_clean(source)
+    expected = cleaner.find_duplicate_records(included_df)
+    assert expected['total_duplicate_groups'] > 0
+    
+    # Out-of-core pass with a budget small enough to spill every run
+    groups_path = str(tmp_path / 'groups.jsonl')
+    external = DataCleaner(memory_budget=1).find_duplicate_records_external(included_df, groups_path, chunksize=500)
+    assert external['total_duplicate_groups'] == expected['total_duplicate_groups']
+    assert external['total_duplicate_records'] == expected['total_duplicate_records']
+    assert group_sets({'duplicate_groups': list(iter_duplicate_groups(groups_path))}) == group_sets(expected)
+    
+    groups = DuplicateGroups.from_frame(included_df)
+    assert len(groups) == expected['total_duplicate_groups']
+    described = groups.describe(groups.select(), included_df)
+    assert group_sets({'duplicate_groups': described}) == group_sets(expected)
+    
+    index = DuplicateIndex()
+    index.add_rows(included_df.assign(row_id=to_display_frame(included_df)['row_id']))
+    summary = index.summary()
+    assert summary['total_duplicate_groups'] == expected['total_duplicate_groups']
+    assert summary['total_duplicate_records'] == expected['total_duplicate_records']
+
+
+@pytest.mark.parametrize('text', [
+    'a,b\nTrue,1\nfalse,2\n',                        # booleans
+    'a,b\nTrue,1\nNA,2\n',                           # booleans with a missing value
+    'a\n True\nFalse\n',                             # not booleans once padded
+    'a,b\n99999999999999999999,1\n2,2\n',            # integers past int64
+    'a\n18446744073709551615\n1\n',                  # ... that fit uint64
+    'a\n18446744073709551615\n-1\n',
+    'a,b\n1,2,3\n4,5\n',                             # extra fields
+    'a,b\n1\n4,5\n',                                 # missing fields
+    'a,b\n 7,x\n,y\n1.5,NA\n'                       # padded numbers, missing values
+])
+def test_arrow_parser_matches_pandas(tmp_path, text):
+    pytest.importorskip('pyarrow')
+    filepath = str(tmp_path / 'parse.csv')
+    with open(filepath, 'w', newline='') as f:
+        f.write(text)
+    expected = read_csv_file(filepath, parser='pandas')
+    result = read_csv_file(filepath, parser='arrow')
+    pd.testing.assert_frame_equal(result, expected)
+    for column in expected:
+        assert [type(value) for value in result[column]] == [type(value) for value in expected[column]]
+
+
+def test_extended_duplicate_groups_match_full_scan(source):
+    # Upload, then two appends, each cleaned on its own
+    bounds = [0, ROWS // 2, ROWS * 3 // 4, ROWS]
+    parts = [full_clean(source.iloc[start:stop].reset_index(drop=True))[1][0]
+             for start, stop in zip(bounds, bounds[1:])]
+    included_df = parts[0]
+    groups = DuplicateGroups.from_frame(included_df)
+    for part in parts[1:]:
+        included_df = append_frames(included_df, part)
+        groups = groups.extend(included_df)
+        expected = DuplicateGroups.from_frame(included_df)
+        for attribute in ('pair_index', 'offsets', 'positions'):
+            assert getattr(groups, attribute).tolist() == getattr(expected, attribute).tolist()
+        assert groups.total_records == expected.total_records
+    described = groups.describe(groups.select(), included_df)
+    assert group_sets({'duplicate_groups': described}) == group_sets(DataCleaner().find_duplicate_records(included_df))
+
+
+def write_csv(filepath, rows, opener=open):
+    with opener(filepath, 'wt', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+@pytest.mark.parametrize('suffix, opener', [('.csv', open), ('.csv.gz', gzip.open)])
+def test_raw_row_index_matches_csv_reader(tmp_path, suffix, opener):
+    header = ['FirstName', 'BirthDay', 'BirthMonth', 'BirthYear']
+    rows = [[f'Name {i}', str(i % 28 + 1), str(i % 12 + 1), str(1950 + i % 50)] for i in range(300)]
+    # Quoted newlines, commas and quotes must not split records
+    rows[3][0] = 'Line\nbreak'
+    rows[10][0] = 'Comma, "quoted"'
+    rows[11][0] = 'Carriage\r\nreturn'
+    filepath = str(tmp_path / f'raw{suffix}')
+    write_csv(filepath, [header] + rows[:200], opener)
+    delta_filepath = str(tmp_path / 'delta.csv')
+    write_csv(delta_filepath, [header] + rows[200:])
+    
+    index = RawRowIndex(filepath)
+    assert len(index) == 200
+    append_raw_file(filepath, delta_filepath)
+    index.extend()
+    
+    with opener(filepath, 'rt', newline='') as f:
+        expected = list(csv.DictReader(f))
+    assert len(index) == len(expected) == 300
+    assert index.read_rows(0, len(index)) == expected
+    assert index.read_rows(195, 205) == expected[195:205]
+
+
+def test_record_starts_do_not_depend_on_chunk_boundaries():
+    data = b'name,year\n"one\nquoted field spanning\nseveral lines",1990\nplain,1991\r\n"a ""b""",1992\n'
+    expected = scan_record_starts([data])
+    assert expected[0].tolist() == [10, 57, 69, 84]
+    for size in range(1, len(data) + 1):
+        starts, crlf, end = scan_record_starts(data[i:i + size] for i in range(0, len(data), size))
+        assert starts.tolist() == expected[0].tolist(), size
+        assert crlf.tolist() == expected[1].tolist(), size
+        assert end == len(data)
@@ -0,0 +1,85 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from src.ingest import DecompressedSizeExceeded, RawRowIndex, append_raw_file, save_raw_file
+
+HEADER = b'FirstName,BirthDay,BirthMonth,BirthYear\n'
+
+
+def gzipped(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('keep_compressed', [False, True])
+def test_save_raw_file_rejects_uploads_expanding_past_the_limit(tmp_path, keep_compressed):
+    bomb = gzipped(HEADER + b'Alice,1,2,1990\n' * 20000)
+    filepath = str(tmp_path / 'bomb.csv.gz')
+    with pytest.raises(DecompressedSizeExceeded):
+        save_raw_file(io.BytesIO(bomb), filepath, keep_compressed=keep_compressed, max_bytes=64 * 1024)
+    assert os.listdir(tmp_path) == []
+    
+    stored_path = save_raw_file(io.BytesIO(bomb), filepath, keep_compressed=keep_compressed, max_bytes=1024 * 1024)
+    assert len(RawRowIndex(stored_path)) == 20000
+
+
+def test_append_raw_file_rejects_deltas_expanding_past_the_limit(tmp_path):
+    filepath = str(tmp_path / 'raw.csv')
+    with open(filepath, 'wb') as f:
+        f.write(HEADER + b'Alice,1,2,1990\n')
+    delta_filepath = str(tmp_path / 'delta.csv.gz')
+    with open(delta_filepath, 'wb') as f:
+        f.write(gzipped(HEADER + b'Bob,3,4,1991\n' * 20000))
+    
+    with pytest.raises(DecompressedSizeExceeded):
+        append_raw_file(filepath, delta_filepath, max_bytes=64 * 1024)
+    append_raw_file(filepath, delta_filepath)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client of the app, with its data and cache folders under tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('STORAGE_SWEEP_SECONDS', '0')
+    os.makedirs('data')
+    os.makedirs('dataset_cache')
+    import main
+    main.app.config['TESTING'] = True
+    return main.app.test_client()
+
+
+def upload(client, data, **form):
+    response = client.post('/upload', data={'file': (io.BytesIO(data), 'upload.csv'), **form},
+                           content_type='multipart/form-data', headers={'Accept': 'application/json'})
+    return response.get_json()
+
+
+def test_upload_reads_non_utf8_files_with_replacement(client):
+    header = 'FirstName,BirthDay,BirthMonth,BirthYear,Städt\n'.encode('latin-1')
+    rows = ''.join(f'Zoë {i},1,2,1990,Zürich\n' for i in range(50)).encode('latin-1')
+    
+    result = upload(client, header + rows)
+    (status,) = result['files']
+    assert status['status'] == 'ingested' and status['rows'] == 50
+    page = client.get(f"/?dataset_id={status['dataset_id']}")
+    assert page.status_code == 200
+    
+    # The appended file's header is decoded the same way
+    result = upload(client, header + rows[:30], mode='append', dataset_id=status['dataset_id'])
+    assert result['files'][0]['status'] == 'appended'
+
+
+def test_failed_ingest_removes_the_raw_file(client, monkeypatch):
+    import main
+    
+    def fail(*args):
+        raise OSError('unreadable')
+    monkeypatch.setattr(main, 'RawRowIndex', fail)
+    (status,) = upload(client, HEADER + b'Alice,1,2,1990\n')['files']
+    assert status['status'] == 'error'
+    assert os.listdir('data') == []
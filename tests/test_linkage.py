@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.linkage import dataset_overlaps
+
+
+def dense_overlaps(offsets, dataset_numbers, dataset_count):
+    """The counts from a groups x datasets presence matrix"""
+    group_count = len(offsets) - 1
+    presence = np.zeros((group_count, dataset_count), dtype=np.int64)
+    presence[np.repeat(np.arange(group_count), np.diff(offsets)), dataset_numbers] = 1
+    return presence.sum(axis=1), presence.T @ presence
+
+
+def random_links(seed, group_count, dataset_count):
+    """Groups laid out as find_links returns them: rows ordered by dataset within a group"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(2, 7, group_count)
+    offsets = np.r_[0, np.cumsum(sizes)]
+    dataset_numbers = np.concatenate([np.sort(rng.integers(0, dataset_count, size)) for size in sizes])
+    return offsets, dataset_numbers.astype(np.int32)
+
+
+def test_sparse_overlaps_match_presence_matrix():
+    for seed, dataset_count in ((1, 2), (2, 3), (3, 7)):
+        offsets, dataset_numbers = random_links(seed, 500, dataset_count)
+        group_datasets, shared = dataset_overlaps(offsets, dataset_numbers, dataset_count)
+        expected_datasets, expected_shared = dense_overlaps(offsets, dataset_numbers, dataset_count)
+        
+        assert group_datasets.tolist() == expected_datasets.tolist()
+        upper = np.triu_indices(dataset_count, 1)
+        assert shared[upper].tolist() == expected_shared[upper].tolist()
+
+
+def test_sparse_overlaps_without_groups():
+    group_datasets, shared = dataset_overlaps(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), 3)
+    assert len(group_datasets) == 0
+    assert not shared.any()
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src import memory
+from src.datacleaning import DataCleaner
+from src.stats import IncrementalStats, LazySummary
+
+
+def cleaned_dataset(rows=3000):
+    df = pd.DataFrame({
+        'name': [f'Name{i % 700}' for i in range(rows)],
+        'birth_day': [i % 28 + 1 for i in range(rows)],
+        'birth_month': [i % 12 + 1 for i in range(rows)],
+        'birth_year': [1940 + i % 70 for i in range(rows)]
+    })
+    cleaner = DataCleaner()
+    included_df, excluded_df = cleaner.compact_frames(*cleaner.clean_data(df))
+    stats = IncrementalStats.from_frames(included_df, excluded_df, rows, track_duplicates=False)
+    return {'included_df': included_df, 'excluded_df': excluded_df, 'stats_state': stats,
+            'summary_stats': LazySummary.from_stats(stats, included_df, excluded_df)}
+
+
+def test_footprint_counts_statistics_and_summary_caches():
+    metadata = cleaned_dataset()
+    before = memory.dataset_footprint(metadata)
+    assert before['statistics'] > 0
+    assert before['total'] == before['frames'] + before['indexes'] + before['statistics']
+    
+    # The summary shares the statistics object; only what it computed adds to the footprint
+    metadata['summary_stats'].duplicate_groups()
+    metadata['summary_stats']['top_80_names']
+    after = memory.dataset_footprint(metadata)
+    assert after['frames'] == before['frames']
+    assert after['statistics'] > before['statistics']
+
+
+def test_footprint_sampling_stays_close_to_full_measurement(monkeypatch):
+    metadata = cleaned_dataset()
+    sampled = memory.dataset_footprint(metadata)['statistics']
+    monkeypatch.setattr(memory, 'SAMPLE_ITEMS', 10 ** 9)
+    full = memory.dataset_footprint(metadata)['statistics']
+    assert abs(sampled - full) < 0.1 * full
@@ -0,0 +1,64 @@
+import pickle
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.datacleaning import generate_row_ids, row_ids_to_binary, row_ids_to_text
+from src.rowindex import RowIdIndex
+
+
+def make_frame(count, seed, trailing_nul_every=7):
+    """Frame of binary row ids, with every nth id ending in one or more NUL bytes"""
+    ids = np.frombuffer(generate_row_ids(count, fingerprint=f'rows-{seed}').tobytes(),
+                        dtype=np.uint8).reshape(count, 16).copy()
+    ids[::trailing_nul_every, 15] = 0
+    ids[::trailing_nul_every * 3, 14] = 0
+    row_ids = pd.Series(list(ids.view('S16').ravel()), dtype=object).map(lambda raw: raw.ljust(16, b'\x00'))
+    return pd.DataFrame({'row_id': row_ids_to_binary(row_ids)})
+
+
+def assert_every_id_found(index, frames):
+    for table, df in frames:
+        for position, row_id in enumerate(row_ids_to_text(df['row_id'])):
+            assert index.locate(row_id) == (table, position), row_id
+
+
+def test_locates_every_id_including_trailing_nul_bytes():
+    included, excluded = make_frame(500, 1), make_frame(200, 2)
+    assert any(uuid.UUID(row_id).bytes.endswith(b'\x00') for row_id in row_ids_to_text(included['row_id']))
+    
+    index = RowIdIndex(included, excluded)
+    assert len(index) == 700
+    assert_every_id_found(index, [('included', included), ('excluded', excluded)])
+    assert index.locate(str(uuid.uuid4())) is None
+
+
+def test_locates_every_id_across_appended_and_merged_segments():
+    included, excluded = make_frame(50, 3), make_frame(20, 4)
+    index = RowIdIndex(included, excluded)
+    for batch in range(RowIdIndex.MAX_SEGMENTS + 3):
+        new_included, new_excluded = make_frame(30, 100 + batch), make_frame(10, 200 + batch)
+        index.extend(new_included, new_excluded)
+        included = pd.concat([included, new_included], ignore_index=True)
+        excluded = pd.concat([excluded, new_excluded], ignore_index=True)
+    
+    assert len(index._segments) <= RowIdIndex.MAX_SEGMENTS
+    assert_every_id_found(index, [('included', included), ('excluded', excluded)])
+
+
+def test_converts_indexes_pickled_with_hashed_segments():
+    included, excluded = make_frame(60, 5), make_frame(25, 6)
+    index = RowIdIndex(included, excluded)
+    # The earlier layout: a pd.Index of ids per segment, some with trailing NULs stripped
+    legacy = pickle.loads(pickle.dumps(index))
+    state = vars(legacy).copy()
+    state['_segments'] = [(table, offset, pd.Index([bytes(key).rstrip(b'\x00') if i % 2 else bytes(key).ljust(16, b'\x00')
+                                                    for i, key in enumerate(ids[np.argsort(positions)])], dtype=object))
+                          for table, offset, ids, positions in index._segments]
+    restored = pickle.loads(pickle.dumps(state))
+    converted = RowIdIndex.__new__(RowIdIndex)
+    converted.__setstate__(restored)
+    
+    assert all(len(segment) == 4 for segment in converted._segments)
+    assert_every_id_found(converted, [('included', included), ('excluded', excluded)])